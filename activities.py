@@ -0,0 +1,95 @@
+# activities.py
+
+"""
+任务活动定义。
+
+RNL 原先写死了活动 2211-videoWelfare 和任务名过滤条件“浏览组浏览任务”，支持另一个活动就要复制一份类。
+这里把一个活动描述为 Activity：
+
+- code:           活动编码，替换各任务接口的 activityCode 参数（见 endpoints.Endpoint.bind）。
+- task_keywords:  任务名包含其中任一关键字的任务才会执行。
+- browse_rounds:  每天执行的浏览轮数。
+- award_endpoint: 领取浏览奖励使用的接口名（ENDPOINTS 中的键）。
+- new_user_task:  是否执行应用下载试用任务，该任务的两个接口只适用于视频会员福利活动。
+
+账号配置中的 activities 字段列出额外参加的活动，元素为活动编码或包含上述字段的对象；
+主活动（视频会员福利）总是第一个执行。多个活动共用同一个已登录的会话，执行方式见 main.RNL.run_main_workflow。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Union
+
+from endpoints import ACTIVITY_CODE, ENDPOINTS, Endpoint
+
+BROWSE_TASK_KEYWORD = '浏览组浏览任务'
+
+
+@dataclass(frozen=True, slots=True)
+class Activity:
+    code: str
+    name: str = ''
+    task_keywords: Tuple[str, ...] = (BROWSE_TASK_KEYWORD,)
+    browse_rounds: int = 2
+    award_endpoint: str = 'luckDraw'
+    new_user_task: bool = False
+
+    def __post_init__(self):
+        if not self.code:
+            raise ValueError("活动编码不能为空")
+        if self.award_endpoint not in ENDPOINTS:
+            raise ValueError(f"活动 {self.code} 的领奖接口 {self.award_endpoint} 未注册")
+
+    @property
+    def label(self) -> str:
+        return self.name or self.code
+
+    def matches(self, task: Mapping[str, Any]) -> bool:
+        """任务是否属于本活动要执行的浏览任务。"""
+        task_name = task.get('taskName', '')
+        return any(keyword in task_name for keyword in self.task_keywords)
+
+    def endpoint(self, endpoint: Endpoint) -> Endpoint:
+        """本活动使用的接口：activityCode 替换为本活动的编码。"""
+        return endpoint.bind(activityCode=self.code)
+
+    def award(self) -> Endpoint:
+        return self.endpoint(ENDPOINTS[self.award_endpoint])
+
+    @classmethod
+    def from_config(cls, config: Union[str, Mapping[str, Any]]) -> 'Activity':
+        """从账号配置的 activities 元素创建；已知的活动编码返回内置定义。"""
+        if isinstance(config, str):
+            return ACTIVITIES.get(config) or cls(config)
+        keywords = config.get('task_keywords') or (BROWSE_TASK_KEYWORD,)
+        if isinstance(keywords, str):
+            keywords = (keywords,)
+        return cls(
+            code=str(config.get('code', '')),
+            name=str(config.get('name', '')),
+            task_keywords=tuple(keywords),
+            browse_rounds=int(config.get('browse_rounds', 2)),
+            award_endpoint=str(config.get('award_endpoint', 'luckDraw')),
+        )
+
+
+VIDEO_WELFARE = Activity(ACTIVITY_CODE, '视频会员福利', new_user_task=True)
+
+# 内置活动，按编码索引
+ACTIVITIES: Dict[str, Activity] = {activity.code: activity for activity in (VIDEO_WELFARE,)}
+
+DEFAULT_ACTIVITY = VIDEO_WELFARE
+
+
+def resolve_activities(configs: Iterable[Union[str, Mapping[str, Any]]]) -> List[Activity]:
+    """解析账号配置的 activities：主活动在前，重复的编码只保留第一个，无效的配置抛出 ValueError。"""
+    resolved = [DEFAULT_ACTIVITY]
+    seen = {DEFAULT_ACTIVITY.code}
+    for config in configs or ():
+        try:
+            activity = Activity.from_config(config)
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"活动配置无效：{config!r}") from e
+        if activity.code not in seen:
+            seen.add(activity.code)
+            resolved.append(activity)
+    return resolved
@@ -0,0 +1,373 @@
+# analytics.py
+
+"""
+执行结果历史统计。
+
+扫描结果存储（task_logs/<日期>/*.json），按 "日期 -> 账号" 汇总每天的执行次数、成功次数、
+失败接口、当天领到的奖励记录和最后一次查询到的可兑换天数，并在此基础上给出：
+- 每个账号在一段时间内的成功率、累计获得的金米（1 金米 = 1/100 天）和日均收益
+- 按当前余额和日均收益推算的距离 31 天（可兑换一张月卡）还需几天
+- 各接口的失败率
+- 任意两天之间各账号的余额变化和执行状态对比
+
+每天的汇总结果缓存在 task_logs/.analytics_cache.json 中。日期目录的修改时间没有变化时直接使用缓存，
+有新文件时只读取新增的结果文件，因此几个月的历史也不需要重新读取所有 JSON 文件。
+
+用法:
+  python analytics.py report                  # 最近 30 天的账号汇总与接口失败率
+  python analytics.py report --days 90 --account my_account_1
+  python analytics.py diff                    # 今天与昨天对比
+  python analytics.py diff 2024-01-01 2024-01-02
+  python analytics.py report --rebuild        # 丢弃缓存重新统计
+"""
+
+import argparse
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import codec
+from result_store import LOG_PATH, list_dates, load_run
+
+CACHE_FILE = ".analytics_cache.json"
+# 汇总格式变化时递增，旧缓存自动失效
+CACHE_VERSION = 1
+# 一张会员月卡需要的天数
+TARGET_DAYS = 31.0
+
+# 错误信息前缀 -> 失败的接口，按顺序匹配
+ERROR_ENDPOINTS: Tuple[Tuple[str, str], ...] = (
+    ("获取任务列表", "getTaskList"),
+    ("获取任务信息", "getTask"),
+    ("完成应用下载试用", "completeTask"),
+    ("完成任务", "completeTask"),
+    ("领取应用下载试用奖励", "luckDraw"),
+    ("领取奖励", "luckDraw"),
+    ("获取兑换视频天数", "queryUserGoldRichSum"),
+    ("查询任务完成记录", "queryUserJoinList"),
+    ("获取任务记录", "queryUserJoinList"),
+    ("获取会话 Cookie", "serviceLogin"),
+    ("配置不完整", "config"),
+    ("接口熔断", "circuit"),
+    ("执行已取消", "cancelled"),
+)
+
+
+def classify_error(error: Optional[str]) -> str:
+    """由执行结果中的错误信息判断失败的接口。"""
+    for prefix, endpoint in ERROR_ENDPOINTS:
+        if error and error.startswith(prefix):
+            return endpoint
+    return "unknown"
+
+
+def _empty_account() -> Dict[str, Any]:
+    return {
+        "runs": 0,
+        "successes": 0,
+        "failures": {},
+        "records": [],
+        "last_run": "",
+        "total_days": None,
+        "exchanges": 0,
+    }
+
+
+def aggregate_run(day: Dict[str, Dict[str, Any]], result) -> None:
+    """把一次执行结果累加到当天的汇总中。"""
+    acc = day.setdefault(result.us, _empty_account())
+    acc["runs"] += 1
+    if result.success:
+        acc["successes"] += 1
+    else:
+        endpoint = classify_error(result.error)
+        acc["failures"][endpoint] = acc["failures"].get(endpoint, 0) + 1
+    # 同一天多次执行会查到相同的奖励记录，按 (时间, 数值) 去重
+    records = {tuple(record) for record in acc["records"]}
+    records.update((record.create_time, record.value) for record in result.today_records)
+    acc["records"] = sorted(list(record) for record in records)
+    if result.total_days is not None and result.start_time >= acc["last_run"]:
+        acc["last_run"] = result.start_time
+        acc["total_days"] = result.total_days
+    acc["exchanges"] += sum(1 for exchange in result.exchange_results if exchange.success)
+
+
+def day_status(acc: Dict[str, Any]) -> str:
+    if acc["successes"] == acc["runs"]:
+        return "成功"
+    return "失败" if acc["successes"] == 0 else "部分失败"
+
+
+@dataclass(slots=True)
+class AccountSummary:
+    """一个账号在统计区间内的汇总。"""
+    us: str
+    active_days: int = 0
+    runs: int = 0
+    successes: int = 0
+    earned: int = 0  # 金米
+    exchanges: int = 0
+    balance: Optional[float] = None
+    balance_date: Optional[str] = None
+    failures: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.runs if self.runs else 0.0
+
+    @property
+    def daily_earned_days(self) -> float:
+        return self.earned / 100 / self.active_days if self.active_days else 0.0
+
+    @property
+    def days_to_target(self) -> Optional[int]:
+        """按日均收益推算余额达到 31 天还需的天数，无法推算时为 None。"""
+        if self.balance is None:
+            return None
+        if self.balance >= TARGET_DAYS:
+            return 0
+        if self.daily_earned_days <= 0:
+            return None
+        return math.ceil((TARGET_DAYS - self.balance) / self.daily_earned_days)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "us": self.us,
+            "active_days": self.active_days,
+            "runs": self.runs,
+            "successes": self.successes,
+            "success_rate": round(self.success_rate, 4),
+            "earned": self.earned,
+            "daily_earned_days": round(self.daily_earned_days, 4),
+            "exchanges": self.exchanges,
+            "balance": self.balance,
+            "balance_date": self.balance_date,
+            "days_to_target": self.days_to_target,
+            "failures": self.failures,
+        }
+
+
+class RunHistory:
+    """结果存储的按天汇总，带增量缓存。"""
+
+    def __init__(self, base_dir: str = LOG_PATH, use_cache: bool = True):
+        self.base_dir = base_dir
+        self.use_cache = use_cache
+        self.cache_path = os.path.join(base_dir, CACHE_FILE)
+        # 日期 -> {"mtime_ns", "files", "accounts": {账号: 汇总}}
+        self.days: Dict[str, Dict[str, Any]] = {}
+        self.files_read = 0
+        self.bad_files: List[str] = []
+
+    def _load_cache(self) -> None:
+        if not self.use_cache or not os.path.isfile(self.cache_path):
+            return
+        try:
+            cache = codec.load_file(self.cache_path)
+        except (OSError, ValueError):
+            return
+        if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION:
+            self.days = cache.get("days") or {}
+
+    def _save_cache(self) -> None:
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            codec.dump_file(tmp_path, {"version": CACHE_VERSION, "days": self.days})
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def refresh(self, rebuild: bool = False) -> "RunHistory":
+        """同步缓存与结果存储：只读取新增的结果文件，目录有文件被删除时重建当天。"""
+        if not rebuild:
+            self._load_cache()
+        changed = False
+        dates = list_dates(self.base_dir)
+        for date in set(self.days) - set(dates):
+            del self.days[date]
+            changed = True
+
+        for date in dates:
+            date_dir = os.path.join(self.base_dir, date)
+            mtime_ns = os.stat(date_dir).st_mtime_ns
+            entry = self.days.get(date)
+            if entry and entry["mtime_ns"] == mtime_ns:
+                continue
+
+            names = sorted(name for name in os.listdir(date_dir) if name.endswith(".json"))
+            if not entry or not set(entry["files"]) <= set(names):
+                entry = {"mtime_ns": mtime_ns, "files": [], "accounts": {}}
+            known = set(entry["files"])
+            for name in names:
+                if name in known:
+                    continue
+                try:
+                    aggregate_run(entry["accounts"], load_run(os.path.join(date_dir, name)))
+                except (OSError, ValueError):
+                    # 不记入已读列表，下次重试（可能是正在写入的文件）
+                    self.bad_files.append(os.path.join(date, name))
+                    continue
+                self.files_read += 1
+                entry["files"].append(name)
+            entry["mtime_ns"] = mtime_ns
+            self.days[date] = entry
+            changed = True
+
+        if (changed or rebuild) and self.use_cache:
+            self._save_cache()
+        return self
+
+    def dates(self, days: Optional[int] = None, today: Optional[str] = None) -> List[str]:
+        """统计区间内有记录的日期（升序），days 为空时返回全部。"""
+        dates = sorted(self.days)
+        if days is None:
+            return dates
+        end = datetime.strptime(today, "%Y-%m-%d") if today else datetime.now()
+        first = (end - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return [date for date in dates if date >= first]
+
+    def summarize(self, dates: List[str], account: Optional[str] = None) -> List[AccountSummary]:
+        """按账号汇总指定日期的数据。"""
+        summaries: Dict[str, AccountSummary] = {}
+        for date in dates:
+            for us, acc in self.days[date]["accounts"].items():
+                if account and us != account:
+                    continue
+                summary = summaries.setdefault(us, AccountSummary(us))
+                summary.active_days += 1
+                summary.runs += acc["runs"]
+                summary.successes += acc["successes"]
+                summary.earned += sum(value for _, value in acc["records"])
+                summary.exchanges += acc["exchanges"]
+                for endpoint, count in acc["failures"].items():
+                    summary.failures[endpoint] = summary.failures.get(endpoint, 0) + count
+                if acc["total_days"] is not None:
+                    summary.balance, summary.balance_date = acc["total_days"], date
+        return sorted(summaries.values(), key=lambda s: s.us)
+
+    @staticmethod
+    def endpoint_failure_rates(summaries: List[AccountSummary]) -> Dict[str, float]:
+        """各接口的失败次数占总执行次数的比例。"""
+        runs = sum(s.runs for s in summaries)
+        failures: Dict[str, int] = {}
+        for summary in summaries:
+            for endpoint, count in summary.failures.items():
+                failures[endpoint] = failures.get(endpoint, 0) + count
+        return {endpoint: count / runs for endpoint, count in sorted(failures.items(), key=lambda item: -item[1])} if runs else {}
+
+    def diff(self, old_date: str, new_date: str) -> List[Dict[str, Any]]:
+        """对比两天各账号的余额和执行状态。"""
+        old = self.days.get(old_date, {}).get("accounts", {})
+        new = self.days.get(new_date, {}).get("accounts", {})
+        rows = []
+        for us in sorted(set(old) | set(new)):
+            old_acc, new_acc = old.get(us), new.get(us)
+            old_balance = old_acc["total_days"] if old_acc else None
+            new_balance = new_acc["total_days"] if new_acc else None
+            rows.append({
+                "us": us,
+                "old_status": day_status(old_acc) if old_acc else None,
+                "new_status": day_status(new_acc) if new_acc else None,
+                "old_balance": old_balance,
+                "new_balance": new_balance,
+                "delta": round(new_balance - old_balance, 2) if old_balance is not None and new_balance is not None else None,
+                "earned": sum(value for _, value in new_acc["records"]) if new_acc else 0,
+            })
+        return rows
+
+
+def _days_text(value: Optional[float]) -> str:
+    return f"{value:.2f}天" if value is not None else "-"
+
+
+def print_report(history: RunHistory, days: int, account: Optional[str]) -> None:
+    dates = history.dates(days)
+    summaries = history.summarize(dates, account)
+    if not summaries:
+        print(f"ℹ️  最近 {days} 天没有执行记录。")
+        return
+
+    print(f"======== 最近 {days} 天执行统计（{dates[0]} ~ {dates[-1]}）========")
+    print(f"{'别名':<16}{'执行':>6}{'成功率':>8}{'获得':>10}{'日均':>8}{'余额':>10}{'距31天':>8}")
+    for s in summaries:
+        eta = "可兑换" if s.days_to_target == 0 else (f"{s.days_to_target}天" if s.days_to_target else "-")
+        print(
+            f"{s.us:<16}{s.runs:>6}{s.success_rate:>8.0%}{s.earned / 100:>9.2f}天"
+            f"{s.daily_earned_days:>7.2f}天{_days_text(s.balance):>10}{eta:>8}"
+        )
+
+    rates = history.endpoint_failure_rates(summaries)
+    if rates:
+        print("\n接口失败率：")
+        for endpoint, rate in rates.items():
+            print(f"  {endpoint:<24}{rate:>8.1%}")
+    else:
+        print("\n✅ 统计区间内没有失败的执行。")
+
+
+def print_diff(history: RunHistory, old_date: str, new_date: str) -> None:
+    rows = history.diff(old_date, new_date)
+    if not rows:
+        print(f"ℹ️  {old_date} 和 {new_date} 都没有执行记录。")
+        return
+
+    print(f"======== {old_date} -> {new_date} ========")
+    print(f"{'别名':<16}{'状态':<14}{'余额':>22}{'变化':>10}{'当天获得':>10}")
+    for row in rows:
+        status = f"{row['old_status'] or '-'} -> {row['new_status'] or '-'}"
+        balance = f"{_days_text(row['old_balance'])} -> {_days_text(row['new_balance'])}"
+        delta = f"{row['delta']:+.2f}天" if row["delta"] is not None else "-"
+        print(f"{row['us']:<16}{status:<14}{balance:>22}{delta:>10}{row['earned'] / 100:>9.2f}天")
+
+
+def main():
+    # 各子命令共用的参数
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default=LOG_PATH, help=f"结果存储目录，默认 {LOG_PATH}")
+    common.add_argument("--rebuild", action="store_true", help="忽略缓存重新统计")
+    common.add_argument("--json", action="store_true", help="以 JSON 输出")
+
+    parser = argparse.ArgumentParser(description="小米钱包执行结果统计")
+    subparsers = parser.add_subparsers(dest="command", metavar="<命令>")
+    report_parser = subparsers.add_parser("report", parents=[common], help="账号汇总与接口失败率")
+    report_parser.add_argument("--days", type=int, default=30, help="统计最近几天，默认 30")
+    report_parser.add_argument("--account", help="只统计指定别名")
+    diff_parser = subparsers.add_parser("diff", parents=[common], help="对比两天的余额和执行状态")
+    diff_parser.add_argument("old_date", nargs="?", metavar="旧日期")
+    diff_parser.add_argument("new_date", nargs="?", metavar="新日期")
+    args = parser.parse_args()
+
+    if args.command not in ("report", "diff"):
+        parser.print_help()
+        return
+
+    history = RunHistory(args.dir).refresh(rebuild=args.rebuild)
+    if history.bad_files:
+        print(f"⚠️  跳过 {len(history.bad_files)} 个无法读取的结果文件")
+
+    if args.command == "report":
+        if args.json:
+            summaries = history.summarize(history.dates(args.days), args.account)
+            print(codec.dumps({
+                "accounts": [s.to_dict() for s in summaries],
+                "endpoint_failure_rates": history.endpoint_failure_rates(summaries),
+            }))
+        else:
+            print_report(history, args.days, args.account)
+    else:
+        # 只给一个日期时与它的前一天对比，都不给时对比昨天和今天
+        if args.new_date:
+            old_date, new_date = args.old_date, args.new_date
+        else:
+            new_date = args.old_date or datetime.now().strftime("%Y-%m-%d")
+            old_date = (datetime.strptime(new_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        if args.json:
+            print(codec.dumps(history.diff(old_date, new_date)))
+        else:
+            print_diff(history, old_date, new_date)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行入口导入耗时基准
+
+对每个入口模块在全新的解释器中执行 `python -X importtime -c "import <模块>"`，
+统计入口模块的累计导入耗时，并列出其直接依赖中累计耗时最高的若干项，
+用于确认 requests/urllib3/qrcode 等网络库没有在不需要它们的命令中被提前加载。
+
+用法:
+  python bench_import_time.py                 # 测试默认入口
+  python bench_import_time.py manage main     # 只测试指定模块
+  python bench_import_time.py --output bench_output.txt
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# 默认测试的入口模块
+DEFAULT_MODULES = ["manage", "login", "main", "gui"]
+# 每个模块重复测试的次数，取最小值以减少系统抖动的影响
+REPEAT = 3
+# 报告中列出的最耗时依赖数量
+TOP_N = 8
+# 这些库出现在导入链中说明网络依赖被提前加载了
+HEAVY_PACKAGES = ("requests", "urllib3", "qrcode", "flet")
+
+
+def measure_import(module, cwd):
+    """
+    在独立进程中导入模块。
+    返回 (入口模块累计耗时微秒, {入口模块直接依赖: 累计耗时微秒}, 导入过的全部模块名)。
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, encoding="utf-8"
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "导入失败")
+
+    module_us = 0
+    children = {}
+    pending = {}
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, raw_name = line[len("import time:"):].split("|", 2)
+        # importtime 按后序输出：子依赖先于父模块打印，每深一层多缩进两个空格
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        name = raw_name.strip()
+        if depth == 1:
+            pending[name] = int(cumulative_us)
+        elif depth == 0:
+            if name == module:
+                module_us = int(cumulative_us)
+                children = pending
+                imported.add(name)
+            pending = {}
+        if module_us == 0:
+            imported.add(name)
+    return module_us, children, imported
+
+
+def build_report(modules, cwd):
+    """生成导入耗时报告文本"""
+    lines = [f"Python {sys.version.split()[0]} 导入耗时（{REPEAT} 次取最小值）", "=" * 50]
+    for module in modules:
+        try:
+            runs = [measure_import(module, cwd) for _ in range(REPEAT)]
+        except RuntimeError as e:
+            lines.append(f"{module}: ❌ {e}")
+            continue
+        module_us, children, imported = min(runs, key=lambda run: run[0])
+        loaded_heavy = sorted(
+            name for name in imported if name in HEAVY_PACKAGES
+        )
+        lines.append(f"{module}: {module_us / 1000:.1f} ms")
+        lines.append(f"  提前加载的重量级依赖: {', '.join(loaded_heavy) if loaded_heavy else '无'}")
+        for name, cumulative_us in sorted(children.items(), key=lambda item: -item[1])[:TOP_N]:
+            lines.append(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    args = sys.argv[1:]
+    output = None
+    if "--output" in args:
+        index = args.index("--output")
+        if index + 1 >= len(args):
+            print("❌ 错误: '--output' 需要一个文件路径参数。")
+            return
+        output = args[index + 1]
+        del args[index:index + 2]
+
+    report = build_report(args or DEFAULT_MODULES, Path(__file__).parent)
+    print(report)
+    if output:
+        Path(output).write_text(report + "\n", encoding="utf-8")
+        print(f"\n✅ 报告已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
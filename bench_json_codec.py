@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 编解码基准
+
+用三类典型数据比较原先的写法（标准库 indent=4）与 codec 模块的耗时和体积：
+- config: xiaomiconfig.json，多个账号的 Cookie、兑换配置和上次执行日志
+- logs:   一次执行结果（结果存储中的单个文件）
+- api:    queryUserJoinList / getPrizeStatusV2 的响应体
+
+未安装 orjson 时 codec 回退到标准库，此时只能看到紧凑格式带来的差异。
+
+用法:
+  python bench_json_codec.py
+  python bench_json_codec.py --accounts 50 --output bench_output.txt
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import codec
+from records import AccountRunResult, ExchangeResult, TaskRecord
+
+# 每项取多次测量中的最小值以减少系统抖动的影响
+REPEAT = 5
+# 默认账号数量
+DEFAULT_ACCOUNTS = 10
+
+
+def make_config(accounts):
+    """构造与 xiaomiconfig.json 结构一致的账号列表"""
+    cookies = "; ".join(f"cookie_{i}=" + "x" * 40 for i in range(8))
+    return [
+        {
+            "data": {
+                "us": f"账号{i}",
+                "userId": str(1000000000 + i),
+                "passToken": "V1:" + "p" * 120,
+                "securityToken": "s" * 40,
+                "cookies": cookies,
+                "exchange_configs": [
+                    {"type": "腾讯视频", "phone": "13800000000"},
+                    {"type": "爱奇艺", "phone": "13900000000"},
+                ],
+                "log": "\n".join(f"第{j}行：✅ 完成任务成功，获得 0.33 天" for j in range(30)),
+            }
+        }
+        for i in range(accounts)
+    ]
+
+
+def make_run_result():
+    """构造一次完整执行的结果"""
+    result = AccountRunResult(us="账号0", user_id="1000000000", total_days=123.45)
+    result.exchange_configs = [{"type": "腾讯视频", "phone": "13800000000"}]
+    result.today_records = [TaskRecord(f"2024-01-01 10:{i:02d}:00", 33) for i in range(10)]
+    result.exchange_results = [ExchangeResult("腾讯视频", "13800000000", True, "兑换成功", 31.0)]
+    for i in range(45):
+        result.log("  ✅ 完成任务成功，userTaskId: {}，浏览 {} 秒", 100000 + i, 15)
+    result.finish()
+    return result.to_dict()
+
+
+def make_api_payload():
+    """构造接口响应体"""
+    return {
+        "code": 0,
+        "success": True,
+        "value": {
+            "data": [
+                {"createTime": f"2024-01-{1 + i % 28:02d} 10:00:00", "value": 33, "taskName": "浏览组浏览任务", "taskId": 1000 + i}
+                for i in range(200)
+            ],
+            "prizeInfoList": [
+                {
+                    "prizeCode": f"LSXD_PRIZE{1260 + i}", "prizeId": str(i), "prizeName": "腾讯视频VIP月卡",
+                    "prizeBrand": "tencent", "needGoldRice": 3100, "prizeDesc": "腾讯视频VIP月卡",
+                    "todayStockStatus": 1, "stockStatus": 999, "prizeBatchId": f"LSXD_PRIZE{1260 + i}", "prizeType": 26,
+                }
+                for i in range(12)
+            ],
+        },
+    }
+
+
+def best_us(func):
+    """返回单次调用的最短耗时（微秒）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEAT, number)) / number * 1e6
+
+
+def bench_shape(name, obj):
+    """对一类数据分别测试旧写法和 codec 的序列化、反序列化"""
+    pretty = json.dumps(obj, indent=4, ensure_ascii=False)
+    compact = codec.dumps(obj)
+    raw = compact.encode("utf-8")
+    rows = [
+        ("json.dumps(indent=4)", best_us(lambda: json.dumps(obj, indent=4, ensure_ascii=False))),
+        ("codec.dumps", best_us(lambda: codec.dumps(obj))),
+        ("json.loads", best_us(lambda: json.loads(pretty))),
+        ("codec.loads", best_us(lambda: codec.loads(raw))),
+    ]
+    lines = [f"{name}: 缩进 {len(pretty.encode('utf-8')) / 1024:.1f} KB -> 紧凑 {len(raw) / 1024:.1f} KB"]
+    for label, us in rows:
+        lines.append(f"  {label:<22}{us:10.1f} µs")
+    return lines
+
+
+def build_report(accounts):
+    """生成基准报告文本"""
+    lines = [
+        f"Python {sys.version.split()[0]}，codec 后端: {codec.BACKEND}（{REPEAT} 次取最小值）",
+        "=" * 50,
+    ]
+    lines += bench_shape(f"config（{accounts} 个账号）", make_config(accounts))
+    lines += bench_shape("logs（单次执行结果）", make_run_result())
+    lines += bench_shape("api（奖励记录与奖品列表）", make_api_payload())
+    return "\n".join(lines)
+
+
+def main():
+    args = sys.argv[1:]
+    output = None
+    accounts = DEFAULT_ACCOUNTS
+    for flag in ("--output", "--accounts"):
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"❌ 错误: '{flag}' 需要一个参数。")
+                return
+            value = args[index + 1]
+            del args[index:index + 2]
+            if flag == "--output":
+                output = value
+            else:
+                accounts = int(value)
+
+    report = build_report(accounts)
+    print(report)
+    if output:
+        Path(output).write_text(report + "\n", encoding="utf-8")
+        print(f"\n✅ 报告已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
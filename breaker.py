@@ -0,0 +1,153 @@
+# breaker.py
+
+"""
+任务接口 (m.jr.airstarfinance.net) 的熔断器。
+
+接口故障时，原先每个账号仍会走完每一步：每个请求最多等 15 秒超时，再加上工作流中的固定等待，
+一次故障可能让整批执行拖上一小时。熔断器在所有账号之间共享：
+
+- closed:    正常放行，记录最近 window_seconds 秒内每个请求的成败。
+             请求数达到 min_requests 且失败比例达到 failure_rate 时打开。
+- open:      直接拒绝请求（不发出、不等待），持续 cooldown 秒。
+- half_open: 冷却结束后只放行一个探测请求，成功则关闭，失败则重新打开。
+
+只有网络错误、超时和 5xx 计为失败；4xx 和业务错误说明服务仍在响应，不计入。
+outage_seconds() 返回本次故障已持续的时间，调用方据此决定是否放弃剩余账号。
+熔断器在进程内共享，GUI 多次批量执行之间不会重建；每次批量执行开始时调用 reset_outage()，
+故障时间从本次执行开始重新计算，否则上一次执行遗留的故障时间会让之后的执行在发出探测请求前就放弃全部账号。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 默认参数：最近 60 秒内至少 6 个请求、一半失败时打开，冷却 20 秒后探测
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_MIN_REQUESTS = 6
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_COOLDOWN = 20.0
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间拒绝请求。"""
+
+
+class CircuitBreaker:
+    """线程安全的熔断器，所有账号共用一个实例。"""
+
+    def __init__(
+        self,
+        failure_rate: float = DEFAULT_FAILURE_RATE,
+        min_requests: int = DEFAULT_MIN_REQUESTS,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        cooldown: float = DEFAULT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.configure(failure_rate, min_requests, window_seconds, cooldown)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        # (时间, 是否成功)
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        # 本次故障首次打开的时间，恢复后清空
+        self._outage_since: Optional[float] = None
+        self._probing = False
+
+    def configure(
+        self,
+        failure_rate: Optional[float] = None,
+        min_requests: Optional[int] = None,
+        window_seconds: Optional[float] = None,
+        cooldown: Optional[float] = None,
+    ) -> None:
+        """调整参数，未传入的保持不变。"""
+        if failure_rate is not None:
+            if not 0 < failure_rate <= 1:
+                raise ValueError("failure_rate 应在 (0, 1] 之间")
+            self.failure_rate = failure_rate
+        if min_requests is not None:
+            self.min_requests = max(1, min_requests)
+        if window_seconds is not None:
+            self.window_seconds = window_seconds
+        if cooldown is not None:
+            self.cooldown = max(0.0, cooldown)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行一个请求；半开状态下只放行一个探测请求。"""
+        with self._lock:
+            state = self._current_state(self._clock())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def check(self) -> None:
+        """打开期间抛出 CircuitOpenError，不占用半开状态的探测名额。"""
+        with self._lock:
+            now = self._clock()
+            if self._current_state(now) == OPEN:
+                raise CircuitOpenError(
+                    f"接口熔断中：最近请求大量失败，{self.cooldown - (now - self._opened_at):.0f} 秒后重新探测"
+                )
+
+    def record(self, success: bool) -> None:
+        """记录一个已放行请求的结果。"""
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            if state == HALF_OPEN and self._probing:
+                self._probing = False
+                if success:
+                    self._reset()
+                else:
+                    self._open(now)
+                return
+            if state != CLOSED:
+                return
+            self._outcomes.append((now, success))
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                self._outcomes.popleft()
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_requests and failures >= self.failure_rate * len(self._outcomes):
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        if self._outage_since is None:
+            self._outage_since = now
+        self._outcomes.clear()
+
+    def _reset(self) -> None:
+        self._state = CLOSED
+        self._outage_since = None
+        self._outcomes.clear()
+
+    def reset_outage(self) -> None:
+        """重新开始计算故障持续时间，不改变熔断状态：冷却结束后仍由下一个请求探测，探测失败时重新计时。"""
+        with self._lock:
+            if self._outage_since is not None:
+                self._outage_since = self._clock()
+
+    def outage_seconds(self) -> float:
+        """本次故障已持续的秒数，服务正常时为 0。"""
+        with self._lock:
+            return 0.0 if self._outage_since is None else self._clock() - self._outage_since
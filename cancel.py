@@ -0,0 +1,81 @@
+# cancel.py
+
+"""
+执行中的取消与暂停。
+
+CancelToken 由发起执行的一方创建，依次传给调度器、ApiRequest 和 RNL：
+- checkpoint(): 每个请求发出前调用，暂停时阻塞到继续或取消，已取消时抛出 Cancelled。
+- wait(): 代替工作流中的 time.sleep，取消后立即返回（抛出 Cancelled），
+  暂停期间不计时，继续后只等剩余的时间。
+- stop_event: 取消时置位，可直接作为 run_staggered 的 stop_event，不再启动剩余账号。
+
+暂停不会中断正在进行的请求，账号会停在当前步骤，继续后从该步骤接着执行，不重复已完成的请求。
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class Cancelled(Exception):
+    """执行已被取消。"""
+
+
+class CancelToken:
+    """线程安全的取消/暂停令牌，一次执行使用一个实例。"""
+
+    def __init__(self, stop_event: Optional[threading.Event] = None):
+        self.stop_event = stop_event or threading.Event()
+        self._cond = threading.Condition()
+        self._cancelled = False
+        self._paused = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def cancel(self) -> None:
+        """取消执行，唤醒所有等待中的线程。"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+        self.stop_event.set()
+
+    def pause(self) -> None:
+        with self._cond:
+            self._paused = True
+            self._cond.notify_all()
+
+    def resume(self) -> None:
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def _hold(self) -> None:
+        """调用时需持有锁：暂停时阻塞，已取消时抛出 Cancelled。"""
+        while self._paused and not self._cancelled:
+            self._cond.wait()
+        if self._cancelled:
+            raise Cancelled("执行已取消")
+
+    def checkpoint(self) -> None:
+        """暂停时阻塞到继续或取消，已取消时抛出 Cancelled。"""
+        with self._cond:
+            self._hold()
+
+    def wait(self, seconds: float) -> None:
+        """可中断的等待，暂停期间不计入等待时间。"""
+        remaining = seconds
+        with self._cond:
+            while True:
+                self._hold()
+                if remaining <= 0:
+                    return
+                started = time.monotonic()
+                # pause()/cancel() 会提前唤醒，回到循环开头处理
+                self._cond.wait(remaining)
+                remaining -= time.monotonic() - started
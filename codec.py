@@ -0,0 +1,72 @@
+# codec.py
+
+"""
+JSON 编解码。
+
+安装了 orjson 时用它解析接口响应、读写结果存储和事件日志，否则回退到标准库 json，
+两者的输出可以互相读取。
+
+- loads()/dumps(): 紧凑格式，用于只给程序读的文件（结果存储、JSONL 事件日志）和接口响应。
+- dumps_pretty(): 4 空格缩进、保留中文，只用于需要手工编辑的 xiaomiconfig.json，
+  始终使用标准库，保证配置文件的格式和以前完全一致。
+
+解析失败时抛出 json.JSONDecodeError（orjson 的异常也是它的子类），调用方不需要区分后端。
+设置环境变量 XIAOMI_JSON_BACKEND=json 可以强制使用标准库。
+"""
+
+import json
+import os
+from typing import Any, Callable, Optional, Union
+
+JSONDecodeError = json.JSONDecodeError
+
+try:
+    if os.environ.get('XIAOMI_JSON_BACKEND', '').lower() == 'json':
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """解析 JSON 文本或 UTF-8 字节串。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """紧凑格式序列化，中文不转义。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default).decode('utf-8')
+        except TypeError:
+            # orjson 不支持的输入（超过 64 位的整数、非字符串键等）交给标准库
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+
+
+def dumps_pretty(obj: Any) -> str:
+    """配置文件使用的缩进格式。"""
+    return json.dumps(obj, indent=4, ensure_ascii=False)
+
+
+def load_file(path: str) -> Any:
+    """读取 JSON 文件，空文件返回 None。"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    return loads(content) if content.strip() else None
+
+
+def dump_file(path: str, obj: Any, pretty: bool = False) -> None:
+    """写入 JSON 文件，pretty 为 True 时使用配置文件的缩进格式。"""
+    text = dumps_pretty(obj) if pretty else dumps(obj)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def response_json(resp: Any) -> Any:
+    """解析 requests 响应体，等价于 resp.json()。"""
+    return loads(resp.content)
@@ -0,0 +1,289 @@
+# daemon.py
+
+"""
+小米钱包每日任务常驻进程。
+
+与每天由 cron 冷启动一次 `main.py` 不同，本进程长期运行：
+1. 配置文件只在修改后才重新解析。
+2. 每个账号的会话 Cookie 与 HTTP 连接池在进程内缓存，下次执行前先用一次
+   低成本查询确认会话仍有效，失效时才重新登录。
+3. 每天在配置的时间窗口内为每个账号分配不同的启动时间，到点后并发执行（见 scheduler.py）。
+4. 在本地开放一个只读的状态接口，返回各账号的计划时间和最近一次执行结果。
+
+用法:
+  python daemon.py                                # 每天 10:30 起的 120 分钟内执行
+  python daemon.py --start 08:00 --window 60      # 自定义窗口
+  python daemon.py --port 8765                    # 状态接口: http://127.0.0.1:8765/status
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from main import (
+    CONFIG_FILE, MAX_WORKERS, ApiRequest, RNL, open_session, process_account,
+    send_feishu_notification,
+)
+import codec
+from eventlog import bind_account, event_log
+from scheduler import build_schedule, next_window_start, parse_clock, run_staggered
+from session import SessionError
+
+# --- 默认参数 ---
+DEFAULT_START = "10:30"
+DEFAULT_WINDOW_MINUTES = 120
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 缓存的会话超过该时长后不再探测，直接重新登录
+SESSION_MAX_AGE = 20 * 3600
+
+
+class SessionPool:
+    """按账号别名缓存已认证的 ApiRequest，复用会话 Cookie 和连接池。"""
+
+    def __init__(self, max_age: float = SESSION_MAX_AGE):
+        self.max_age = max_age
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, account_data: Dict[str, Any]) -> ApiRequest:
+        """返回可用的 ApiRequest；缓存失效时重新获取会话，失败时抛出 SessionError。"""
+        us = account_data.get('us')
+        pass_token = account_data.get('passToken')
+        with self._lock:
+            entry = self._entries.get(us)
+        if entry and entry['pass_token'] == pass_token and time.time() - entry['obtained_at'] < self.max_age:
+            if RNL(entry['api']).query_total_days():
+                event_log.info('daemon.session', "  - 复用缓存的会话 ({})", us)
+                return entry['api']
+            event_log.info('daemon.session', "  - 缓存的会话已失效，重新登录 ({})", us)
+
+        try:
+            api = ApiRequest(open_session(pass_token, account_data.get('userId')).cookie_header)
+        except SessionError:
+            self.invalidate(us)
+            raise
+        with self._lock:
+            self._entries[us] = {'api': api, 'pass_token': pass_token, 'obtained_at': time.time()}
+        return api
+
+    def invalidate(self, us: str) -> None:
+        """丢弃账号的缓存会话。"""
+        with self._lock:
+            entry = self._entries.pop(us, None)
+        if entry:
+            entry['api'].session.close()
+
+    def age_of(self, us: str) -> Optional[float]:
+        """返回缓存会话已存在的秒数，没有缓存时返回 None。"""
+        with self._lock:
+            entry = self._entries.get(us)
+        return time.time() - entry['obtained_at'] if entry else None
+
+
+class WalletDaemon:
+    """常驻调度器：维护配置缓存、会话池和每个账号的执行状态。"""
+
+    def __init__(self, start_clock: str, window_seconds: float, max_workers: int = MAX_WORKERS):
+        parse_clock(start_clock)  # 尽早发现格式错误
+        self.start_clock = start_clock
+        self.window_seconds = window_seconds
+        self.max_workers = max_workers
+        self.sessions = SessionPool()
+        self.stop_event = threading.Event()
+        self.started_at = datetime.now()
+        self._accounts: List[Dict[str, Any]] = []
+        self._config_mtime: Optional[float] = None
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._status_lock = threading.Lock()
+
+    # --- 配置缓存 ---
+
+    def load_accounts(self) -> List[Dict[str, Any]]:
+        """返回账号配置，文件未修改时直接使用缓存。"""
+        try:
+            mtime = os.path.getmtime(CONFIG_FILE)
+        except OSError:
+            self._accounts, self._config_mtime = [], None
+            return self._accounts
+        if mtime != self._config_mtime:
+            try:
+                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                    content = f.read()
+                accounts = codec.loads(content) if content else []
+                assert isinstance(accounts, list), "配置文件根节点应为列表"
+                self._accounts, self._config_mtime = accounts, mtime
+                event_log.info('daemon.config', "ℹ️  已加载配置文件 '{}'，共 {} 个账号", CONFIG_FILE, len(accounts))
+            except (json.JSONDecodeError, AssertionError) as e:
+                event_log.error('daemon.config', "❌ 解析配置文件 '{}' 失败，继续使用上一次的配置: {}", CONFIG_FILE, e)
+        return self._accounts
+
+    def account_data(self, us: str) -> Optional[Dict[str, Any]]:
+        """按别名查找账号数据。"""
+        for account in self.load_accounts():
+            data = account.get('data', {})
+            if data.get('us') == us:
+                return data
+        return None
+
+    # --- 状态 ---
+
+    def update_status(self, us: str, **fields: Any) -> None:
+        with self._status_lock:
+            self._status.setdefault(us, {}).update(fields)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回状态接口使用的快照。"""
+        with self._status_lock:
+            accounts = {us: dict(state) for us, state in self._status.items()}
+        for us, state in accounts.items():
+            age = self.sessions.age_of(us)
+            state['session_age_seconds'] = int(age) if age is not None else None
+        return {
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'window_start': self.start_clock,
+            'window_minutes': self.window_seconds / 60,
+            'accounts': accounts,
+        }
+
+    # --- 执行 ---
+
+    def run_account(self, us: str) -> None:
+        """执行单个账号的每日任务，复用会话池中的会话。"""
+        data = self.account_data(us)
+        if data is None:
+            event_log.warning('daemon.account', "⚠️ 账号 '{}' 已从配置文件中移除，跳过", us)
+            return
+        started = datetime.now()
+        self.update_status(us, last_started=started.strftime('%Y-%m-%d %H:%M:%S'), state='running')
+
+        try:
+            api_request = self.sessions.acquire(data)
+        except SessionError as e:
+            success = False
+            notification = f"账号 '{us}' 已跳过：{e}"
+        else:
+            result = process_account(data, api_request)
+            success = result.success
+            notification = result.text()
+        event_log.info('daemon.account', "{}", notification)
+
+        feishu_webhook = data.get('feishu_webhook')
+        if feishu_webhook:
+            send_feishu_notification(feishu_webhook, notification)
+
+        self.update_status(
+            us,
+            state='done',
+            last_success=success,
+            last_day=started.strftime('%Y-%m-%d'),
+            last_finished=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            last_log=notification.strip(),
+        )
+
+    def has_run_on(self, us: str, day: str) -> bool:
+        with self._status_lock:
+            return self._status.get(us, {}).get('last_day') == day
+
+    def run_account_safely(self, us: str) -> None:
+        """执行单个账号，异常只记录到状态中，不影响同一窗口内的其他账号。"""
+        with bind_account(us):
+            try:
+                self.run_account(us)
+            except Exception as e:
+                self.update_status(us, state='error', last_error=str(e))
+                event_log.error('daemon.account', "❌ 执行账号 '{}' 时发生未知异常: {}", us, e)
+
+    def run_forever(self) -> None:
+        """按天循环：编排当天窗口内的执行时间，到点后并发执行。"""
+        while not self.stop_event.is_set():
+            start = next_window_start(datetime.now(), self.start_clock, self.window_seconds)
+            day = start.strftime('%Y-%m-%d')
+            keys = [
+                acc.get('data', {}).get('us') for acc in self.load_accounts()
+                if all(acc.get('data', {}).get(k) for k in ('us', 'userId', 'passToken'))
+            ]
+            keys = [us for us in keys if not self.has_run_on(us, day)]
+            schedule = build_schedule(keys, start, self.window_seconds)
+            for run_at, us in schedule:
+                self.update_status(us, state='scheduled', next_run=run_at.strftime('%Y-%m-%d %H:%M:%S'))
+            event_log.info('daemon.schedule', "📅 {} 窗口 {} 起 {:.0f} 分钟，待执行 {} 个账号", day, self.start_clock, self.window_seconds / 60, len(schedule))
+
+            delay = (start - datetime.now()).total_seconds()
+            if delay > 0 and self.stop_event.wait(delay):
+                return
+            # 与 build_schedule 使用相同的偏移，账号按计划时间启动，互不等待
+            run_staggered(
+                [(us, lambda us=us: self.run_account_safely(us)) for us in keys],
+                self.window_seconds, max_workers=self.max_workers,
+                stop_event=self.stop_event, start=start,
+            )
+            if self.stop_event.is_set():
+                return
+
+            # 当天的账号都已执行完毕，等到窗口结束再编排下一天
+            window_end = start.timestamp() + self.window_seconds
+            self.stop_event.wait(max(1.0, window_end - time.time()))
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """只读状态接口：GET /status 返回 JSON 快照。"""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0].rstrip('/') not in ('', '/status'):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.wallet_daemon.snapshot(), indent=2, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 状态接口的访问日志没有价值，避免刷屏
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小米钱包每日任务常驻进程")
+    parser.add_argument('--start', default=DEFAULT_START, help=f"每日窗口开始时间 HH:MM，默认 {DEFAULT_START}")
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW_MINUTES,
+                        help=f"窗口长度（分钟），账号在窗口内分散执行，默认 {DEFAULT_WINDOW_MINUTES}")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"同时执行的账号数上限，默认 {MAX_WORKERS}")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"状态接口监听地址，默认 {DEFAULT_HOST}")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"状态接口端口，默认 {DEFAULT_PORT}，0 表示不开启")
+    args = parser.parse_args()
+
+    try:
+        wallet_daemon = WalletDaemon(args.start, args.window * 60, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+    if args.port:
+        server = ThreadingHTTPServer((args.host, args.port), StatusHandler)
+        server.daemon_threads = True
+        server.wallet_daemon = wallet_daemon
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        event_log.info('daemon', "📡 状态接口: http://{}:{}/status", args.host, args.port)
+
+    event_log.info('daemon', "\n======= 小米钱包常驻进程已启动 ({}) =======", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    try:
+        wallet_daemon.run_forever()
+    except KeyboardInterrupt:
+        event_log.info('daemon', "\n🚫 收到中断信号，正在退出...")
+    finally:
+        wallet_daemon.stop_event.set()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
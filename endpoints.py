@@ -0,0 +1,254 @@
+# endpoints.py
+
+"""
+任务接口注册表。
+
+RNL 的每个接口原先在每次调用时重新拼装参数字典（包括同一段 userExtra JSON），再由 requests 逐项编码；
+应用下载试用的两个接口直接写死了手工编码的长 URL，main.py、gui.py 和 3.0 脚本各有一份。
+这里把每个接口声明为一个 Endpoint：
+
+- 固定参数在导入时按 requests 的规则（urlencode）编码一次，与每次调用的参数位置一起编译成模板，
+  调用时只编码 fields 中的少数几个值再按原顺序拼接，发出的参数顺序与原先一致。
+- 手工编码的 URL 以 query 模板原样声明，{字段名} 为每次调用填入的值。
+- POST 接口的表单同样预先编码，作为请求体发送。
+- name 供请求层的日志和进度事件使用，mutating 标记会改变账号状态的接口（完成任务、领奖、兑换）。
+- bind(activityCode=...) 得到替换了固定参数的副本（按参数缓存），供 activities.py 中的其他活动使用。
+
+调用方式：api.call(COMPLETE_TASK, taskId=..., browsTaskId=..., browsClickUrlId=...)
+"""
+
+from string import Formatter
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import quote_plus, urlencode
+
+API_HOST = 'm.jr.airstarfinance.net'
+BASE_URL = f'https://{API_HOST}/mp/api/generalActivity/'
+ACTIVITY_CODE = '2211-videoWelfare'
+USER_EXTRA = '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
+
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+# 参数值为 FIELD 时表示每次调用传入
+FIELD = None
+
+
+class Endpoint:
+    """一个已预编码的接口。"""
+    __slots__ = ('name', 'method', 'path', 'url', 'headers', 'mutating', 'fields', '_params', '_segments', '_bound')
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        params: Sequence[Tuple[str, Optional[str]]] = (),
+        query: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        mutating: bool = False,
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.url = BASE_URL + path
+        self.mutating = mutating
+        self.headers: Dict[str, str] = dict(headers or {})
+        if method == 'POST':
+            self.headers.update(FORM_HEADERS)
+        # 由 params 声明的接口才能 bind()，手工编码的 query 原样使用
+        self._params = tuple(params) if query is None else None
+        self._bound: Dict[Tuple[Tuple[str, str], ...], 'Endpoint'] = {}
+        if query is None:
+            query = _template(params)
+        # (固定文本, 其后的字段名)，最后一段的字段名为 None
+        self._segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(query)
+        ]
+        self.fields = tuple(field for _, field in self._segments if field)
+
+    def encode(self, fields: Mapping[str, Any]) -> str:
+        """按模板拼出编码后的查询串（或表单），缺少字段时抛出 KeyError。"""
+        return ''.join(
+            literal + (quote_plus(str(fields[field])) if field else '')
+            for literal, field in self._segments
+        )
+
+    def prepare(self, **fields: Any) -> Tuple[str, Dict[str, Any]]:
+        """返回 (url, requests 的额外参数)。"""
+        encoded = self.encode(fields)
+        kwargs: Dict[str, Any] = {'headers': self.headers} if self.headers else {}
+        if self.method == 'POST':
+            kwargs['data'] = encoded.encode('ascii')
+            return self.url, kwargs
+        return (f'{self.url}?{encoded}' if encoded else self.url), kwargs
+
+    def bind(self, **static: str) -> 'Endpoint':
+        """返回替换了部分固定参数的副本，同一组参数只编码一次；与原值相同时返回自身。"""
+        if self._params is None:
+            raise ValueError(f'接口 {self.name} 使用手工编码的 query，不能替换参数')
+        unknown = set(static) - {key for key, value in self._params if value is not FIELD}
+        if unknown:
+            raise KeyError(f"接口 {self.name} 没有固定参数 {', '.join(sorted(unknown))}")
+        if all(dict(self._params)[key] == value for key, value in static.items()):
+            return self
+        key = tuple(sorted(static.items()))
+        bound = self._bound.get(key)
+        if bound is None:
+            params = [(name, static.get(name, value) if value is not FIELD else FIELD) for name, value in self._params]
+            bound = self._bound[key] = Endpoint(
+                self.name, self.method, self.path, params, headers=self.headers, mutating=self.mutating
+            )
+        return bound
+
+    def __repr__(self) -> str:
+        return f'Endpoint({self.name!r}, {self.method})'
+
+
+def _template(params: Sequence[Tuple[str, Optional[str]]]) -> str:
+    """把参数列表编译为 query 模板：固定值编码后原样保留（花括号转义），FIELD 替换为 {参数名}。"""
+    parts = []
+    for key, value in params:
+        if value is FIELD:
+            parts.append(f'{quote_plus(key)}={{{key}}}')
+        else:
+            parts.append(urlencode({key: value}).replace('{', '{{').replace('}', '}}'))
+    return '&'.join(parts)
+
+
+ENDPOINTS: Dict[str, Endpoint] = {}
+
+
+def register(endpoint: Endpoint) -> Endpoint:
+    if endpoint.name in ENDPOINTS:
+        raise ValueError(f'接口 {endpoint.name} 重复注册')
+    ENDPOINTS[endpoint.name] = endpoint
+    return endpoint
+
+
+# 查询类接口共用的参数
+QUERY_PARAMS = (
+    ('activityCode', ACTIVITY_CODE),
+    ('app', 'com.mipay.wallet'),
+    ('deviceType', '2'),
+    ('system', '1'),
+    ('visitEnvironment', '2'),
+    ('userExtra', USER_EXTRA),
+)
+
+# 完成任务、领奖共用的客户端参数
+CLIENT_PARAMS = (
+    ('app', 'com.mipay.wallet'),
+    ('isNfcPhone', 'true'),
+    ('channel', 'mipay_indexicon_TVcard'),
+    ('deviceType', '2'),
+    ('system', '1'),
+    ('visitEnvironment', '2'),
+    ('userExtra', USER_EXTRA),
+)
+
+EXCHANGE_PARAMS = (
+    ('prizeCode', FIELD),
+    ('activityCode', ACTIVITY_CODE),
+    ('phone', FIELD),
+    ('isNfcPhone', 'false'),
+    ('channel', 'exchange'),
+    ('deviceType', '2'),
+    ('system', '1'),
+    ('visitEnvironment', '2'),
+    ('userExtra', USER_EXTRA),
+)
+
+# 应用下载试用两个接口抓包得到的请求头
+NEW_USER_TASK_HEADERS = {
+    'Connection': 'keep-alive',
+    'Accept': 'application/json, text/plain, */*',
+    'Cache-Control': 'no-cache',
+    'X-Request-ID': '1281eea0-e268-4fcc-9a5f-7dc11475b7db',
+    'X-Requested-With': 'com.mipay.wallet',
+    'Sec-Fetch-Site': 'same-origin',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Dest': 'empty',
+    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+NEW_USER_AWARD_HEADERS = {
+    'Connection': 'keep-alive',
+    'sec-ch-ua': '"Chromium";v="118", "Android WebView";v="118", "Not=A?Brand";v="99"',
+    'Accept': 'application/json, text/plain, */*',
+    'Cache-Control': 'no-cache',
+    'sec-ch-ua-mobile': '?1',
+    'X-Request-ID': 'c09abfa7-6ea4-4435-a741-dff3622215cf',
+    'sec-ch-ua-platform': '"Android"',
+    'X-Requested-With': 'com.mipay.wallet',
+    'Sec-Fetch-Site': 'same-origin',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Dest': 'empty',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+
+GET_TASK_LIST = register(Endpoint('getTaskList', 'POST', 'getTaskList', [('activityCode', ACTIVITY_CODE)]))
+
+GET_TASK = register(Endpoint('getTask', 'POST', 'getTask', [
+    ('activityCode', ACTIVITY_CODE),
+    ('taskCode', FIELD),
+    # 缺少该参数时接口不返回 userTaskId
+    ('jrairstar_ph', '98lj8puDf9Tu/WwcyMpVyQ=='),
+], mutating=True))
+
+COMPLETE_TASK = register(Endpoint('completeTask', 'GET', 'completeTask', [
+    ('activityCode', ACTIVITY_CODE),
+    *CLIENT_PARAMS,
+    ('taskId', FIELD),
+    ('browsTaskId', FIELD),
+    ('browsClickUrlId', FIELD),
+    ('clickEntryType', 'undefined'),
+    ('festivalStatus', '0'),
+], mutating=True))
+
+LUCK_DRAW = register(Endpoint('luckDraw', 'GET', 'luckDraw', [
+    ('activityCode', ACTIVITY_CODE),
+    ('userTaskId', FIELD),
+    *CLIENT_PARAMS,
+], mutating=True))
+
+# GUI 和 3.0 脚本领取浏览任务奖励时带上设备和已安装应用信息
+LUCK_DRAW_APP_LIMIT = register(Endpoint('luckDraw.appLimit', 'GET', 'luckDraw', [
+    ('imei', ''),
+    ('device', 'manet'),
+    ('appLimit', '{"com.qiyi.video":false,"com.youku.phone":true,"com.tencent.qqlive":true,"com.hunantv.imgo.activity":true,"com.cmcc.cmvideo":false,"com.sankuai.meituan":true,"com.anjuke.android.app":false,"com.tal.abctimelibrary":false,"com.lianjia.beike":false,"com.kmxs.reader":true,"com.jd.jrapp":false,"com.smile.gifmaker":true,"com.kuaishou.nebula":false}'),
+    ('activityCode', ACTIVITY_CODE),
+    ('userTaskId', FIELD),
+    *CLIENT_PARAMS,
+], mutating=True))
+
+COMPLETE_NEW_USER_TASK = register(Endpoint(
+    'completeTask.newUser', 'GET', 'completeTask',
+    query='activityCode=2211-videoWelfare&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=KWkK5VsKXiIbAH8Rf6kgU6tpDPyNWgXY8YCM1mQtt5nd7i1%2F4BqzPq0uY7OlIEOd&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D&taskCode=NEW_USER_CAMPAIGN&browsTaskId=&browsClickUrlId=1306285&adInfoId=&triggerId=',
+    headers=NEW_USER_TASK_HEADERS,
+    mutating=True,
+))
+
+LUCK_DRAW_NEW_USER = register(Endpoint(
+    'luckDraw.newUser', 'GET', 'luckDraw',
+    query='imei=&device=alioth&appLimit=%7B%22com.qiyi.video%22:false,%22com.youku.phone%22:false,%22com.tencent.qqlive%22:false,%22com.hunantv.imgo.activity%22:false,%22com.cmcc.cmvideo%22:false,%22com.sankuai.meituan%22:false,%22com.anjuke.android.app%22:false,%22com.tal.abctimelibrary%22:false,%22com.lianjia.beike%22:false,%22com.kmxs.reader%22:false,%22com.jd.jrapp%22:false,%22com.smile.gifmaker%22:true,%22com.kuaishou.nebula%22:false%7D&activityCode=2211-videoWelfare&userTaskId={userTaskId}&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=L522i5qLZR9%2Bs25kEqPBJYbbHqUS4LrpuTsgl9kdsbcyU7tjWmx1BewlRNSSZaOT&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D',
+    headers=NEW_USER_AWARD_HEADERS,
+    mutating=True,
+))
+
+QUERY_USER_GOLD_RICH_SUM = register(Endpoint('queryUserGoldRichSum', 'GET', 'queryUserGoldRichSum', QUERY_PARAMS))
+
+QUERY_USER_JOIN_LIST = register(Endpoint('queryUserJoinList', 'GET', 'queryUserJoinList', [
+    *QUERY_PARAMS,
+    ('pageNum', FIELD),
+    ('pageSize', FIELD),
+]))
+
+GET_PRIZE_STATUS = register(Endpoint('getPrizeStatusV2', 'GET', 'getPrizeStatusV2', [
+    ('activityCode', ACTIVITY_CODE),
+    ('needPrizeBrand', 'youku,mgtv,iqiyi,tencent,bilibili,other'),
+]))
+
+CONVERT_GOLD_RICH = register(Endpoint('convertGoldRich', 'GET', 'convertGoldRich', EXCHANGE_PARAMS, mutating=True))
+
+# GET 请求抛出异常时的备用方式，参数相同
+CONVERT_GOLD_RICH_FORM = register(Endpoint('convertGoldRich.form', 'POST', 'convertGoldRich', EXCHANGE_PARAMS, mutating=True))
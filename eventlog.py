@@ -0,0 +1,263 @@
+# eventlog.py
+
+"""
+结构化分级事件日志。
+
+取代 RNL、ApiRequest 中直接 print() 的做法：
+- 每条事件带有级别、事件名、所属账号和附加字段，消息按模板和参数保存，
+  只有真正被某个输出端写出时才格式化。
+- 事件先放入队列，由一个后台线程统一写出，多个账号并发执行时不会在标准输出上互相打断。
+- 输出端（sink）可以是控制台、JSONL 文件或 GUI 回调，各自设置最低级别。
+  低于所有输出端级别的事件在调用处直接丢弃，静默模式几乎没有开销。
+
+用法:
+    from eventlog import event_log, bind_account
+    with bind_account(us):
+        event_log.info('task.complete', "  ✅ 完成任务成功，userTaskId: {}", user_task_id)
+"""
+
+import atexit
+import contextvars
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+import codec
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+# 比所有级别都高，用于关闭某个输出端
+SILENT = 100
+
+# 当前线程正在处理的账号别名
+_current_account: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_account', default=None)
+
+
+@contextmanager
+def bind_account(us: Optional[str]) -> Iterator[None]:
+    """在上下文内产生的事件都归属到该账号。"""
+    token = _current_account.set(us)
+    try:
+        yield
+    finally:
+        _current_account.reset(token)
+
+
+def current_account() -> Optional[str]:
+    """当前上下文绑定的账号别名。"""
+    return _current_account.get()
+
+
+class Event:
+    """一条日志事件，message 在第一次读取时才格式化。"""
+    __slots__ = ('ts', 'level', 'name', 'account', 'template', 'args', 'fields', '_message')
+
+    def __init__(self, level: int, name: str, template: str, args: tuple, fields: Dict[str, Any]):
+        self.ts = time.time()
+        self.level = level
+        self.name = name
+        self.account = _current_account.get()
+        self.template = template
+        self.args = args
+        self.fields = fields
+        self._message: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        if self._message is None:
+            self._message = self.template.format(*self.args) if self.args else self.template
+        return self._message
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'ts': round(self.ts, 3),
+            'level': LEVEL_NAMES.get(self.level, str(self.level)),
+            'event': self.name,
+            'account': self.account,
+            'message': self.message,
+        }
+        if self.fields:
+            data.update(self.fields)
+        return data
+
+
+class Sink(ABC):
+    """输出端基类，write() 只会在后台写线程中调用；子类未实现 write() 时无法实例化。"""
+
+    def __init__(self, level: int = INFO):
+        self.level = level
+
+    @abstractmethod
+    def write(self, event: Event) -> None:
+        """输出一个事件。"""
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class ConsoleSink(Sink):
+    """写到标准输出，绑定了账号的事件加上 [账号] 前缀。"""
+
+    def __init__(self, level: int = INFO, stream: Optional[TextIO] = None, show_account: bool = True):
+        super().__init__(level)
+        self.stream = stream
+        self.show_account = show_account
+
+    def write(self, event: Event) -> None:
+        message = event.message
+        if self.show_account and event.account:
+            # 前缀放在消息开头的空行之后
+            body = message.lstrip("\n")
+            message = f"{message[:len(message) - len(body)]}[{event.account}] {body}"
+        (self.stream or sys.stdout).write(message + "\n")
+
+    def flush(self) -> None:
+        (self.stream or sys.stdout).flush()
+
+
+class JsonlSink(Sink):
+    """每条事件写成一行 JSON。"""
+
+    def __init__(self, path: str, level: int = DEBUG):
+        super().__init__(level)
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, event: Event) -> None:
+        self.file.write(codec.dumps(event.to_dict(), default=str) + "\n")
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CallbackSink(Sink):
+    """把事件交给回调函数（例如 GUI），回调在后台写线程中执行。"""
+
+    def __init__(self, callback: Callable[[Event], None], level: int = INFO):
+        super().__init__(level)
+        self.callback = callback
+
+    def write(self, event: Event) -> None:
+        self.callback(event)
+
+
+class EventLog:
+    """事件日志：调用方只负责入队，后台线程负责格式化和写出。"""
+
+    def __init__(self):
+        self._sinks: List[Sink] = []
+        self._threshold = SILENT
+        self._queue: 'queue.SimpleQueue[Optional[Event]]' = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._pending = 0
+        self._drained = threading.Condition(self._lock)
+
+    # --- 输出端管理 ---
+
+    def add_sink(self, sink: Sink) -> Sink:
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+            self._update_threshold()
+        return sink
+
+    def remove_sink(self, sink: Sink) -> None:
+        self.flush()
+        with self._lock:
+            self._sinks = [s for s in self._sinks if s is not sink]
+            self._update_threshold()
+        sink.close()
+
+    def set_level(self, sink: Sink, level: int) -> None:
+        with self._lock:
+            sink.level = level
+            self._update_threshold()
+
+    def _update_threshold(self) -> None:
+        self._threshold = min((s.level for s in self._sinks), default=SILENT)
+
+    def enabled(self, level: int) -> bool:
+        return level >= self._threshold
+
+    # --- 记录 ---
+
+    def emit(self, level: int, name: str, template: str, *args: Any, **fields: Any) -> None:
+        if level < self._threshold:
+            return
+        event = Event(level, name, template, args, fields)
+        with self._lock:
+            self._pending += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name='eventlog-writer', daemon=True)
+                self._writer.start()
+        self._queue.put(event)
+
+    def debug(self, name: str, template: str, *args: Any, **fields: Any) -> None:
+        self.emit(DEBUG, name, template, *args, **fields)
+
+    def info(self, name: str, template: str, *args: Any, **fields: Any) -> None:
+        self.emit(INFO, name, template, *args, **fields)
+
+    def warning(self, name: str, template: str, *args: Any, **fields: Any) -> None:
+        self.emit(WARNING, name, template, *args, **fields)
+
+    def error(self, name: str, template: str, *args: Any, **fields: Any) -> None:
+        self.emit(ERROR, name, template, *args, **fields)
+
+    # --- 后台写出 ---
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            for sink in self._sinks:
+                if event.level >= sink.level:
+                    try:
+                        sink.write(event)
+                    except Exception as e:
+                        sys.stderr.write(f"写出日志失败 ({type(sink).__name__}): {e}\n")
+            # 队列暂时为空时才刷新，连续写出时不逐条刷盘
+            if self._queue.empty():
+                for sink in self._sinks:
+                    try:
+                        sink.flush()
+                    except Exception:
+                        pass
+            with self._lock:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._drained.notify_all()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """等待已入队的事件全部写出。"""
+        with self._lock:
+            return self._drained.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        """写出剩余事件并关闭所有输出端。"""
+        self.flush()
+        with self._lock:
+            sinks, self._sinks = self._sinks, []
+            self._update_threshold()
+        for sink in sinks:
+            sink.close()
+
+
+# 进程内共用的事件日志，默认输出到控制台
+event_log = EventLog()
+console_sink = event_log.add_sink(ConsoleSink(INFO))
+# 写线程是守护线程，退出前把剩余事件写完
+atexit.register(event_log.flush)
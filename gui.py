@@ -1,18 +1,55 @@
+import asyncio
+import base64
 import flet as ft
+import io
 import json
 import os
-import requests
 import time
-from datetime import datetime
-from typing import List, Dict, Optional, Union, Any
+from typing import List, Dict, Optional, Set, Union, Any
 import threading
-import random
-import re
+from functools import lru_cache
 from pathlib import Path
 
+import codec
+from endpoints import (
+    API_HOST, COMPLETE_NEW_USER_TASK, COMPLETE_TASK, GET_TASK, GET_TASK_LIST, LUCK_DRAW_APP_LIMIT, LUCK_DRAW_NEW_USER,
+    QUERY_USER_GOLD_RICH_SUM, Endpoint,
+)
+from eventlog import WARNING, CallbackSink, bind_account, event_log
+from breaker import CircuitOpenError
+from cancel import CancelToken, Cancelled
+from main import (
+    API_BREAKER, OUTAGE_BUDGET_SECONDS, RecordSyncError, load_requests, open_session, select_accounts,
+    sync_task_records,
+)
+from progress import (
+    ACCOUNT_FINISHED, ACCOUNT_STARTED, FAILED, REQUEST, SLEEP, STATE_LABELS, STEP_FINISHED, STEP_STARTED,
+    WAITING, ProgressBoard, progress_bus,
+)
+from records import AccountRunResult, TaskRecord
+from result_store import LOG_PATH, RunCache, iter_runs, load_run, save_run
+from scheduler import run_staggered
+from search import AccountIndex, account_fields
+from session import SessionError, format_failure_summary
+from workflow import DONE as STEP_DONE, FAILED as STEP_FAILED, STATUS_LABELS as STEP_STATUS_LABELS, WorkflowExecutor, rnl_steps
+
 CONFIG_PATH = "xiaomiconfig.json"
-API_HOST = "m.jr.airstarfinance.net"
-LOG_PATH = "task_logs"
+# 一键运行时的错峰窗口：每个账号 5 秒，同时最多执行的账号数
+STAGGER_SECONDS_PER_ACCOUNT = 5
+MAX_WORKERS = 4
+# 进度网格：刷新间隔（秒）、列标题和列宽
+PROGRESS_REFRESH_SECONDS = 0.3
+PROGRESS_HEADERS = ["账号", "状态", "当前步骤", "请求数", "平均延迟", "剩余等待"]
+PROGRESS_COLUMN_WIDTHS = [110, 80, 150, 80, 70, 70]
+# 搜索框停止输入多久后再筛选（秒）
+SEARCH_DEBOUNCE_SECONDS = 0.25
+
+# Tab页索引
+TAB_MAIN = 0
+TAB_ACCOUNT = 1
+TAB_EXCHANGE = 2
+TAB_LOGIN = 3
+TAB_RESULT = 4
 USER_AGENT_MOBILE = (
     'Mozilla/5.0 (Linux; U; Android 14; zh-CN; M2012K11AC Build/UKQ1.230804.001; '
     'AppBundle/com.mipay.wallet; AppVersionName/6.89.1.5275.2323; AppVersionCode/20577595; '
@@ -21,6 +58,37 @@ USER_AGENT_MOBILE = (
     'Version/4.0 Mobile Safari/537.36 XiaoMi/MiuiBrowser/4.3'
 )
 
+def keyed_accounts(accounts: List[Dict]) -> List[Any]:
+    """
+    为账号列表生成稳定的 key：(别名, 同名序号)，返回 [(key, data)]。
+    别名正常情况下唯一，序号只用于区分手动编辑出的重名账号。
+    """
+    seen: Dict[str, int] = {}
+    keyed = []
+    for acc in accounts:
+        data = acc.get("data", {})
+        us = data.get("us", "N/A")
+        seen[us] = seen.get(us, -1) + 1
+        keyed.append(((us, seen[us]), data))
+    return keyed
+
+@lru_cache(maxsize=16)
+def render_qr_base64(data: str) -> Optional[str]:
+    """
+    在本地把二维码内容渲染为 PNG 的 base64（与 login.py 的终端二维码内容相同），按内容缓存到进程结束。
+    客户端不必再从小米服务器下载二维码图片；未安装 qrcode/Pillow 时返回 None。
+    """
+    try:
+        import qrcode  # 只在扫码登录时才导入
+    except ImportError:
+        return None
+    qr = qrcode.QRCode(border=2, box_size=8)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
 class XiaomiAccount:
     def __init__(self, us, user_id=None, pass_token=None, security_token=None):
         self.us = us.strip()
@@ -38,7 +106,7 @@ class XiaomiAccount:
                 content = f.read()
                 if not content:
                     return []
-                return json.loads(content)
+                return codec.loads(content)
         except json.JSONDecodeError as e:
             print(f"❌ JSON格式错误: {e.msg}")
             return []
@@ -88,7 +156,7 @@ class XiaomiAccount:
             
         try:
             with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                json.dump(accounts, f, indent=4, ensure_ascii=False)
+                f.write(codec.dumps_pretty(accounts))
             print(f"✅ 账号 '{self.us}' 数据已成功保存！")
             return True
         except Exception as e:
@@ -106,13 +174,14 @@ class XiaomiAccount:
         }
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"}
         
+        requests = load_requests()
         try:
             response = requests.get(url, headers=headers, params=querystring, timeout=10)
             response.raise_for_status()
             response_text = response.text
             if "&&&START&&&" in response_text:
-                return json.loads(response_text.split("&&&START&&&", 1)[-1].strip())
-            return response.json()
+                return codec.loads(response_text.split("&&&START&&&", 1)[-1].strip())
+            return codec.response_json(response)
         except requests.RequestException as e:
             print(f"❌ 网络请求失败: {e}")
             return None
@@ -122,9 +191,11 @@ class XiaomiAccount:
 
 class ApiRequest:
     """封装 API 请求，统一管理会话、Cookie 和请求头。"""
-    def __init__(self, cookies: Union[str, Dict[str, str]]):
-        self.session = requests.Session()
+    def __init__(self, cookies: Union[str, Dict[str, str]], token: Optional[CancelToken] = None):
+        self.session = load_requests().Session()
         self.base_headers = {'Host': API_HOST, 'User-Agent': USER_AGENT_MOBILE}
+        # 一键运行的取消/暂停令牌，每个请求发出前检查
+        self.token = token or CancelToken()
         self.update_cookies(cookies)
 
     @staticmethod
@@ -143,19 +214,34 @@ class ApiRequest:
         self.session.cookies.update(dict_cookies)
         self.base_headers['Cookie'] = '; '.join([f"{k}={v}" for k, v in dict_cookies.items()])
 
-    def request(self, method: str, url: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """发送一个 HTTP 请求。"""
+    def request(self, method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        """发送一个 HTTP 请求，endpoint 为注册表中的接口名，用于进度事件。"""
+        requests = load_requests()
         headers = {**self.base_headers, **kwargs.pop('headers', {})}
+        self.token.checkpoint()
+        if not API_BREAKER.allow():
+            # 与 main.py 共用熔断器，熔断期间不发出请求
+            return None
+        started = time.perf_counter()
+        ok = False
         try:
             resp = self.session.request(method.upper(), url, verify=False, headers=headers, timeout=15, **kwargs)
+            API_BREAKER.record(resp.status_code < 500)
             resp.raise_for_status()
-            return resp.json()
+            data = codec.response_json(resp)
+            ok = True
+            return data
         except requests.exceptions.RequestException as e:
-            print(f"  [Request Error] {e}")
+            if e.response is None:
+                API_BREAKER.record(False)
+            event_log.warning('api.request', "  [Request Error] {}", e, url=url, method=method.upper())
             return None
         except (json.JSONDecodeError, AttributeError):
-            print(f"  [JSON Parse Error] 无法解析服务器响应: {getattr(resp, 'text', 'No Response Text')[:100]}")
+            event_log.warning('api.request', "  [JSON Parse Error] 无法解析服务器响应: {}", getattr(resp, 'text', 'No Response Text')[:100], url=url)
             return None
+        finally:
+            progress_bus.publish(REQUEST, endpoint=endpoint or url.split('?', 1)[0].rsplit('/', 1)[-1], ok=ok,
+                                 latency_ms=round((time.perf_counter() - started) * 1000, 1))
 
     def get(self, url: str, **kwargs) -> Optional[Dict[str, Any]]:
         """发送 GET 请求。"""
@@ -165,21 +251,26 @@ class ApiRequest:
         """发送 POST 请求。"""
         return self.request('POST', url, **kwargs)
 
+    def call(self, endpoint: Endpoint, **fields: Any) -> Optional[Dict[str, Any]]:
+        """调用注册表中的接口，fields 为本次调用的参数，见 endpoints.py。"""
+        url, kwargs = endpoint.prepare(**fields)
+        return self.request(endpoint.method, url, endpoint=endpoint.name, **kwargs)
+
 class RNL:
     """封装小米钱包任务的具体业务逻辑。"""
-    def __init__(self, api_request: ApiRequest):
+    def __init__(self, api_request: ApiRequest, us: Optional[str] = None):
         self.api = api_request
-        self.activity_code = '2211-videoWelfare'
+        self.us = us
         self.t_id: Optional[str] = None
         self.total_days: str = "未知"
-        self.today_records: List[Dict[str, Any]] = []
+        self.total_days_num: float = 0.0
+        self.today_records: List[TaskRecord] = []
         self.error_info: str = ""
 
     def get_task_list(self) -> Optional[List[Dict[str, Any]]]:
         """获取任务列表。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/getTaskList"
         try:
-            response = self.api.post(url, data={'activityCode': self.activity_code})
+            response = self.api.call(GET_TASK_LIST)
             if response and response.get('code') == 0:
                 target_tasks = [
                     task for task in response['value']['taskInfoList']
@@ -188,6 +279,9 @@ class RNL:
                 return target_tasks
             self.error_info = f"获取任务列表失败：{response}"
             return None
+        except (Cancelled, CircuitOpenError):
+            # 取消和熔断交给工作流中止整个账号，不能当作空响应
+            raise
         except Exception as e:
             self.error_info = f'获取任务列表时发生异常：{e}'
             return None
@@ -195,77 +289,43 @@ class RNL:
     def get_task(self, task_code: str) -> Optional[str]:
         """获取任务信息。"""
         try:
-            data = {
-                'activityCode': self.activity_code,
-                'taskCode': task_code,
-                'jrairstar_ph': '98lj8puDf9Tu/WwcyMpVyQ==',
-            }
-            response = self.api.post(
-                f"https://{API_HOST}/mp/api/generalActivity/getTask",
-                data=data,
-            )
+            response = self.api.call(GET_TASK, taskCode=task_code)
             if response and response['code'] != 0:
                 self.error_info = f'获取任务信息失败：{response}'
                 return None
             return response['value']['taskInfo']['userTaskId']
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'获取任务信息失败：{e}'
             return None
 
     def complete_task(self, task_id: str, t_id: str, brows_click_url_id: str) -> Optional[str]:
         """完成任务。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/completeTask"
-        # 使用与小米钱包3.0.py相同的参数格式和方法
-        params = {
-            'activityCode': self.activity_code,
-            'app': 'com.mipay.wallet',
-            'isNfcPhone': 'true',
-            'channel': 'mipay_indexicon_TVcard',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}',
-            'taskId': task_id,
-            'browsTaskId': t_id,
-            'browsClickUrlId': brows_click_url_id,
-            'clickEntryType': 'undefined',
-            'festivalStatus': '0'
-        }
         try:
-            response = self.api.get(url, params=params)
+            response = self.api.call(COMPLETE_TASK, taskId=task_id, browsTaskId=t_id, browsClickUrlId=brows_click_url_id)
             if response and response.get('code') == 0:
                 return response.get('value')
             self.error_info = f"完成任务失败：{response}"
             return None
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'完成任务时发生异常：{e}'
             return None
 
     def receive_award(self, user_task_id: str) -> bool:
         """领取奖励。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/luckDraw"
-        # 使用与小米钱包3.0.py相同的参数格式
-        params = {
-            'imei': '',
-            'device': 'manet',
-            'appLimit': '{"com.qiyi.video":false,"com.youku.phone":true,"com.tencent.qqlive":true,"com.hunantv.imgo.activity":true,"com.cmcc.cmvideo":false,"com.sankuai.meituan":true,"com.anjuke.android.app":false,"com.tal.abctimelibrary":false,"com.lianjia.beike":false,"com.kmxs.reader":true,"com.jd.jrapp":false,"com.smile.gifmaker":true,"com.kuaishou.nebula":false}',
-            'activityCode': self.activity_code,
-            'userTaskId': user_task_id,
-            'app': 'com.mipay.wallet',
-            'isNfcPhone': 'true',
-            'channel': 'mipay_indexicon_TVcard',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
-        }
         try:
-            response = self.api.get(url, params=params)
+            # 与小米钱包3.0.py相同，带设备和应用信息
+            response = self.api.call(LUCK_DRAW_APP_LIMIT, userTaskId=user_task_id)
             if response and response.get('code') == 0:
                 self.error_info = ""
                 return True
             self.error_info = f"领取奖励失败：{response}"
             return False
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'领取奖励时发生异常：{e}'
             return False
@@ -273,26 +333,13 @@ class RNL:
     def complete_new_user_task(self) -> Optional[str]:
         """完成应用下载试用任务"""
         try:
-            headers = {
-                'Connection': 'keep-alive',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'X-Request-ID': '1281eea0-e268-4fcc-9a5f-7dc11475b7db',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-            
-            url = f'https://{API_HOST}/mp/api/generalActivity/completeTask?activityCode=2211-videoWelfare&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=KWkK5VsKXiIbAH8Rf6kgU6tpDPyNWgXY8YCM1mQtt5nd7i1%2F4BqzPq0uY7OlIEOd&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D&taskCode=NEW_USER_CAMPAIGN&browsTaskId=&browsClickUrlId=1306285&adInfoId=&triggerId='
-            
-            response = self.api.get(url, headers=headers)
+            response = self.api.call(COMPLETE_NEW_USER_TASK)
             if response and response['code'] != 0:
                 self.error_info = f'完成应用下载试用失败：{response}'
                 return None
             return response['value'] if response else None
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'完成应用下载试用失败：{e}'
             return None
@@ -301,27 +348,9 @@ class RNL:
         """领取应用下载试用奖励"""
         try:
             # 发送领取请求前延时5秒
-            time.sleep(5)
+            self._pause(5)
             
-            headers = {
-                'Connection': 'keep-alive',
-                'sec-ch-ua': '"Chromium";v="118", "Android WebView";v="118", "Not=A?Brand";v="99"',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'sec-ch-ua-mobile': '?1',
-                'X-Request-ID': 'c09abfa7-6ea4-4435-a741-dff3622215cf',
-                'sec-ch-ua-platform': '"Android"',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-            
-            url = f'https://{API_HOST}/mp/api/generalActivity/luckDraw?imei=&device=alioth&appLimit=%7B%22com.qiyi.video%22:false,%22com.youku.phone%22:false,%22com.tencent.qqlive%22:false,%22com.hunantv.imgo.activity%22:false,%22com.cmcc.cmvideo%22:false,%22com.sankuai.meituan%22:false,%22com.anjuke.android.app%22:false,%22com.tal.abctimelibrary%22:false,%22com.lianjia.beike%22:false,%22com.kmxs.reader%22:false,%22com.jd.jrapp%22:false,%22com.smile.gifmaker%22:true,%22com.kuaishou.nebula%22:false%7D&activityCode=2211-videoWelfare&userTaskId={user_task_id}&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=L522i5qLZR9%2Bs25kEqPBJYbbHqUS4LrpuTsgl9kdsbcyU7tjWmx1BewlRNSSZaOT&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D'
-            
-            response = self.api.get(url, headers=headers)
+            response = self.api.call(LUCK_DRAW_NEW_USER, userTaskId=user_task_id)
             if response and response['code'] != 0:
                 self.error_info = f'领取应用下载试用奖励失败：{response}'
                 return False
@@ -330,40 +359,39 @@ class RNL:
                 prize_info = response['value']['prizeInfo']
                 return True
             return False
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'领取应用下载试用奖励失败：{e}'
             return False
 
+    def _pause(self, seconds: float) -> None:
+        """
+        工作流中的固定等待：接口熔断时抛出 CircuitOpenError，
+        取消时抛出 Cancelled 立即中止，暂停期间不计时。
+        """
+        API_BREAKER.check()
+        progress_bus.publish(SLEEP, until=time.time() + seconds)
+        self.api.token.wait(seconds)
+
     def query_user_info_and_records(self) -> bool:
         """查询用户总奖励和今日记录。"""
-        base_url = f"https://{API_HOST}/mp/api/generalActivity/"
-        params = {
-            'activityCode': self.activity_code,
-            'app': 'com.mipay.wallet',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
-        }
         try:
-            total_res = self.api.get(f"{base_url}queryUserGoldRichSum", params=params)
+            total_res = self.api.call(QUERY_USER_GOLD_RICH_SUM)
             if not total_res or total_res.get('code') != 0:
                 self.error_info = f'获取兑换视频天数失败：{total_res}'
                 return False
-            self.total_days = f"{int(total_res.get('value', 0)) / 100:.2f}天"
-
-            record_params = {**params, 'pageNum': 1, 'pageSize': 20}
-            record_res = self.api.get(f"{base_url}queryUserJoinList", params=record_params)
-            if not record_res or record_res.get('code') != 0:
-                self.error_info = f'查询任务完成记录失败：{record_res}'
-                return False
+            self.total_days_num = int(total_res.get('value', 0)) / 100
+            self.total_days = f"{self.total_days_num:.2f}天"
 
-            self.today_records = []
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            for item in record_res.get('value', {}).get('data', []):
-                if item.get('createTime', '').startswith(current_date):
-                    self.today_records.append(item)
+            # 奖励记录增量同步到本地结果存储，见 main.sync_task_records
+            self.today_records = sync_task_records(self.api, self.us)
             return True
+        except RecordSyncError as e:
+            self.error_info = str(e)
+            return False
+        except (Cancelled, CircuitOpenError):
+            raise
         except Exception as e:
             self.error_info = f'获取任务记录时发生异常：{e}'
             return False
@@ -375,6 +403,25 @@ class XiaomiWalletGUI:
         self.page.window_width = 800
         self.page.window_height = 600
         self.page.theme_mode = ft.ThemeMode.LIGHT
+        # 执行结果的有界缓存，以结果文件路径为 id，超出容量的结果在查看详情时再从磁盘读取
+        self.run_cache = RunCache()
+        # 正在执行的账号 -> 执行结果，请求层的警告和错误事件会追加到对应账号的执行日志中
+        self.running_results: Dict[str, AccountRunResult] = {}
+        # 当前一键运行的取消/暂停令牌，未运行时为 None
+        self.run_token: Optional[CancelToken] = None
+        # 账号管理页勾选的账号别名，非空时一键运行只执行这些账号
+        self.selected_accounts: Set[str] = set()
+        # 账号管理页、会员兑换页已渲染的卡片：(别名, 序号) -> (渲染时的数据, 卡片)，见 sync_keyed_list
+        self.account_cards: Dict[Any, Any] = {}
+        self.exchange_cards: Dict[Any, Any] = {}
+        # 两个页面共用的账号搜索索引、各页最近一次加载的列表项和搜索词
+        self.account_index = AccountIndex()
+        self.account_items: List[Any] = []
+        self.exchange_items: List[Any] = []
+        self.search_queries = {TAB_ACCOUNT: "", TAB_EXCHANGE: ""}
+        # 每次输入加一，防抖结束时只有最后一次输入会触发筛选
+        self.search_generation = 0
+        event_log.add_sink(CallbackSink(self.on_log_event, level=WARNING))
 
         # 配置Tab页
         self.tabs = ft.Tabs(
@@ -389,20 +436,15 @@ class XiaomiWalletGUI:
             ]
         )
         
-        # 主页面
-        self.main_page = self.create_main_page()
-        
-        # 账号管理页面
-        self.account_page = self.create_account_page()
-        
-        # 会员兑换页面
-        self.exchange_page = self.create_exchange_page()
-        
-        # 扫码登录页面
-        self.login_page = self.create_login_page()
-        
-        # 运行结果页面
-        self.result_page = self.create_result_page()
+        # Tab页面按需构建：首次访问时才创建控件，缩短首帧时间
+        self.page_builders = {
+            TAB_MAIN: self.create_main_page,
+            TAB_ACCOUNT: self.create_account_page,
+            TAB_EXCHANGE: self.create_exchange_page,
+            TAB_LOGIN: self.create_login_page,
+            TAB_RESULT: self.create_result_page,
+        }
+        self.built_pages = {}
         
         # 详情页面（初始化为空）
         self.details_page = ft.Container(
@@ -412,7 +454,7 @@ class XiaomiWalletGUI:
         
         # 页面容器
         self.page_content = ft.Container(
-            content=self.main_page,
+            content=self.get_tab_page(TAB_MAIN),
             expand=True
         )
         
@@ -428,23 +470,40 @@ class XiaomiWalletGUI:
             )
         )
         
-        # 更新账号列表
-        self.update_account_list()
+        # 首帧渲染后再读取配置文件，更新账号统计
+        self.page.run_task(self.load_account_stats)
+    
+    def get_tab_page(self, index):
+        """获取Tab页面，未构建时先构建"""
+        if index not in self.built_pages:
+            self.built_pages[index] = self.page_builders[index]()
+        return self.built_pages[index]
+    
+    def is_tab_built(self, index):
+        """Tab页面是否已经构建"""
+        return index in self.built_pages
+    
+    def show_tab(self, index):
+        """切换到指定Tab页面"""
+        self.tabs.selected_index = index
+        self.page_content.content = self.get_tab_page(index)
+        self.page.update()
+    
+    async def load_account_stats(self):
+        """首帧之后加载账号统计信息，读取配置文件放到工作线程中，不阻塞事件循环"""
+        accounts = await asyncio.to_thread(XiaomiAccount.load_accounts)
+        self.update_account_stats(accounts)
+        self.page.update()
     
     def on_tab_change(self, e):
         """Tab切换事件"""
-        if self.tabs.selected_index == 0:
-            self.page_content.content = self.main_page
-        elif self.tabs.selected_index == 1:
-            self.page_content.content = self.account_page
+        index = self.tabs.selected_index
+        self.page_content.content = self.get_tab_page(index)
+        if index == TAB_ACCOUNT:
             self.update_account_list()
-        elif self.tabs.selected_index == 2:
-            self.page_content.content = self.exchange_page
+        elif index == TAB_EXCHANGE:
             self.update_exchange_list()
-        elif self.tabs.selected_index == 3:
-            self.page_content.content = self.login_page
-        elif self.tabs.selected_index == 4:
-            self.page_content.content = self.result_page
+        elif index == TAB_RESULT:
             # 加载本地保存的任务日志
             self.load_local_task_logs()
         self.page.update()
@@ -461,52 +520,20 @@ class XiaomiWalletGUI:
                 self.page.update()
                 return
             
-            # 获取日期目录列表（按日期倒序）
-            date_dirs = []
-            for item in os.listdir(LOG_PATH):
-                item_path = os.path.join(LOG_PATH, item)
-                if os.path.isdir(item_path):
-                    try:
-                        # 验证是有效日期格式
-                        datetime.strptime(item, '%Y-%m-%d')
-                        date_dirs.append(item)
-                    except ValueError:
-                        continue
-            
-            # 按日期倒序排序
-            date_dirs.sort(reverse=True)
-            
-            # 存储加载的任务结果
-            self.task_results = []
-            
-            # 遍历日期目录
-            for date_dir in date_dirs:
-                date_path = os.path.join(LOG_PATH, date_dir)
-                # 获取日志文件列表（按时间倒序）
-                log_files = []
-                for item in os.listdir(date_path):
-                    if item.endswith('.json'):
-                        log_files.append(os.path.join(date_path, item))
-                
-                # 按文件名中的时间倒序排序
-                log_files.sort(reverse=True)
-                
+            # 遍历日期目录（按日期倒序，每天的日志文件按时间倒序）
+            for date_dir, log_files in iter_runs(LOG_PATH):
                 # 收集当前日期的所有记录，然后倒序插入
                 date_records = []
                 
                 # 遍历日志文件
                 for log_file in log_files:
                     try:
-                        with open(log_file, 'r', encoding='utf-8') as f:
-                            result_obj = json.load(f)
-                            
-                        # 添加到任务结果列表
-                        result_index = len(self.task_results)
-                        self.task_results.append(result_obj)
+                        # 只读取成功与否生成卡片，不放入缓存，点击时再按路径读取详情
+                        result = load_run(log_file)
                         
                         # 使用统一的add_result方法创建结果卡片
-                        is_success = result_obj.get('success', True)
-                        summary_text = f"✅ 账号 '{result_obj['us']}' 任务执行成功" if is_success else f"❌ 账号 '{result_obj['us']}' 任务执行失败"
+                        is_success = result.success
+                        summary_text = f"✅ 账号 '{result.us}' 任务执行成功" if is_success else f"❌ 账号 '{result.us}' 任务执行失败"
                         
                         # 创建结果卡片但不直接添加到界面
                         bg_color = ft.Colors.GREEN_50 if is_success else ft.Colors.RED_50
@@ -519,7 +546,7 @@ class XiaomiWalletGUI:
                                 padding=15,
                                 bgcolor=bg_color,
                                 border_radius=5,
-                                on_click=lambda e, idx=result_index: self.show_task_details(idx) if hasattr(self, 'task_results') else None
+                                on_click=lambda e, run_id=log_file: self.show_task_details(run_id)
                             )
                         )
                         date_records.append(result_card)
@@ -566,6 +593,23 @@ class XiaomiWalletGUI:
             )
         )
         
+        # 一键运行期间可暂停/继续或取消，见 cancel.py
+        self.pause_button = ft.ElevatedButton(
+            text="暂停",
+            icon=ft.Icons.PAUSE_CIRCLE,
+            on_click=self.toggle_pause,
+            disabled=True
+        )
+        self.cancel_button = ft.ElevatedButton(
+            text="取消",
+            icon=ft.Icons.STOP_CIRCLE,
+            on_click=self.cancel_run,
+            disabled=True,
+            style=ft.ButtonStyle(
+                color=ft.Colors.RED
+            )
+        )
+        
         self.status_text = ft.Text(
             value="欢迎使用小米钱包每日任务工具",
             size=16,
@@ -576,6 +620,11 @@ class XiaomiWalletGUI:
         self.account_count_text = ft.Text(value="账号数量: 0")
         self.logged_in_count_text = ft.Text(value="已登录: 0")
 
+        # 一键运行时每个账号一行的实时进度，数据来自 progress.py 的事件总线
+        self.progress_rows: Dict[str, List[ft.Text]] = {}
+        self.progress_counts_text = ft.Text(value="", size=12, color=ft.Colors.GREY_700)
+        self.progress_grid = ft.ListView(spacing=2, height=220)
+
         return ft.Column(
             [
                 ft.Container(
@@ -604,11 +653,25 @@ class XiaomiWalletGUI:
                 
                 ft.Container(
                     content=ft.Row(
-                        [self.run_all_button],
-                        alignment=ft.MainAxisAlignment.CENTER
+                        [self.run_all_button, self.pause_button, self.cancel_button],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                        spacing=10
                     ),
                     padding=20
                 ),
+
+                ft.Container(
+                    content=ft.Column(
+                        [
+                            self.progress_row_controls(PROGRESS_HEADERS, header=True),
+                            ft.Divider(height=1),
+                            self.progress_grid,
+                            self.progress_counts_text
+                        ],
+                        spacing=4
+                    ),
+                    padding=ft.padding.symmetric(horizontal=20)
+                ),
                 
                 ft.Container(
                     content=ft.Column(
@@ -649,6 +712,26 @@ class XiaomiWalletGUI:
                     padding=20
                 ),
                 
+                ft.Container(
+                    content=ft.Row(
+                        [
+                            ft.Text("勾选后一键运行只执行选中的账号："),
+                            ft.TextButton(text="全选", on_click=lambda _: self.select_accounts_by("all")),
+                            ft.TextButton(text="上次失败的", on_click=lambda _: self.select_accounts_by("failed")),
+                            ft.TextButton(text="今日未完成的", on_click=lambda _: self.select_accounts_by("not_done")),
+                            ft.TextButton(text="清空选择", on_click=lambda _: self.select_accounts_by("none")),
+                        ],
+                        spacing=5,
+                        wrap=True
+                    ),
+                    padding=ft.padding.symmetric(horizontal=20)
+                ),
+                
+                ft.Container(
+                    content=self.create_search_field(TAB_ACCOUNT),
+                    padding=ft.padding.only(left=20, right=20, top=10)
+                ),
+                
                 ft.Container(
                     content=self.account_list_view,
                     expand=True,
@@ -678,9 +761,7 @@ class XiaomiWalletGUI:
     
     def switch_to_login_tab(self):
         """切换到扫码登录标签页并更新页面内容"""
-        self.tabs.selected_index = 3  # 更新索引，因为新增了会员兑换标签页
-        self.page_content.content = self.login_page
-        self.page.update()
+        self.show_tab(TAB_LOGIN)
     
     def create_exchange_page(self):
         """创建会员兑换页面"""
@@ -742,6 +823,11 @@ class XiaomiWalletGUI:
                     border_radius=5
                 ),
                 
+                ft.Container(
+                    content=self.create_search_field(TAB_EXCHANGE),
+                    padding=ft.padding.only(left=20, right=20, top=10)
+                ),
+                
                 ft.Container(
                     content=self.exchange_list_view,
                     expand=True,
@@ -878,6 +964,8 @@ class XiaomiWalletGUI:
         )
         
         self.countdown_text = ft.Text(value="")
+        # 所有由倒计时协程驱动的控件
+        self.countdown_widgets = [self.countdown_text]
         
         # 添加二维码链接显示组件
         self.qr_url_text = ft.Text(value="", selectable=True)
@@ -947,108 +1035,210 @@ class XiaomiWalletGUI:
             expand=True
         )
     
+    def update_account_stats(self, accounts):
+        """更新主页面的账号统计信息"""
+        logged_in_count = sum(1 for acc in accounts if acc.get("data", {}).get("userId"))
+        self.account_count_text.value = f"账号数量: {len(accounts)}"
+        self.logged_in_count_text.value = f"已登录: {logged_in_count}"
+    
     def update_account_list(self, *args, **kwargs):
-        """更新账号列表"""
-        self.account_list_view.controls.clear()
-        
+        """更新账号列表：按别名复用已有卡片，只增删和重建有变化的账号"""
         accounts = XiaomiAccount.load_accounts()
-        total_accounts = len(accounts)
-        logged_in_count = sum(1 for acc in accounts if acc.get("data", {}).get("userId"))
+        self.update_account_stats(accounts)
         
-        self.account_count_text.value = f"账号数量: {total_accounts}"
-        self.logged_in_count_text.value = f"已登录: {logged_in_count}"
+        # 账号管理页尚未构建时只需更新统计信息
+        if not self.is_tab_built(TAB_ACCOUNT):
+            self.page.update()
+            return
         
-        if not accounts:
-            self.account_list_view.controls.append(ft.Text("暂无账号，请先添加账号"))
-        else:
-            for i, acc in enumerate(accounts):
-                data = acc.get("data", {})
-                us = data.get("us", "N/A")
-                user_id = data.get("userId", "未登录")
-                
-                # 账号卡片
-                # 使用函数包装确保正确捕获每个账号的别名
-                def create_account_card(us_value, user_id_value):
-                    def handle_delete(e):
-                        self.delete_account(us_value)
-                    
-                    return ft.Card(
-                        content=ft.Container(
-                            content=ft.Row(
-                                [
-                                    ft.Column(
-                                        [
-                                            ft.Text(f"别名: {us_value}", weight=ft.FontWeight.BOLD),
-                                            ft.Text(f"小米ID: {user_id_value}")
-                                        ],
-                                        expand=True
-                                    ),
-                                    ft.ElevatedButton(
-                                        text="删除",
-                                        on_click=handle_delete
-                                    )
-                                ],
-                                spacing=10
-                            ),
-                            padding=10
-                        )
-                    )
-                
-                account_card = create_account_card(us, user_id)
-                
-                self.account_list_view.controls.append(account_card)
+        keyed = keyed_accounts(accounts)
+        self.account_index.update((key, account_fields(data)) for key, data in keyed)
+        self.account_items = [(key, data.get("userId", "未登录")) for key, data in keyed]
+        self.render_account_list()
         
         self.page.update()
     
-    def update_exchange_list(self, *args, **kwargs):
-        """更新会员兑换配置列表"""
-        self.exchange_list_view.controls.clear()
-        
-        # 更新账号下拉列表
-        accounts = XiaomiAccount.load_accounts()
-        account_options = []
-        for acc in accounts:
-            data = acc.get("data", {})
-            us = data.get("us", "N/A")
-            user_id = data.get("userId", "未登录")
-            if user_id != "未登录":  # 只显示已登录的账号
-                account_options.append(ft.dropdown.Option(us, us))
+    def render_account_list(self):
+        """按当前搜索词显示账号卡片（需在页面线程中调用）"""
+        self.sync_keyed_list(
+            self.account_list_view, self.account_cards, self.account_items,
+            self.create_account_card, "暂无账号，请先添加账号",
+            visible=self.account_index.search(self.search_queries[TAB_ACCOUNT])
+        )
+        # 勾选状态直接改复选框的值，不重建卡片
+        for key, (_, card) in self.account_cards.items():
+            card.data.value = key[0] in self.selected_accounts
+    
+    def create_account_card(self, key, user_id):
+        """账号管理页的账号卡片，card.data 为勾选框"""
+        us = key[0]
+
+        def handle_delete(e):
+            self.delete_account(us)
         
-        self.account_dropdown.options = account_options
+        def handle_select(e):
+            if e.control.value:
+                self.selected_accounts.add(us)
+            else:
+                self.selected_accounts.discard(us)
+            self.update_selection_status()
         
-        if not accounts:
-            self.exchange_list_view.controls.append(ft.Text("暂无账号，请先添加账号"))
+        checkbox = ft.Checkbox(
+            value=us in self.selected_accounts,
+            on_change=handle_select
+        )
+        return ft.Card(
+            content=ft.Container(
+                content=ft.Row(
+                    [
+                        checkbox,
+                        ft.Column(
+                            [
+                                ft.Text(f"别名: {us}", weight=ft.FontWeight.BOLD),
+                                ft.Text(f"小米ID: {user_id}")
+                            ],
+                            expand=True
+                        ),
+                        ft.ElevatedButton(
+                            text="删除",
+                            on_click=handle_delete
+                        )
+                    ],
+                    spacing=10
+                ),
+                padding=10
+            ),
+            data=checkbox
+        )
+    
+    def sync_keyed_list(self, list_view, rendered, items, build, empty_text, visible=None):
+        """
+        按 key 增量更新 ListView（需在页面线程中调用）。
+        items 为 [(key, state)]，rendered 保存 key -> (state, 控件)：state 未变的控件原样复用，
+        变化的重建，消失的移除。Flet 按控件比较子列表，未变的卡片不会再发送给客户端。
+        visible 为搜索匹配的 key，不为 None 时只显示（和按需构建）这些账号的卡片。
+        """
+        shown = set(visible) if visible is not None else None
+        controls = []
+        for key, state in items:
+            if shown is not None and key not in shown:
+                continue
+            cached = rendered.get(key)
+            if cached is None or cached[0] != state:
+                cached = rendered[key] = (state, build(key, state))
+            controls.append(cached[1])
+        for key in set(rendered) - {key for key, _ in items}:
+            del rendered[key]
+        if not controls:
+            controls = [ft.Text(empty_text if not items or shown is None else "没有匹配的账号")]
+        old = list_view.controls
+        if len(old) != len(controls) or any(a is not b for a, b in zip(old, controls)):
+            list_view.controls = controls
+    
+    def select_accounts_by(self, mode):
+        """按条件批量勾选账号，条件来自本地结果存储（与 main.py 的 --failed-last-run/--not-done-today 一致）"""
+        accounts = XiaomiAccount.load_accounts()
+        if mode == "none":
+            chosen = []
         else:
-            # 显示每个账号的兑换配置
-            for i, acc in enumerate(accounts):
-                data = acc.get("data", {})
-                us = data.get("us", "N/A")
-                user_id = data.get("userId", "未登录")
-                exchange_configs = data.get("exchange_configs", [])
-                
-                # 账号信息卡片
-                account_card = ft.Card(
-                    content=ft.Container(
-                        content=ft.Column([
-                            ft.Row([
-                                ft.Text(f"账号: {us}", weight=ft.FontWeight.BOLD, size=16),
-                                ft.Text(f"小米ID: {user_id}", size=14)
-                            ]),
-                            ft.Divider(),
-                            # 兑换配置列表
-                            ft.Column([
-                                ft.Text("会员兑换配置:", weight=ft.FontWeight.BOLD, size=14),
-                                *self.create_exchange_config_items(us, exchange_configs)
-                            ])
-                        ]),
-                        padding=15
-                    )
-                )
-                
-                self.exchange_list_view.controls.append(account_card)
+            chosen = select_accounts(accounts, failed_last_run=mode == "failed", not_done_today=mode == "not_done")
+        self.selected_accounts = {acc.get("data", {}).get("us") for acc in chosen}
+        if mode in ("failed", "not_done") and not chosen:
+            self.show_snack_bar("没有符合条件的账号", ft.Colors.ORANGE)
+        self.update_account_list()
+        self.update_selection_status()
+
+    def update_selection_status(self):
+        """在主页面提示一键运行将执行的账号范围"""
+        if not self.is_tab_built(TAB_MAIN) or (self.run_token is not None):
+            return
+        if self.selected_accounts:
+            self.status_text.value = f"已勾选 {len(self.selected_accounts)} 个账号，一键运行只执行这些账号"
+        else:
+            self.status_text.value = "未勾选账号，一键运行将执行所有账号"
+        self.page.update()
+
+    def update_exchange_list(self, *args, **kwargs):
+        """更新会员兑换配置列表：按别名复用已有卡片，只重建配置有变化的账号"""
+        accounts = XiaomiAccount.load_accounts()
+        keyed = keyed_accounts(accounts)
+        
+        # 更新账号下拉列表（只显示已登录的账号），账号未变时不替换选项
+        logged_in = [key[0] for key, data in keyed if data.get("userId", "未登录") != "未登录"]
+        if [option.key for option in self.account_dropdown.options or []] != logged_in:
+            self.account_dropdown.options = [ft.dropdown.Option(us, us) for us in logged_in]
+        
+        # 显示每个账号的兑换配置
+        self.account_index.update((key, account_fields(data)) for key, data in keyed)
+        self.exchange_items = [
+            (key, (
+                data.get("userId", "未登录"),
+                tuple((config.get('type', '未知'), config.get('phone', '未知')) for config in data.get("exchange_configs", []))
+            ))
+            for key, data in keyed
+        ]
+        self.render_exchange_list()
         
         self.page.update()
     
+    def render_exchange_list(self):
+        """按当前搜索词显示兑换配置卡片（需在页面线程中调用）"""
+        self.sync_keyed_list(
+            self.exchange_list_view, self.exchange_cards, self.exchange_items,
+            self.create_exchange_card, "暂无账号，请先添加账号",
+            visible=self.account_index.search(self.search_queries[TAB_EXCHANGE])
+        )
+    
+    def create_search_field(self, tab):
+        """账号管理页、会员兑换页的搜索框"""
+        return ft.TextField(
+            hint_text="搜索别名、小米ID、登录状态或会员类型，多个关键词用空格分隔",
+            prefix_icon=ft.Icons.SEARCH,
+            dense=True,
+            on_change=lambda e: self.on_search_change(tab, e.control.value)
+        )
+    
+    def on_search_change(self, tab, value):
+        """输入停止 SEARCH_DEBOUNCE_SECONDS 秒后再按索引筛选，不重新读取配置文件"""
+        self.search_queries[tab] = value or ""
+        self.search_generation += 1
+        generation = self.search_generation
+
+        async def apply_search():
+            await asyncio.sleep(SEARCH_DEBOUNCE_SECONDS)
+            if generation != self.search_generation:
+                return
+            if tab == TAB_ACCOUNT:
+                self.render_account_list()
+            else:
+                self.render_exchange_list()
+            self.page.update()
+
+        self.page.run_task(apply_search)
+    
+    def create_exchange_card(self, key, state):
+        """会员兑换页的账号卡片"""
+        us = key[0]
+        user_id, configs = state
+        exchange_configs = [{'type': membership_type, 'phone': phone} for membership_type, phone in configs]
+        return ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Row([
+                        ft.Text(f"账号: {us}", weight=ft.FontWeight.BOLD, size=16),
+                        ft.Text(f"小米ID: {user_id}", size=14)
+                    ]),
+                    ft.Divider(),
+                    # 兑换配置列表
+                    ft.Column([
+                        ft.Text("会员兑换配置:", weight=ft.FontWeight.BOLD, size=14),
+                        *self.create_exchange_config_items(us, exchange_configs)
+                    ])
+                ]),
+                padding=15
+            )
+        )
+    
     def create_exchange_config_items(self, us, exchange_configs):
         """创建兑换配置项目列表"""
         if not exchange_configs:
@@ -1137,7 +1327,7 @@ class XiaomiWalletGUI:
         if updated:
             try:
                 with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                    json.dump(accounts, f, indent=4, ensure_ascii=False)
+                    f.write(codec.dumps_pretty(accounts))
                 
                 self.page.snack_bar = ft.SnackBar(
                     content=ft.Text(f"✅ 已为账号 '{account_us}' 添加 '{membership_type}' 兑换配置"),
@@ -1184,7 +1374,7 @@ class XiaomiWalletGUI:
                     
                     try:
                         with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                            json.dump(accounts, f, indent=4, ensure_ascii=False)
+                            f.write(codec.dumps_pretty(accounts))
                         
                         self.page.snack_bar = ft.SnackBar(
                             content=ft.Text(f"✅ 已删除 '{deleted_config['type']}' 兑换配置"),
@@ -1221,6 +1411,7 @@ class XiaomiWalletGUI:
         original_count = len(accounts)
         new_accounts = [acc for acc in accounts if acc.get("data", {}).get("us") != us_to_delete]
         print(f"🔍 过滤后的账号数量: {len(new_accounts)}")
+        self.selected_accounts.discard(us_to_delete)
         
         if len(new_accounts) == original_count:
             print(f"⚠️ 警告：没有找到要删除的账号 '{us_to_delete}'")
@@ -1236,7 +1427,7 @@ class XiaomiWalletGUI:
             # 1. 删除配置文件中的账号信息
             print(f"🔍 正在写入配置文件: {CONFIG_PATH}")
             with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                json.dump(new_accounts, f, indent=4, ensure_ascii=False)
+                f.write(codec.dumps_pretty(new_accounts))
             print(f"✅ 配置文件写入成功")
             
             # 2. 删除相关的任务日志文件
@@ -1334,12 +1525,21 @@ class XiaomiWalletGUI:
                 self.page.run_task(update_status_no_qr)
                 return
             
-            # 解决Image组件显示问题
+            # 在登录线程中本地渲染二维码，失败时退回由客户端加载远程图片
+            try:
+                qr_base64 = render_qr_base64(qr_url)
+            except Exception as ex:
+                print(f"本地生成二维码失败: {ex}")
+                qr_base64 = None
+            
             async def update_qr_image():
-                # 先清除之前的src_base64属性，确保src属性生效
-                self.qr_image.src_base64 = None
-                # 设置图片的src属性为API返回的二维码URL
-                self.qr_image.src = qr_url
+                if qr_base64:
+                    self.qr_image.src = None
+                    self.qr_image.src_base64 = qr_base64
+                else:
+                    # 先清除之前的src_base64属性，确保src属性生效
+                    self.qr_image.src_base64 = None
+                    self.qr_image.src = qr_url
                 # 显示二维码图片
                 self.qr_image.visible = True
                 # 显示二维码链接
@@ -1366,6 +1566,36 @@ class XiaomiWalletGUI:
         self.login_status_text.color = color
         self.page.update()
     
+    def start_countdown(self, end_time):
+        """启动倒计时协程，同时停止上一次登录遗留的倒计时"""
+        self.stop_countdown()
+        stop_event = threading.Event()
+        self.countdown_stop_event = stop_event
+        self.page.run_task(self.run_countdown, end_time, stop_event)
+    
+    def stop_countdown(self):
+        """通知倒计时协程退出"""
+        stop_event = getattr(self, 'countdown_stop_event', None)
+        if stop_event:
+            stop_event.set()
+    
+    async def run_countdown(self, end_time, stop_event):
+        """每秒刷新一次所有倒计时控件，只在数值变化时推送对应控件的更新"""
+        last_text = None
+        while not stop_event.is_set():
+            remaining = int(end_time - time.time())
+            text = f"⏳ 二维码有效时间剩余 {remaining} 秒" if remaining > 0 else "❌ 二维码已过期"
+            if text != last_text:
+                for widget in self.countdown_widgets:
+                    widget.value = text
+                    # 切换Tab后登录页控件已卸载（page 为 None），只更新数值，重新显示时再渲染
+                    if widget.page is not None:
+                        widget.update()
+                last_text = text
+            if remaining <= 0:
+                return
+            await asyncio.sleep(1)
+    
     def check_login_status(self, lp_url, timeout, account):
         """检查登录状态"""
         start_time = time.time()
@@ -1374,38 +1604,18 @@ class XiaomiWalletGUI:
         status_messages = {700: "等待扫码", 701: "已扫码, 请在手机上确认", 702: "二维码已过期", 0: "登录成功"}
         last_status_code = -1
         
-        # 优化倒计时更新逻辑
-        self.countdown_timer = None
-        
-        def update_countdown():
-            remaining = int(end_time - time.time())
-            if remaining > 0:
-                async def update_ui():
-                    self.countdown_text.value = f"⏳ 二维码有效时间剩余 {remaining} 秒"
-                    self.page.update()
-                
-                self.page.run_task(update_ui)
-                # 每秒更新一次倒计时
-                self.countdown_timer = threading.Timer(1.0, update_countdown)
-                self.countdown_timer.start()
-            else:
-                async def update_expired():
-                    self.countdown_text.value = "❌ 二维码已过期"
-                    self.page.update()
-                
-                self.page.run_task(update_expired)
-        
-        # 启动倒计时更新
-        update_countdown()
+        # 由单个长生命周期的协程驱动倒计时，登录结束时停止
+        self.start_countdown(end_time)
         
         # 继续轮询登录状态
+        requests = load_requests()
         while time.time() < end_time:
             try:
                 response = requests.get(lp_url, timeout=60)
                 response_text = response.text
                 if "&&&START&&&" in response_text:
                     response_text = response_text.split("&&&START&&&", 1)[-1].strip()
-                result = json.loads(response_text)
+                result = codec.loads(response_text)
                 
                 status_code = result.get("code", -1)
                 
@@ -1415,9 +1625,8 @@ class XiaomiWalletGUI:
                     last_status_code = status_code
                 
                 if status_code == 0:
-                    # 停止倒计时定时器
-                    if hasattr(self, 'countdown_timer') and self.countdown_timer:
-                        self.countdown_timer.cancel()
+                    # 停止倒计时
+                    self.stop_countdown()
                     
                     user_id = result.get("userId")
                     security_token = result.get("ssecurity")
@@ -1435,9 +1644,7 @@ class XiaomiWalletGUI:
                         def auto_redirect():
                             time.sleep(1)
                             async def switch_to_home():
-                                self.tabs.selected_index = 0
-                                self.page_content.content = self.main_page
-                                self.page.update()
+                                self.show_tab(TAB_MAIN)
                             self.page.run_task(switch_to_home)
                         threading.Thread(target=auto_redirect, daemon=True).start()
                     else:
@@ -1446,9 +1653,8 @@ class XiaomiWalletGUI:
                     return
                 
                 if status_code == 702:
-                    # 停止倒计时定时器
-                    if hasattr(self, 'countdown_timer') and self.countdown_timer:
-                        self.countdown_timer.cancel()
+                    # 停止倒计时
+                    self.stop_countdown()
                     
                     self.update_login_status("❌ 二维码已过期，请重新生成", ft.Colors.RED)
                     self.countdown_text.value = ""
@@ -1468,9 +1674,8 @@ class XiaomiWalletGUI:
                 continue
         
         # 超时处理
-        # 停止倒计时定时器
-        if hasattr(self, 'countdown_timer') and self.countdown_timer:
-            self.countdown_timer.cancel()
+        # 停止倒计时
+        self.stop_countdown()
         
         self.update_login_status("❌ 登录超时", ft.Colors.RED)
         self.countdown_text.value = ""
@@ -1516,9 +1721,7 @@ class XiaomiWalletGUI:
                 def auto_redirect():
                     time.sleep(1)
                     async def switch_to_home():
-                        self.tabs.selected_index = 0
-                        self.page_content.content = self.main_page
-                        self.page.update()
+                        self.show_tab(TAB_MAIN)
                     self.page.run_task(switch_to_home)
                 threading.Thread(target=auto_redirect, daemon=True).start()
             else:
@@ -1537,26 +1740,21 @@ class XiaomiWalletGUI:
         self.page.snack_bar.open = True
         self.page.update()
     
-    def save_task_log(self, result_obj):
-        """缓存任务执行记录到本地文件"""
+    def on_log_event(self, event):
+        """事件日志的 GUI 输出端：把事件追加到所属账号正在进行的执行日志中"""
+        result = self.running_results.get(event.account)
+        if result is not None:
+            result.log(event.template, *event.args)
+
+    def save_task_log(self, result: AccountRunResult) -> Optional[str]:
+        """缓存任务执行记录到本地文件，返回文件路径，保存失败时返回 None"""
         try:
-            # 创建日期目录
-            today = datetime.now().strftime('%Y-%m-%d')
-            date_dir = os.path.join(LOG_PATH, today)
-            Path(date_dir).mkdir(exist_ok=True)
-            
-            # 生成日志文件名
-            timestamp = datetime.now().strftime('%H-%M-%S')
-            log_filename = f"{result_obj['us']}_{timestamp}.json"
-            log_path = os.path.join(date_dir, log_filename)
-            
-            # 保存日志到文件
-            with open(log_path, 'w', encoding='utf-8') as f:
-                json.dump(result_obj, f, indent=4, ensure_ascii=False)
+            return save_run(result)
         except Exception as e:
             print(f"保存任务日志失败: {e}")
+            return None
     
-    def add_result(self, text, is_success=True, is_summary=False, result_index=None):
+    def add_result(self, text, is_success=True, is_summary=False, run_id=None):
         """添加运行结果，支持点击查看详情"""
         bg_color = ft.Colors.GREEN_50 if is_success else ft.Colors.RED_50
         if is_summary:
@@ -1565,8 +1763,8 @@ class XiaomiWalletGUI:
         # 创建结果卡片内容
         content_items = [ft.Text(text, selectable=True, size=14)]
         
-        # 如果存在result_index，添加点击提示
-        if result_index is not None:
+        # 如果存在run_id，添加点击提示
+        if run_id is not None:
             content_items.append(ft.Text("点击查看详情...", size=12, color=ft.Colors.GREY_500))
         
         # 创建结果卡片
@@ -1577,33 +1775,40 @@ class XiaomiWalletGUI:
                 bgcolor=bg_color,
                 border_radius=5,
                 # 明确设置Container为可点击
-                on_click=lambda e, idx=result_index: self.show_task_details(idx) if result_index is not None and hasattr(self, 'task_results') else None
+                on_click=lambda e: self.show_task_details(run_id) if run_id is not None else None
             )
         )
         
         # 将新记录插入到列表开头，实现倒序显示
+        self.get_tab_page(TAB_RESULT)
         self.result_list_view.controls.insert(0, result_card)
         self.page.update()
     
-    def show_task_details(self, result_index):
-        """显示任务执行详情弹窗"""
-        if not hasattr(self, 'task_results') or result_index >= len(self.task_results):
+    def show_task_details(self, run_id: str):
+        """显示任务执行详情弹窗，结果不在缓存中时按 id 从本地文件读取"""
+        try:
+            result = self.run_cache.get(run_id)
+        except (OSError, ValueError) as e:
+            self.page.snack_bar = ft.SnackBar(
+                content=ft.Text(f"⚠️ 无法读取该次执行的详情（可能未保存到本地或已被删除）: {e}"),
+                bgcolor=ft.Colors.RED
+            )
+            self.page.snack_bar.open = True
+            self.page.update()
             return
         
-        result_obj = self.task_results[result_index]
-        
         # 创建详情内容
         details_content = ft.Column(
             controls=[
-                ft.Text(f"账号: {result_obj['us']}", size=18, weight=ft.FontWeight.BOLD),
-                ft.Text(f"用户ID: {result_obj['user_id']}", size=16),
-                ft.Text(f"执行时间: {result_obj['start_time']}", size=16),
-                ft.Text(f"结束时间: {result_obj.get('end_time', '未知')}", size=16),
-                ft.Text(f"状态: {'成功' if result_obj['success'] else '失败'}", size=16),
+                ft.Text(f"账号: {result.us}", size=18, weight=ft.FontWeight.BOLD),
+                ft.Text(f"用户ID: {result.user_id}", size=16),
+                ft.Text(f"执行时间: {result.start_time}", size=16),
+                ft.Text(f"结束时间: {result.end_time or '未知'}", size=16),
+                ft.Text(f"状态: {'成功' if result.success else '失败'}", size=16),
                 ft.Divider(),
                 ft.Text("执行日志:", size=16, weight=ft.FontWeight.BOLD),
                 ft.Container(
-                    content=ft.Text("\n".join(result_obj['logs']), size=14, selectable=True),
+                    content=ft.Text(result.text(), size=14, selectable=True),
                     padding=10,
                     bgcolor=ft.Colors.GREY_50,
                     border_radius=5,
@@ -1637,11 +1842,57 @@ class XiaomiWalletGUI:
         """返回到结果列表"""
         if hasattr(self, 'details_dialog') and self.details_dialog.open:
             self.page.close(self.details_dialog)
-        self.page_content.content = self.result_page
+        self.page_content.content = self.get_tab_page(TAB_RESULT)
         self.page.update()
 
+    def progress_row_controls(self, values: List[str], header: bool = False) -> ft.Row:
+        """进度网格的一行，列宽与 PROGRESS_COLUMN_WIDTHS 对应"""
+        weight = ft.FontWeight.BOLD if header else None
+        return ft.Row(
+            [
+                ft.Text(value, width=width, size=12, weight=weight, no_wrap=True)
+                for value, width in zip(values, PROGRESS_COLUMN_WIDTHS)
+            ],
+            spacing=8
+        )
+
+    def reset_progress_grid(self, aliases: List[str]):
+        """一键运行开始时为每个账号建一行（需在页面线程中调用）"""
+        self.progress_grid.controls.clear()
+        self.progress_rows = {}
+        for us in aliases:
+            row = self.progress_row_controls([us, STATE_LABELS[WAITING], "", "0", "-", ""])
+            self.progress_rows[us] = row.controls
+            self.progress_grid.controls.append(row)
+        self.progress_counts_text.value = ""
+
+    def apply_progress(self, board: ProgressBoard):
+        """只更新上次刷新后有变化的行（需在页面线程中调用）"""
+        now = time.time()
+        for row in board.drain():
+            cells = self.progress_rows.get(row.us)
+            if cells is None:
+                continue
+            cells[1].value = STATE_LABELS[row.state]
+            cells[2].value = row.error if row.state == FAILED and row.error else row.step
+            cells[3].value = str(row.requests) if not row.failed_requests else f"{row.requests} ({row.failed_requests}失败)"
+            cells[4].value = "-" if row.avg_latency_ms is None else f"{row.avg_latency_ms:.0f}ms"
+            remaining = row.sleep_remaining(now)
+            cells[5].value = f"{remaining:.0f}s" if remaining else ""
+        counts = board.counts()
+        self.progress_counts_text.value = "  ".join(
+            f"{STATE_LABELS[state]} {count}" for state, count in counts.items() if count
+        )
+
     def run_all_tasks(self, e):
         """一键运行所有任务"""
+        # 取消时置位 stop_event，不再启动剩余账号；接口故障超过预算时也会单独置位
+        stop_event = threading.Event()
+        token = CancelToken(stop_event)
+        self.run_token = token
+        # 熔断器在多次运行之间共享，故障时间从本次运行开始计算，冷却结束后由第一个请求探测
+        API_BREAKER.reset_outage()
+
         def run_task_thread():
             # 确保日志目录存在
             Path(LOG_PATH).mkdir(exist_ok=True)
@@ -1650,324 +1901,334 @@ class XiaomiWalletGUI:
             async def update_status_running():
                 self.status_text.value = "正在执行任务，请稍候..."
                 self.run_all_button.disabled = True
+                self.set_run_controls(running=True)
                 self.page.update()
 
             self.page.run_task(update_status_running)
             
             # 清空结果列表
             async def clear_results():
+                self.get_tab_page(TAB_RESULT)
                 self.result_list_view.controls.clear()
                 self.page.update()
 
             self.page.run_task(clear_results)
             
-            # 获取所有账号
+            # 获取所有账号，有勾选时只执行勾选的账号
             accounts = XiaomiAccount.load_accounts()
+            if self.selected_accounts:
+                accounts = [acc for acc in accounts if acc.get("data", {}).get("us") in self.selected_accounts]
             
             if not accounts:
                 async def update_status_no_accounts():
-                    self.status_text.value = "❌ 没有找到账号，请先添加账号"
+                    self.status_text.value = "❌ 没有找到账号，请先添加账号" if not self.selected_accounts else "❌ 勾选的账号已不存在，请重新选择"
                     self.run_all_button.disabled = False
+                    self.set_run_controls(running=False)
                     self.page.update()
 
                 self.page.run_task(update_status_no_accounts)
                 return
             
             total_accounts = len(accounts)
-            successful_accounts = 0
-            failed_accounts = 0
-            
-            # 存储执行结果的详细信息
-            self.task_results = []
+
+            # 进度网格：执行线程只向 board 合并事件，页面每 PROGRESS_REFRESH_SECONDS 秒取出有变化的行刷新一次
+            aliases = [acc.get("data", {}).get("us", "未知账号") for acc in accounts]
+            board = ProgressBoard(aliases)
+            progress_bus.subscribe(board)
+            run_finished = threading.Event()
+
+            async def refresh_progress():
+                self.reset_progress_grid(aliases)
+                self.page.update()
+                while not run_finished.is_set():
+                    await asyncio.sleep(PROGRESS_REFRESH_SECONDS)
+                    self.apply_progress(board)
+                    self.page.update()
+                self.apply_progress(board)
+                self.page.update()
+
+            self.page.run_task(refresh_progress)
             
-            for i, acc in enumerate(accounts):
-                data = acc.get("data", {})
-                us = data.get("us", "未知账号")
-                user_id = data.get("userId")
-                pass_token = data.get("passToken")
-                exchange_configs = data.get("exchange_configs", [])  # 获取会员兑换配置
-                
-                # 更新进度状态
+            # 账号在错峰窗口内依次启动、并发执行，完成一个更新一次进度
+            completed = [0]
+            progress_lock = threading.Lock()
+
+            def run_with_progress(data):
+                with bind_account(data.get("us", "未知账号")):
+                    result = self.run_account_task(data, token)
+                with progress_lock:
+                    completed[0] += 1
+                    done = completed[0]
                 async def update_progress():
-                    self.status_text.value = f"正在执行任务: {i+1}/{total_accounts} - 账号 '{us}'"
-                    self.page.update()
+                    # 暂停或取消时保留按钮给出的提示
+                    if not token.paused and not token.cancelled:
+                        self.status_text.value = f"正在执行任务: 已完成 {done}/{total_accounts} - 账号 '{result.us}'"
+                        self.page.update()
                 self.page.run_task(update_progress)
-                
-                # 创建任务执行结果对象
-                result_obj = {
-                    "us": us,
-                    "user_id": user_id,
-                    "start_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    "logs": [],
-                    "success": False,
-                    "error": None,
-                    "exchange_configs": exchange_configs,
-                    "exchange_results": []
-                }
-                
-                if not user_id or not pass_token:
-                    error_msg = f"⚠️ 账号 '{us}' 未登录或配置不完整，跳过执行"
-                    result_obj["error"] = error_msg
-                    result_obj["logs"].append(error_msg)
-                    
-                    # 添加到结果列表
-                    self.task_results.append(result_obj)
-                    
-                    # 显示在结果页面
-                    async def add_no_login_result():
-                        self.add_result(f"⚠️ 账号 '{us}' 任务执行情况", is_summary=True)
-                    
-                    self.page.run_task(add_no_login_result)
-                    failed_accounts += 1
-                    continue
-                
-                try:
-                    # 从main.py集成的真实任务执行逻辑
-                    # 1. 记录开始执行
-                    result_obj["logs"].append(f"✅ 账号 '{us}' 任务执行开始")
-                    result_obj["logs"].append(f"用户ID: {user_id}")
-                    result_obj["logs"].append(f"执行时间: {result_obj['start_time']}")
-                    result_obj["logs"].append("开始执行任务...")
-                    
-                    # 2. 获取会话Cookie
-                    result_obj["logs"].append("1. 获取会话Cookie...")
-                    
-                    # 使用passToken获取会话Cookie
-                    session_cookies = self.get_session_cookies(pass_token, user_id)
-                    if not session_cookies:
-                        error_msg = "获取会话Cookie失败，请重新登录"
-                        result_obj["error"] = error_msg
-                        result_obj["logs"].append(f"❌ {error_msg}")
-                        failed_accounts += 1
-                    else:
-                        result_obj["logs"].append("✅ 会话Cookie获取成功")
-                    
-                    if session_cookies:
-                        # 3. 创建API请求实例
-                        api_request = ApiRequest(session_cookies)
-                        rnl = RNL(api_request)
-                        
-                        # 4. 查询用户信息和记录
-                        result_obj["logs"].append("2. 查询用户信息和奖励记录...")
-                        if not rnl.query_user_info_and_records():
-                            error_msg = f"获取用户信息失败: {rnl.error_info}"
-                            result_obj["error"] = error_msg
-                            result_obj["logs"].append(f"❌ {error_msg}")
-                            failed_accounts += 1
-                        else:
-                            result_obj["logs"].append(f"✅ 当前可兑换视频天数: {rnl.total_days}")
-                            
-                            # 检查今天是否已经完成任务
-                            today_completed = False
-                            if rnl.today_records and len(rnl.today_records) > 0:
-                                today_completed = True
-                                result_obj["logs"].append(f"📅 检测到今日已有 {len(rnl.today_records)} 条奖励记录")
-                                for record in rnl.today_records:
-                                    record_time = record.get('createTime', '未知时间')
-                                    days = int(record.get('value', 0)) / 100
-                                    result_obj["logs"].append(f"   ⏰ {record_time} | 🎁 +{days:.2f}天")
-                            else:
-                                result_obj["logs"].append("📅 今日暂无奖励记录，准备执行任务")
-                            
-                            # 4. 先尝试完成新手任务
-                            result_obj["logs"].append("3. 尝试完成应用下载试用任务...")
-                            new_user_task_id = rnl.complete_new_user_task()
-                            if new_user_task_id:
-                                result_obj["logs"].append(f"✅ 完成应用下载试用成功，获得userTaskId: {new_user_task_id}")
-                                time.sleep(2)
-                                if rnl.receive_new_user_award(new_user_task_id):
-                                    result_obj["logs"].append("✅ 领取应用下载试用奖励成功")
-                                else:
-                                    error_msg = f"⚠️ 领取应用下载试用奖励失败"
-                                    if rnl.error_info:
-                                        error_msg += f": {rnl.error_info}"
-                                    result_obj["logs"].append(error_msg)
-                                time.sleep(2)
-                            else:
-                                result_obj["logs"].append("⚠️ 应用下载试用任务已完成或不可用")
-                            
-                            # 5. 执行两轮任务，与main.py保持一致的逻辑
-                            success = True
-                            
-                            # 如果今天已经完成任务，直接跳过浏览任务
-                            if today_completed:
-                                result_obj["logs"].append("\n✅ 今天已经完成所有任务，跳过浏览任务执行")
-                            else:
-                                for round_num in range(2):
-                                    result_obj["logs"].append(f"\n--- 开始第 {round_num + 1} 轮任务 ---")
-                                    tasks = rnl.get_task_list()
-                                    
-                                    if not tasks:
-                                        result_obj["logs"].append("⚠️ 未找到可执行的任务列表，可能今日任务已完成")
-                                        break
-                                    
-                                    task = tasks[0]
-                                    try:
-                                        rnl.t_id = task['generalActivityUrlInfo']['id']
-                                    except (KeyError, TypeError):
-                                        pass
-                                    
-                                    if not rnl.t_id:
-                                        result_obj["logs"].append("❌ 无法获取任务t_id，中断执行")
-                                        success = False
-                                        break
-                                    
-                                    task_id = task['taskId']
-                                    task_code = task['taskCode']
-                                    brows_click_url_id = task['generalActivityUrlInfo']['browsClickUrlId']
-                                    
-                                    result_obj["logs"].append("4. 执行浏览任务...")
-                                    result_obj["logs"].append(f"等待随机延迟...")
-                                    delay = random.randint(10, 15)
-                                    result_obj["logs"].append(f"等待 {delay} 秒...")
-                                    time.sleep(delay)
-                                    
-                                    user_task_id = rnl.complete_task(
-                                        task_id=task_id,
-                                        t_id=rnl.t_id,
-                                        brows_click_url_id=brows_click_url_id
-                                    )
-                                    
-                                    time.sleep(random.randint(2, 4))
-                                    
-                                    if not user_task_id:
-                                        result_obj["logs"].append("⚠️ 任务完成接口返回为空，尝试从获取任务接口重试...")
-                                        time.sleep(random.randint(2, 4))
-                                        user_task_id = rnl.get_task(task_code=task_code)
-                                    
-                                    if user_task_id:
-                                        result_obj["logs"].append("5. 领取奖励...")
-                                        time.sleep(random.randint(2, 4))
-                                        rnl.receive_award(user_task_id=user_task_id)
-                                        if rnl.error_info:
-                                            result_obj["logs"].append(f"⚠️ 领取奖励时可能出现问题: {rnl.error_info}")
-                                        else:
-                                            result_obj["logs"].append("✅ 奖励领取成功")
-                                    else:
-                                        result_obj["logs"].append("❌ 未能获取user_task_id，无法领取本轮奖励")
-                                    
-                                    time.sleep(random.randint(2, 4))
-                            
-                            if success:
-                                result_obj["logs"].append("\n6. 刷新最终数据...")
-                                rnl.query_user_info_and_records()
-                                result_obj["logs"].append(f"✅ 任务执行完成！最终可兑换视频天数: {rnl.total_days}")
-                                
-                                # 添加今日记录到日志
-                                if rnl.today_records:
-                                    result_obj["logs"].append("\n📅 今日新增奖励记录:")
-                                    for record in rnl.today_records:
-                                        record_time = record.get("createTime", "未知时间")
-                                        value = record.get("value", 0)
-                                        days = int(value) / 100
-                                        result_obj["logs"].append(f"| ⏰ {record_time}")
-                                        result_obj["logs"].append(f"| 🎁 领到视频会员，+{days:.2f}天")
-                                else:
-                                    result_obj["logs"].append("\n📅 今日暂无新增奖励记录")
-                                
-                                # 执行会员自动兑换
-                                if exchange_configs:
-                                    result_obj["logs"].append(f"\n7. 执行会员自动兑换 ({len(exchange_configs)}个配置)...")
-                                    try:
-                                        exchange_results = rnl.auto_exchange_memberships(exchange_configs)
-                                        result_obj["exchange_results"] = exchange_results
-                                        
-                                        success_count = sum(1 for r in exchange_results if r['success'])
-                                        failed_count = len(exchange_results) - success_count
-                                        result_obj["logs"].append(f"📺 兑换结果: 成功{success_count}个, 失败{failed_count}个")
-                                        
-                                        for ex_result in exchange_results:
-                                            if ex_result['success']:
-                                                result_obj["logs"].append(f"✅ {ex_result['type']} -> {ex_result['phone']}: {ex_result['message']}")
-                                            else:
-                                                result_obj["logs"].append(f"❌ {ex_result['type']} -> {ex_result['phone']}: {ex_result['message']}")
-                                    except Exception as ex_error:
-                                        result_obj["logs"].append(f"❌ 会员兑换执行异常: {ex_error}")
-                                else:
-                                    result_obj["logs"].append("\n7. 未配置会员兑换，跳过")
-                                
-                                result_obj["success"] = True
-                                successful_accounts += 1
-                            else:
-                                result_obj["error"] = "任务执行失败"
-                                failed_accounts += 1
-                    
-                except Exception as ex:
-                    error_msg = f"执行任务时发生异常: {str(ex)}"
-                    result_obj["error"] = error_msg
-                    result_obj["logs"].append(f"❌ {error_msg}")
-                    failed_accounts += 1
-                    
-                finally:
-                    # 记录结束时间
-                    result_obj["end_time"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    result_obj["logs"].append(f"\n任务执行结束时间: {result_obj['end_time']}")
-                    
-                    # 缓存执行记录到本地
-                    self.save_task_log(result_obj)
-                    
-                    # 添加到结果列表
-                    self.task_results.append(result_obj)
-                    
-                    # 显示在结果页面（只显示摘要，点击查看详情）
-                    summary_text = f"✅ 账号 '{us}' 任务执行成功" if result_obj["success"] else f"❌ 账号 '{us}' 任务执行失败"
-                    async def add_result_summary():
-                        self.add_result(summary_text, is_success=result_obj["success"], result_index=len(self.task_results)-1)
-                    
-                    self.page.run_task(add_result_summary)
-                    
-                    # 模拟网络延迟，与main.py保持一致
-                    time.sleep(random.randint(0, 5))
+                return result
+
+            def run_until_outage(data):
+                # 已取消或接口故障超过预算后不再启动剩余账号
+                if token.cancelled:
+                    return None
+                if API_BREAKER.outage_seconds() >= OUTAGE_BUDGET_SECONDS:
+                    stop_event.set()
+                    return None
+                return run_with_progress(data)
+
+            jobs = [
+                (f"{index}:{acc.get('data', {}).get('us', '')}",
+                 lambda data=acc.get("data", {}): run_until_outage(data))
+                for index, acc in enumerate(accounts)
+            ]
+            window = STAGGER_SECONDS_PER_ACCOUNT * total_accounts
+            try:
+                results = run_staggered(jobs, window, max_workers=MAX_WORKERS, stop_event=stop_event)
+            finally:
+                progress_bus.unsubscribe(board)
+                run_finished.set()
+            successful_accounts = sum(
+                1 for result in results.values() if isinstance(result, AccountRunResult) and result.success
+            )
+            failed_accounts = total_accounts - successful_accounts
+            session_failures = [
+                (result.us, result.session_error) for result in results.values()
+                if isinstance(result, AccountRunResult) and result.session_error is not None
+            ]
             
             # 完成任务后的更新
             final_status = f"所有任务执行完成 - 成功: {successful_accounts}, 失败: {failed_accounts}"
+            if token.cancelled:
+                not_started = sum(1 for key, _ in jobs if results.get(key) is None)
+                final_status = f"任务已取消 - 成功: {successful_accounts}, 失败或中止: {failed_accounts - not_started}, 未执行: {not_started}"
+            elif stop_event.is_set():
+                final_status += f"（接口故障超过 {OUTAGE_BUDGET_SECONDS} 秒，部分账号未执行）"
+            failure_summary = format_failure_summary(session_failures)
             
             async def update_status_completed():
                 self.status_text.value = final_status
                 self.run_all_button.disabled = False
+                self.set_run_controls(running=False)
                 # 添加总结果摘要
                 self.add_result(final_status, is_summary=True)
+                if failure_summary:
+                    self.add_result(failure_summary, is_success=False, is_summary=True)
                 # 自动切换到运行结果标签页
-                self.tabs.selected_index = 3
-                self.page_content.content = self.result_page
-                self.page.update()
+                self.show_tab(TAB_RESULT)
 
             self.page.run_task(update_status_completed)
         
         # 启动任务线程
         threading.Thread(target=run_task_thread, daemon=True).start()
         
-    def get_session_cookies(self, pass_token: str, user_id: str) -> Optional[str]:
-        """使用长效凭证获取用于访问任务API的临时会话Cookie"""
-        login_url = (
-            'https://account.xiaomi.com/pass/serviceLogin?callback=https%3A%2F%2Fapi.jr.airstarfinance.net%2Fsts'
-            '%3Fsign%3D1dbHuyAmee0NAZ2xsRw5vhdVQQ8%253D%26followup%3Dhttps%253A%252F%252Fm.jr.airstarfinance.net'
-            '%252Fmp%252Fapi%252Flogin%253Ffrom%253Dmipay_indexicon_TVcard%2526deepLinkEnable%253Dfalse'
-            '%2526requestUrl%253Dhttps%25253A%25252F%25252Fm.jr.airstarfinance.net%25252Fmp%25252Factivity'
-            '%25252FvideoActivity%25253Ffrom%25253Dmipay_indexicon_TVcard%252526_noDarkMode%25253Dtrue'
-            '%252526_transparentNaviBar%25253Dtrue%252526cUserId%25253Dusyxgr5xjumiQLUoAKTOgvi858Q'
-            '%252526_statusBarHeight%25253D137&sid=jrairstar&_group=DEFAULT&_snsNone=true&_loginType=ticket'
-        )
-        
-        headers = {
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0',
-            'cookie': f'passToken={pass_token}; userId={user_id};'
-        }
+    def set_run_controls(self, running: bool):
+        """一键运行开始/结束时切换暂停、取消按钮（需在页面线程中调用）"""
+        self.pause_button.disabled = not running
+        self.cancel_button.disabled = not running
+        self.pause_button.text = "暂停"
+        self.pause_button.icon = ft.Icons.PAUSE_CIRCLE
+        if not running:
+            self.run_token = None
+
+    def toggle_pause(self, e):
+        """暂停或继续当前运行：暂停后各账号停在当前步骤，继续时从该步骤接着执行"""
+        token = self.run_token
+        if token is None or token.cancelled:
+            return
+        if token.paused:
+            token.resume()
+            self.pause_button.text = "暂停"
+            self.pause_button.icon = ft.Icons.PAUSE_CIRCLE
+            self.status_text.value = "▶️ 已继续执行任务..."
+        else:
+            token.pause()
+            self.pause_button.text = "继续"
+            self.pause_button.icon = ft.Icons.PLAY_CIRCLE
+            self.status_text.value = "⏸️ 已暂停：正在进行的请求完成后停在当前步骤，点击继续从该步骤接着执行"
+        self.page.update()
+
+    def cancel_run(self, e):
+        """取消当前运行：不再启动剩余账号，进行中的账号在下一个请求或等待处中止"""
+        token = self.run_token
+        if token is None or token.cancelled:
+            return
+        token.cancel()
+        self.pause_button.disabled = True
+        self.cancel_button.disabled = True
+        self.status_text.value = "⏹️ 正在取消，等待进行中的请求结束..."
+        self.page.update()
+
+    def run_account_task(self, data: Dict[str, Any], token: Optional[CancelToken] = None) -> AccountRunResult:
+        """
+        执行单个账号的全部任务，返回执行结果对象（可在工作线程中并发调用）。
+        token 为一键运行的取消/暂停令牌，暂停时停在当前步骤，取消时在下一个请求或等待处中止。
+        """
+        token = token or CancelToken()
+        us = data.get("us", "未知账号")
+        user_id = data.get("userId")
+        pass_token = data.get("passToken")
+        exchange_configs = data.get("exchange_configs", [])  # 获取会员兑换配置
+        
+        # 创建任务执行结果对象
+        result = AccountRunResult(us=us, user_id=user_id, exchange_configs=exchange_configs)
+        
+        if not user_id or not pass_token:
+            error_msg = f"⚠️ 账号 '{us}' 未登录或配置不完整，跳过执行"
+            result.error = error_msg
+            result.log(error_msg)
+            
+            # 显示在结果页面
+            async def add_no_login_result():
+                self.add_result(f"⚠️ 账号 '{us}' 任务执行情况", is_summary=True)
+            
+            self.page.run_task(add_no_login_result)
+            return result
         
-        session = requests.Session()
+        self.running_results[us] = result
+        # 进度网格的步骤事件：进入下一步时结束上一步
+        current_step = [None]
+
+        def step(name):
+            """name 为 None 时只结束上一步，工作流执行期间的步骤事件由 WorkflowExecutor 发布"""
+            if current_step[0]:
+                progress_bus.publish(STEP_FINISHED, step=current_step[0], ok=True)
+            current_step[0] = name
+            if name:
+                progress_bus.publish(STEP_STARTED, step=name)
+
+        progress_bus.publish(ACCOUNT_STARTED)
         try:
-            session.get(url=login_url, headers=headers, verify=False, timeout=10)
-            cookies = session.cookies.get_dict()
+            # 从main.py集成的真实任务执行逻辑
+            # 1. 记录开始执行
+            result.log("✅ 账号 '{}' 任务执行开始", us)
+            result.log("用户ID: {}", user_id)
+            result.log("执行时间: {}", result.start_time)
+            result.log("开始执行任务...")
             
-            c_user_id = cookies.get('cUserId')
-            service_token = cookies.get('serviceToken')
+            # 2. 获取会话Cookie
+            result.log("1. 获取会话Cookie...")
+            step("获取会话")
             
-            if c_user_id and service_token:
-                return f"cUserId={c_user_id}; jrairstar_serviceToken={service_token}"
+            # 使用passToken获取会话Cookie，失败时不再调用任何接口
+            try:
+                token.checkpoint()
+                # 接口熔断期间不再获取会话
+                API_BREAKER.check()
+                account_session = open_session(pass_token, user_id)
+            except CircuitOpenError as circuit_error:
+                account_session = None
+                result.error = str(circuit_error)
+                result.log("❌ {}", circuit_error)
+            except SessionError as session_error:
+                account_session = None
+                result.error = str(session_error)
+                result.session_error = session_error
+                result.log("❌ {}", session_error)
+            else:
+                result.log("✅ 会话Cookie获取成功")
             
-            return None
-        except requests.RequestException:
-            return None
+            if account_session:
+                # 3. 创建API请求实例
+                api_request = ApiRequest(account_session.cookie_header, token)
+                rnl = RNL(api_request, us)
+                
+                # 4. 按 workflow.rnl_steps 执行任务，与main.py共用同一工作流；
+                # 当天已完成的步骤不再重复执行，失败的步骤由事件日志写入执行日志
+                result.log("2. 执行每日任务...")
+                step(None)
+
+                def on_step(wf_step, outcome):
+                    if outcome.resumed:
+                        result.log("⏭️ {}：今日已完成，跳过", wf_step.title)
+                    elif outcome.status == STEP_DONE:
+                        result.log("✅ {}（{:.1f} 秒）", wf_step.title, outcome.elapsed_ms / 1000)
+                    elif outcome.status != STEP_FAILED:
+                        result.log("⏭️ {}：{}", wf_step.title, STEP_STATUS_LABELS[outcome.status])
+                    if wf_step.name == 'query' and outcome.status == STEP_DONE:
+                        result.log("当前可兑换视频天数: {}", rnl.total_days)
+                        if rnl.today_records:
+                            result.log("📅 检测到今日已有 {} 条奖励记录", len(rnl.today_records))
+                            for record in rnl.today_records:
+                                result.log("   ⏰ {} | 🎁 +{:.2f}天", record.create_time, record.days)
+
+                success = WorkflowExecutor(rnl_steps(), rnl, rnl._pause, us=us, listener=on_step).run()
+
+                if success:
+                    result.log("✅ 任务执行完成！最终可兑换视频天数: {}", rnl.total_days)
+                    result.total_days = rnl.total_days_num
+                    result.today_records = rnl.today_records
+                    
+                    # 添加今日记录到日志
+                    if rnl.today_records:
+                        result.log("\n📅 今日新增奖励记录:")
+                        for record in rnl.today_records:
+                            result.log("| ⏰ {}", record.create_time)
+                            result.log("| 🎁 领到视频会员，+{:.2f}天", record.days)
+                    else:
+                        result.log("\n📅 今日暂无新增奖励记录")
+                    
+                    # 执行会员自动兑换
+                    if exchange_configs:
+                        result.log("\n3. 执行会员自动兑换 ({}个配置)...", len(exchange_configs))
+                        step("会员兑换")
+                        try:
+                            exchange_results = rnl.auto_exchange_memberships(exchange_configs)
+                            result.exchange_results = exchange_results
+                            
+                            success_count = sum(1 for r in exchange_results if r.success)
+                            failed_count = len(exchange_results) - success_count
+                            result.log("📺 兑换结果: 成功{}个, 失败{}个", success_count, failed_count)
+                            
+                            for ex_result in exchange_results:
+                                result.log("{}", ex_result.describe())
+                        except Exception as ex_error:
+                            result.log("❌ 会员兑换执行异常: {}", ex_error)
+                    else:
+                        result.log("\n3. 未配置会员兑换，跳过")
+                    
+                    result.success = True
+                else:
+                    result.error = f"任务执行失败: {rnl.error_info}" if rnl.error_info else "任务执行失败"
+            
+        except CircuitOpenError as ex:
+            result.error = str(ex)
+            result.log("❌ 已中止：{}", ex)
+            
+        except Cancelled as ex:
+            result.error = str(ex)
+            result.log("⏹️ {}", ex)
+            
+        except Exception as ex:
+            error_msg = f"执行任务时发生异常: {str(ex)}"
+            result.error = error_msg
+            result.log("❌ {}", error_msg)
+            
+        finally:
+            if token.cancelled and not result.success:
+                # 取消发生在会员兑换等未检查令牌的环节时，同样记为取消
+                result.error = "执行已取消"
+            if current_step[0]:
+                progress_bus.publish(STEP_FINISHED, step=current_step[0], ok=result.success)
+            progress_bus.publish(ACCOUNT_FINISHED, success=result.success, error=result.error)
+            # 等请求层的事件写入执行日志后再结束记录
+            event_log.flush(timeout=1.0)
+            self.running_results.pop(us, None)
+            # 记录结束时间
+            result.finish()
+            result.log("\n任务执行结束时间: {}", result.end_time)
+            
+            # 缓存执行记录到本地，未能保存时只在内存缓存中保留，被淘汰后无法再查看详情
+            run_id = self.save_task_log(result) or f"未保存:{us}:{result.start_time}"
+            self.run_cache.put(run_id, result)
+            
+            # 显示在结果页面（只显示摘要，点击查看详情）
+            summary_text = f"✅ 账号 '{us}' 任务执行成功" if result.success else f"❌ 账号 '{us}' 任务执行失败"
+            async def add_result_summary():
+                self.add_result(summary_text, is_success=result.success, run_id=run_id)
+            
+            self.page.run_task(add_result_summary)
+        
+        return result
 
 def main(page: ft.Page):
     XiaomiWalletGUI(page)
@@ -3,14 +3,16 @@
 # 用法: python3 login.py <账号别名>
 # 例如: python3 login.py my_account_1
 
-import requests
 import time
 import json
 import os
 import sys
-import qrcode  # 导入 qrcode 库
 from typing import List, Dict
 
+import codec
+
+# requests 和 qrcode 在实际登录时才导入，避免命令行启动时加载网络库
+
 CONFIG_PATH = "xiaomiconfig.json"
 
 class XiaomiAccount:
@@ -80,7 +82,7 @@ class XiaomiAccount:
             
         try:
             with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                json.dump(accounts, f, indent=4, ensure_ascii=False)
+                f.write(codec.dumps_pretty(accounts))
             print(f"✅ 账号 '{self.us}' 数据已成功保存至 {CONFIG_PATH}！")
             return True
         except Exception as e:
@@ -109,6 +111,7 @@ class XiaomiAccount:
         }
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"}
         
+        import requests
         try:
             response = requests.get(url, headers=headers, params=querystring, timeout=10)
             response.raise_for_status()
@@ -129,6 +132,7 @@ class XiaomiAccount:
             print("❌ 未能从响应中获取二维码URL。")
             return
             
+        import qrcode  # 导入 qrcode 库
         print("📱 请使用小米手机APP扫描下方二维码登录：")
         qr = qrcode.QRCode(border=1)
         qr.add_data(qr_url)
@@ -156,6 +160,7 @@ class XiaomiAccount:
         start_time = time.time()
         end_time = start_time + timeout
         
+        import requests
         status_messages = { 700: "等待扫码", 701: "已扫码, 请在手机上确认", 702: "二维码已过期", 0: "登录成功" }
         last_status_msg = ""
 
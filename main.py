@@ -16,19 +16,40 @@
 5. （可选）如果配置了飞书 Webhook，则发送执行结果通知。
 """
 
+import argparse
 import json
 import os
-import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
-
-import requests
-import urllib3
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import codec
+from activities import DEFAULT_ACTIVITY, Activity, resolve_activities
+from breaker import CircuitBreaker, CircuitOpenError
+from endpoints import (
+    API_HOST, COMPLETE_NEW_USER_TASK, COMPLETE_TASK, CONVERT_GOLD_RICH, CONVERT_GOLD_RICH_FORM, GET_PRIZE_STATUS, GET_TASK,
+    GET_TASK_LIST, LUCK_DRAW_NEW_USER, QUERY_USER_GOLD_RICH_SUM, QUERY_USER_JOIN_LIST, Endpoint,
+)
+from eventlog import WARNING, JsonlSink, bind_account, console_sink, event_log
+from planner import AccountPlan, build_plan, estimate_makespan, failed_plan, format_summary
+from records import PREDEFINED_MEMBERSHIPS, AccountRunResult, ExchangeResult, Membership, TaskRecord
+from result_store import append_records, latest_runs, load_records_since, record_watermark, save_run, succeeded_on
+from scheduler import run_staggered
+from session import INCOMPLETE, AccountSession, SessionError, format_failure_summary, login
+from workflow import WorkflowExecutor, rnl_steps
 
 # --- 全局常量 ---
 CONFIG_FILE = "xiaomiconfig.json"
-API_HOST = "m.jr.airstarfinance.net"
+# 多账号错峰执行：默认窗口长度按每个账号 15 秒计算，同时最多并发的账号数
+STAGGER_SECONDS_PER_ACCOUNT = 15
+MAX_WORKERS = 4
+# 奖励记录每页条数，以及首次同步时最多翻的页数
+RECORD_PAGE_SIZE = 20
+RECORD_MAX_PAGES = 50
+# 接口故障持续超过该秒数后不再启动剩余账号
+OUTAGE_BUDGET_SECONDS = 60
 
 # 任务接口使用的移动端 User-Agent
 USER_AGENT_MOBILE = (
@@ -43,34 +64,50 @@ USER_AGENT_DESKTOP = (
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36 Edg/139.0.0.0'
 )
 
-
-# 禁用 HTTPS InsecureRequestWarning
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# 延迟导入的 requests 模块，见 load_requests()
+_requests_module = None
+# 所有账号共用的任务接口熔断器，见 breaker.py
+API_BREAKER = CircuitBreaker()
 
 
 # --- 辅助功能模块 ---
 
+def load_requests():
+    """
+    按需导入 requests，并在首次导入时禁用 HTTPS InsecureRequestWarning。
+    网络库只在真正发起请求时才加载，不联网的命令无需承担其导入开销。
+    """
+    global _requests_module
+    if _requests_module is None:
+        import requests
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _requests_module = requests
+    return _requests_module
+
+
 def send_feishu_notification(webhook_url: str, message: str) -> None:
     """通过指定的飞书 Webhook URL 发送文本消息。"""
     if not webhook_url:
         return
 
+    requests = load_requests()
     headers = {'Content-Type': 'application/json'}
     payload = {"msg_type": "text", "content": {"text": message}}
 
     try:
         response = requests.post(webhook_url, json=payload, headers=headers, timeout=10)
         response.raise_for_status()
-        response_json = response.json()
+        response_json = codec.response_json(response)
         if response_json.get("StatusCode") == 0:
-            print("  ✅ 飞书通知已成功发送。")
+            event_log.info('feishu.send', "  ✅ 飞书通知已成功发送。")
         else:
             error_msg = response_json.get('StatusMessage', '未知错误')
-            print(f"  ⚠️ 飞书通知发送失败，响应: {error_msg}")
+            event_log.warning('feishu.send', "  ⚠️ 飞书通知发送失败，响应: {}", error_msg)
     except requests.RequestException as e:
-        print(f"  ❌ 发送飞书通知时发生网络错误: {e}")
+        event_log.error('feishu.send', "  ❌ 发送飞书通知时发生网络错误: {}", e)
     except Exception as e:
-        print(f"  ❌ 发送飞书通知时发生未知错误: {e}")
+        event_log.error('feishu.send', "  ❌ 发送飞书通知时发生未知错误: {}", e)
 
 
 def generate_notification(account_id: str, rnl_instance: 'RNL', us: str) -> str:
@@ -89,10 +126,7 @@ def generate_notification(account_id: str, rnl_instance: 'RNL', us: str) -> str:
         msg += "\n  今日暂无新增奖励记录"
     else:
         for record in rnl_instance.today_records:
-            record_time = record.get("createTime", "未知时间")
-            value = record.get("value", 0)
-            days = int(value) / 100
-            msg += f"\n| ⏰ {record_time}\n| 🎁 领到视频会员，+{days:.2f}天"
+            msg += f"\n| ⏰ {record.create_time}\n| 🎁 领到视频会员，+{record.days:.2f}天"
 
     if rnl_instance.error_info:
         msg += f"\n\n⚠️ 执行异常：{rnl_instance.error_info}"
@@ -100,7 +134,7 @@ def generate_notification(account_id: str, rnl_instance: 'RNL', us: str) -> str:
     msg += "\n" + "=" * 25
     return msg
 
-def generate_notification_with_exchange(account_id: str, rnl_instance: 'RNL', us: str, exchange_results: List[Dict[str, Any]]) -> str:
+def generate_notification_with_exchange(account_id: str, rnl_instance: 'RNL', us: str, exchange_results: List[ExchangeResult]) -> str:
     """根据任务执行结果和兑换结果生成格式化的日志/通知消息。"""
     current_date = datetime.now().strftime("%Y-%m-%d")
     msg = (
@@ -116,26 +150,23 @@ def generate_notification_with_exchange(account_id: str, rnl_instance: 'RNL', us
         msg += "\n  今日暂无新增奖励记录"
     else:
         for record in rnl_instance.today_records:
-            record_time = record.get("createTime", "未知时间")
-            value = record.get("value", 0)
-            days = int(value) / 100
-            msg += f"\n| ⏰ {record_time}\n| 🎁 领到视频会员，+{days:.2f}天"
+            msg += f"\n| ⏰ {record.create_time}\n| 🎁 领到视频会员，+{record.days:.2f}天"
 
     # 添加会员兑换结果
     if exchange_results:
         msg += "\n\n📺 会员兑换结果\n" + "-" * 25
-        success_count = sum(1 for r in exchange_results if r['success'])
+        success_count = sum(1 for r in exchange_results if r.success)
         failed_count = len(exchange_results) - success_count
         
         msg += f"\n✅ 成功：{success_count}个  ❌ 失败：{failed_count}个"
         
         for result in exchange_results:
-            if result['success']:
-                msg += f"\n| ✅ {result['type']} -> {result['phone']}"
-                msg += f"\n| 💎 {result['message']}"
+            if result.success:
+                msg += f"\n| ✅ {result.type} -> {result.phone}"
+                msg += f"\n| 💎 {result.message}"
             else:
-                msg += f"\n| ❌ {result['type']} -> {result['phone']}"
-                msg += f"\n| ⚠️ {result['message']}"
+                msg += f"\n| ❌ {result.type} -> {result.phone}"
+                msg += f"\n| ⚠️ {result.message}"
     else:
         msg += "\n\n📺 会员兑换\n" + "-" * 25 + "\n  未配置会员兑换"
 
@@ -151,8 +182,10 @@ def generate_notification_with_exchange(account_id: str, rnl_instance: 'RNL', us
 class ApiRequest:
     """封装 API 请求，统一管理会话、Cookie 和请求头。"""
     def __init__(self, cookies: Union[str, Dict[str, str]]):
-        self.session = requests.Session()
+        self.session = load_requests().Session()
         self.base_headers = {'Host': API_HOST, 'User-Agent': USER_AGENT_MOBILE}
+        # 最近一次请求的网络异常，用于区分网络故障和接口拒绝
+        self.last_error: Optional[Exception] = None
         self.update_cookies(cookies)
 
     @staticmethod
@@ -171,19 +204,35 @@ class ApiRequest:
         self.session.cookies.update(dict_cookies)
         self.base_headers['Cookie'] = '; '.join([f"{k}={v}" for k, v in dict_cookies.items()])
 
-    def request(self, method: str, url: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """发送一个 HTTP 请求。"""
+    def request(self, method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        """发送一个 HTTP 请求，endpoint 为注册表中的接口名，用于日志。"""
+        requests = load_requests()
         headers = {**self.base_headers, **kwargs.pop('headers', {})}
+        started = time.perf_counter()
+        self.last_error = None
+        if not API_BREAKER.allow():
+            # 熔断期间不发出请求，也不等待超时
+            self.last_error = CircuitOpenError("接口熔断中，请求未发出")
+            event_log.debug('api.request', "  {} {} 已熔断，未发出", method.upper(), endpoint or url)
+            return None
         try:
             resp = self.session.request(method.upper(), url, verify=False, headers=headers, timeout=15, **kwargs)
+            event_log.debug('api.request', "  {} {} -> {}", method.upper(), endpoint or url, resp.status_code,
+                            endpoint=endpoint, status=resp.status_code,
+                            elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+            API_BREAKER.record(resp.status_code < 500)
             resp.raise_for_status()
-            return resp.json()
+            return codec.response_json(resp)
         except requests.exceptions.RequestException as e:
             # 这里的 error_info 是 RNL 类的属性，不应在此处设置
-            print(f"  [Request Error] {e}")
+            self.last_error = e
+            if e.response is None:
+                # 连接失败或超时
+                API_BREAKER.record(False)
+            event_log.warning('api.request', "  [Request Error] {}", e, url=url, method=method.upper())
             return None
         except (json.JSONDecodeError, AttributeError):
-            print(f"  [JSON Parse Error] 无法解析服务器响应: {getattr(resp, 'text', 'No Response Text')[:100]}")
+            event_log.warning('api.request', "  [JSON Parse Error] 无法解析服务器响应: {}", getattr(resp, 'text', 'No Response Text')[:100], url=url)
             return None
 
     def get(self, url: str, **kwargs) -> Optional[Dict[str, Any]]:
@@ -194,31 +243,85 @@ class ApiRequest:
         """发送 POST 请求。"""
         return self.request('POST', url, **kwargs)
 
+    def call(self, endpoint: Endpoint, **fields: Any) -> Optional[Dict[str, Any]]:
+        """调用注册表中的接口，fields 为本次调用的参数，见 endpoints.py。"""
+        url, kwargs = endpoint.prepare(**fields)
+        return self.request(endpoint.method, url, endpoint=endpoint.name, **kwargs)
+
+
+class RecordSyncError(Exception):
+    """奖励记录接口返回失败。"""
+
+
+def sync_task_records(api: ApiRequest, us: Optional[str]) -> List[TaskRecord]:
+    """
+    增量同步 queryUserJoinList 的奖励记录并返回今天的全部记录。
+
+    接口按时间倒序分页返回。以本地已保存的最新一条记录为水位线，从第一页开始翻页，
+    遇到比水位线更早的记录就停止，新记录追加到结果存储中。没有任何本地记录时最多翻
+    RECORD_MAX_PAGES 页补齐历史。us 为空时不读写本地存储，只取第一页。
+    """
+    watermark = record_watermark(us) if us else None
+    watermark_time, watermark_count = watermark or (None, 0)
+    max_pages = RECORD_MAX_PAGES if us else 1
+
+    new_records: List[TaskRecord] = []
+    seen_at_watermark = 0
+    for page in range(1, max_pages + 1):
+        record_res = api.call(QUERY_USER_JOIN_LIST, pageNum=page, pageSize=RECORD_PAGE_SIZE)
+        if not record_res or record_res.get('code') != 0:
+            raise RecordSyncError(f'查询任务完成记录失败：{record_res}')
+        items = record_res.get('value', {}).get('data', [])
+        reached_known = False
+        for item in items:
+            record = TaskRecord.from_api(item)
+            if watermark_time is not None:
+                if record.create_time < watermark_time:
+                    reached_known = True
+                    continue
+                # 与水位线同一时间的记录，前 watermark_count 条已经保存过
+                if record.create_time == watermark_time:
+                    seen_at_watermark += 1
+                    if seen_at_watermark <= watermark_count:
+                        reached_known = True
+                        continue
+            new_records.append(record)
+        if reached_known or len(items) < RECORD_PAGE_SIZE:
+            break
+    event_log.debug('rnl.sync_records', "  - 同步奖励记录：{} 页，新增 {} 条", page, len(new_records),
+                    pages=page, new_records=len(new_records))
+
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    if not us:
+        return [record for record in new_records if record.date == current_date]
+    append_records(us, new_records)
+    return load_records_since(us, current_date)
+
 
 class RNL:
     """
     封装小米钱包任务的具体业务逻辑。
     集成小米钱包3.0版本的新功能，包括新手任务和会员兑换。
     """
-    def __init__(self, api_request: ApiRequest):
+    def __init__(self, api_request: ApiRequest, us: Optional[str] = None, activity: Activity = DEFAULT_ACTIVITY):
         self.api = api_request
-        self.activity_code = '2211-videoWelfare'
+        # 账号别名，用于在本地结果存储中增量同步奖励记录
+        self.us = us
+        # 浏览任务所属的活动，见 activities.py
+        self.activity = activity
+        self._activity_rnls: Dict[str, 'RNL'] = {}
         self.t_id: Optional[str] = None
         self.total_days: str = "未知"
         self.total_days_num: float = 0.0  # 添加数值版本的天数
-        self.today_records: List[Dict[str, Any]] = []
+        self.today_records: List[TaskRecord] = []
         self.error_info: str = ""
 
     def get_task_list(self) -> Optional[List[Dict[str, Any]]]:
         """获取任务列表。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/getTaskList"
         try:
-            response = self.api.post(url, data={'activityCode': self.activity_code})
+            response = self.api.call(self.activity.endpoint(GET_TASK_LIST))
             if response and response.get('code') == 0:
-                target_tasks = [
-                    task for task in response['value']['taskInfoList']
-                    if '浏览组浏览任务' in task.get('taskName', '')
-                ]
+                target_tasks = [task for task in response['value']['taskInfoList'] if self.activity.matches(task)]
                 return target_tasks
             self.error_info = f"获取任务列表失败：{response}"
             return None
@@ -228,16 +331,9 @@ class RNL:
 
     def get_task(self, task_code: str) -> Optional[str]:
         """通过 taskCode 获取 userTaskId。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/getTask"
-        # ▼▼▼ 核心 Bug 修复：恢复 'jrairstar_ph' 魔法参数 ▼▼▼
-        data = {
-            'activityCode': self.activity_code,
-            'taskCode': task_code,
-            'jrairstar_ph': '98lj8puDf9Tu/WwcyMpVyQ=='
-        }
-        # ▲▲▲ 核心 Bug 修复 ▲▲▲
         try:
-            response = self.api.post(url, data=data)
+            # 固定参数 jrairstar_ph 见 endpoints.GET_TASK
+            response = self.api.call(self.activity.endpoint(GET_TASK), taskCode=task_code)
             if response and response.get('code') == 0:
                 return response['value']['taskInfo']['userTaskId']
             self.error_info = f'获取任务信息失败：{response}'
@@ -248,26 +344,8 @@ class RNL:
 
     def complete_task(self, task_id: str, t_id: str, brows_click_url_id: str) -> Optional[str]:
         """完成浏览任务。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/completeTask"
-        # ▼▼▼ 核心 Bug 修复：恢复所有必要的 URL 参数 ▼▼▼
-        params = {
-            'activityCode': self.activity_code,
-            'app': 'com.mipay.wallet',
-            'isNfcPhone': 'true',
-            'channel': 'mipay_indexicon_TVcard',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}',
-            'taskId': task_id,
-            'browsTaskId': t_id,
-            'browsClickUrlId': brows_click_url_id,
-            'clickEntryType': 'undefined',
-            'festivalStatus': '0'
-        }
-        # ▲▲▲ 核心 Bug 修复 ▲▲▲
         try:
-            response = self.api.get(url, params=params)
+            response = self.api.call(self.activity.endpoint(COMPLETE_TASK), taskId=task_id, browsTaskId=t_id, browsClickUrlId=brows_click_url_id)
             if response and response.get('code') == 0:
                 return response.get('value')
             self.error_info = f'完成任务失败：{response}'
@@ -276,211 +354,116 @@ class RNL:
             self.error_info = f'完成任务时发生异常：{e}'
             return None
 
-    def receive_award(self, user_task_id: str) -> None:
-        """领取奖励。"""
-        url = f"https://{API_HOST}/mp/api/generalActivity/luckDraw"
-        # 恢复所有必要的 URL 参数
-        params = {
-            'activityCode': self.activity_code,
-            'userTaskId': user_task_id,
-            'app': 'com.mipay.wallet',
-            'isNfcPhone': 'true',
-            'channel': 'mipay_indexicon_TVcard',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}',
-        }
+    def receive_award(self, user_task_id: str) -> bool:
+        """领取奖励，返回是否领取成功。"""
         try:
-            response = self.api.get(url, params=params)
-            if response and response.get('code') != 0:
-                self.error_info = f'领取奖励失败：{response}'
+            response = self.api.call(self.activity.award(), userTaskId=user_task_id)
+            if response and response.get('code') == 0:
+                return True
+            self.error_info = f'领取奖励失败：{response}'
+            return False
         except Exception as e:
             self.error_info = f'领取奖励时发生异常：{e}'
+            return False
 
     def complete_new_user_task(self) -> Optional[str]:
         """完成应用下载试用任务"""
         try:
-            headers = {
-                'Connection': 'keep-alive',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'X-Request-ID': '1281eea0-e268-4fcc-9a5f-7dc11475b7db',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-            
-            url = f'https://{API_HOST}/mp/api/generalActivity/completeTask?activityCode=2211-videoWelfare&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=KWkK5VsKXiIbAH8Rf6kgU6tpDPyNWgXY8YCM1mQtt5nd7i1%2F4BqzPq0uY7OlIEOd&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D&taskCode=NEW_USER_CAMPAIGN&browsTaskId=&browsClickUrlId=1306285&adInfoId=&triggerId='
-            
-            response = self.api.get(url, headers=headers)
+            response = self.api.call(COMPLETE_NEW_USER_TASK)
             if response and response.get('code') == 0:
-                print(f'  ✅ 完成应用下载试用成功，获得userTaskId: {response["value"]}')
+                event_log.info('rnl.complete_new_user_task', '  ✅ 完成应用下载试用成功，获得userTaskId: {}', response["value"])
                 return response['value']
             elif response and response.get('code') != 0:
-                print(f'  ⚠️ 完成应用下载试用失败：{response}')
+                event_log.warning('rnl.complete_new_user_task', '  ⚠️ 完成应用下载试用失败：{}', response)
                 return None
             else:
-                print(f'  ⚠️ 完成应用下载试用失败：网络请求异常')
+                event_log.warning('rnl.complete_new_user_task', '  ⚠️ 完成应用下载试用失败：网络请求异常')
                 return None
         except Exception as e:
-            print(f'  ❌ 完成应用下载试用失败：{e}')
+            event_log.error('rnl.complete_new_user_task', '  ❌ 完成应用下载试用失败：{}', e)
             return None
 
     def receive_new_user_award(self, user_task_id: str) -> bool:
         """领取应用下载试用奖励"""
         try:
             # 发送领取请求前延时5秒
-            print("  - 等待5秒后领取奖励...")
-            time.sleep(5)
-            
-            headers = {
-                'Connection': 'keep-alive',
-                'sec-ch-ua': '"Chromium";v="118", "Android WebView";v="118", "Not=A?Brand";v="99"',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'sec-ch-ua-mobile': '?1',
-                'X-Request-ID': 'c09abfa7-6ea4-4435-a741-dff3622215cf',
-                'sec-ch-ua-platform': '"Android"',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
+            event_log.info('rnl.receive_new_user_award', "  - 等待5秒后领取奖励...")
+            self._pause(5)
             
-            url = f'https://{API_HOST}/mp/api/generalActivity/luckDraw?imei=&device=alioth&appLimit=%7B%22com.qiyi.video%22:false,%22com.youku.phone%22:false,%22com.tencent.qqlive%22:false,%22com.hunantv.imgo.activity%22:false,%22com.cmcc.cmvideo%22:false,%22com.sankuai.meituan%22:false,%22com.anjuke.android.app%22:false,%22com.tal.abctimelibrary%22:false,%22com.lianjia.beike%22:false,%22com.kmxs.reader%22:false,%22com.jd.jrapp%22:false,%22com.smile.gifmaker%22:true,%22com.kuaishou.nebula%22:false%7D&activityCode=2211-videoWelfare&userTaskId={user_task_id}&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=L522i5qLZR9%2Bs25kEqPBJYbbHqUS4LrpuTsgl9kdsbcyU7tjWmx1BewlRNSSZaOT&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D'
-            
-            response = self.api.get(url, headers=headers)
+            response = self.api.call(LUCK_DRAW_NEW_USER, userTaskId=user_task_id)
             if response and response.get('code') == 0:
                 prize_info = response['value']['prizeInfo']
-                print(f'  ✅ 领取应用下载试用奖励成功：获得{prize_info["amount"]} {prize_info["prizeDesc"]}')
+                event_log.info('rnl.receive_new_user_award', '  ✅ 领取应用下载试用奖励成功：获得{} {}', prize_info["amount"], prize_info["prizeDesc"])
                 return True
             elif response and response.get('code') != 0:
-                print(f'  ⚠️ 领取应用下载试用奖励失败：{response}')
+                event_log.warning('rnl.receive_new_user_award', '  ⚠️ 领取应用下载试用奖励失败：{}', response)
                 return False
             else:
-                print(f'  ❌ 领取应用下载试用奖励失败：网络请求异常')
+                event_log.error('rnl.receive_new_user_award', '  ❌ 领取应用下载试用奖励失败：网络请求异常')
                 return False
         except Exception as e:
-            print(f'  ❌ 领取应用下载试用奖励失败：{e}')
+            event_log.error('rnl.receive_new_user_award', '  ❌ 领取应用下载试用奖励失败：{}', e)
             return False
 
-    def query_user_info_and_records(self) -> bool:
-        """查询用户总奖励和今日记录。"""
-        base_url = f"https://{API_HOST}/mp/api/generalActivity/"
-        params = {
-            'activityCode': self.activity_code,
-            'app': 'com.mipay.wallet',
-            'deviceType': '2',
-            'system': '1',
-            'visitEnvironment': '2',
-            'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
-        }
+    @staticmethod
+    def _pause(seconds: float) -> None:
+        """工作流中的固定等待；接口熔断时抛出 CircuitOpenError 立即中止，不再等待。"""
+        API_BREAKER.check()
+        time.sleep(seconds)
+
+    def query_total_days(self) -> bool:
+        """仅查询用户当前可兑换的视频天数，可用作会话有效性的低成本探测。"""
         try:
-            total_res = self.api.get(f"{base_url}queryUserGoldRichSum", params=params)
+            total_res = self.api.call(QUERY_USER_GOLD_RICH_SUM)
             if not total_res or total_res.get('code') != 0:
                 self.error_info = f'获取兑换视频天数失败：{total_res}'
                 return False
             self.total_days_num = int(total_res.get('value', 0)) / 100  # 添加数值版本
             self.total_days = f"{self.total_days_num:.2f}天"
-
-            record_params = {**params, 'pageNum': 1, 'pageSize': 20}
-            record_res = self.api.get(f"{base_url}queryUserJoinList", params=record_params)
-            if not record_res or record_res.get('code') != 0:
-                self.error_info = f'查询任务完成记录失败：{record_res}'
-                return False
-
-            self.today_records = []
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            for item in record_res.get('value', {}).get('data', []):
-                if item.get('createTime', '').startswith(current_date):
-                    self.today_records.append(item)
             return True
         except Exception as e:
-            self.error_info = f'获取任务记录时发生异常：{e}'
+            self.error_info = f'获取兑换视频天数时发生异常：{e}'
             return False
 
-    def run_main_workflow(self) -> bool:
-        """执行任务的主流程，集成小米钱包3.0版本的新功能。"""
-        if not self.query_user_info_and_records():
+    def query_user_info_and_records(self) -> bool:
+        """查询用户总奖励和今日记录。"""
+        if not self.query_total_days():
+            return False
+        try:
+            self.today_records = sync_task_records(self.api, self.us)
+            return True
+        except RecordSyncError as e:
+            self.error_info = str(e)
+            return False
+        except Exception as e:
+            self.error_info = f'获取任务记录时发生异常：{e}'
             return False
-        
-        # 先尝试完成新手任务
-        print("  - 尝试完成应用下载试用任务...")
-        new_user_task_id = self.complete_new_user_task()
-        if new_user_task_id:
-            time.sleep(2)
-            self.receive_new_user_award(new_user_task_id)
-            time.sleep(2)
-        else:
-            print("  - 应用下载试用任务已完成或不可用。")
-        
-        # 原有的浏览任务逻辑
-        for i in range(2):
-            print(f"  - 开始第 {i + 1} 轮浏览任务...")
-            tasks = self.get_task_list()
-            if not tasks:
-                print("  - 未找到可执行的任务列表，可能今日任务已完成。")
-                break
-            
-            task = tasks[0]
-            try:
-                self.t_id = task['generalActivityUrlInfo']['id']
-            except (KeyError, TypeError):
-                pass
-            
-            if not self.t_id:
-                print("  - 无法获取任务 t_id，中断执行。")
-                return False
-
-            task_id = task['taskId']
-            task_code = task['taskCode']
-            brows_click_url_id_from_api = task['generalActivityUrlInfo']['browsClickUrlId']
-
-            time.sleep(random.randint(10, 15))
-
-            user_task_id = self.complete_task(
-                task_id=task_id,
-                t_id=self.t_id,
-                brows_click_url_id=brows_click_url_id_from_api
-            )
-
-            time.sleep(random.randint(2, 4))
-
-            if not user_task_id:
-                user_task_id = self.get_task(task_code=task_code)
-                time.sleep(random.randint(2, 4))
-            
-            if user_task_id:
-                self.receive_award(user_task_id=user_task_id)
-            else:
-                print("  - 未能获取 user_task_id，无法领取本轮奖励。")
-
-            time.sleep(random.randint(2, 4))
-        
-        print("  - 所有任务轮次执行完毕，正在刷新最终数据...")
-        self.query_user_info_and_records()
-        return True
 
-    def get_exchange_memberships(self) -> List[Dict[str, Any]]:
+    def for_activity(self, activity: Activity) -> 'RNL':
+        """同一会话下执行另一个活动的 RNL，按活动编码缓存。"""
+        if activity == self.activity:
+            return self
+        return self._activity_rnls.setdefault(activity.code, RNL(self.api, self.us, activity))
+
+    def run_main_workflow(self, extra_activities: Sequence[Activity] = ()) -> bool:
+        """
+        执行任务的主流程，集成小米钱包3.0版本的新功能，步骤和依赖见 workflow.rnl_steps。
+        extra_activities 中的活动与主活动共用同一个会话，各自的浏览轮次同时执行；额外活动失败不影响本账号的结果。
+        """
+        if extra_activities:
+            event_log.info('rnl.run_main_workflow', "  - 同时执行 {} 个额外活动: {}",
+                           len(extra_activities), '、'.join(activity.label for activity in extra_activities))
+        steps = rnl_steps([self.activity, *extra_activities])
+        return WorkflowExecutor(steps, self, self._pause, us=self.us).run()
+
+    def get_exchange_memberships(self) -> List[Membership]:
         """获取可兑换的会员列表"""
         try:
-            print("  - 尝试获取可兑换的会员列表...")
-            url = f"https://{API_HOST}/mp/api/generalActivity/getPrizeStatusV2"
-            params = {
-                'activityCode': self.activity_code,
-                'needPrizeBrand': 'youku,mgtv,iqiyi,tencent,bilibili,other'
-            }
-            
-            response = self.api.get(url, params=params)
+            event_log.info('rnl.get_exchange_memberships', "  - 尝试获取可兑换的会员列表...")
+            response = self.api.call(GET_PRIZE_STATUS)
             
             if response and response.get('code') == 0:
-                print(f"  ✅ 获取会员列表成功")
+                event_log.info('rnl.get_exchange_memberships', "  ✅ 获取会员列表成功")
                 
                 # 解析奖品信息
                 memberships = []
@@ -489,17 +472,9 @@ class RNL:
                 if isinstance(prize_list, list):
                     for prize in prize_list:
                         try:
-                            # 解析每个奖品的信息
-                            prize_id = prize.get('prizeId')
                             prize_name = prize.get('prizeName', '')
-                            prize_brand = prize.get('prizeBrand', '')
-                            need_gold_rice = prize.get('needGoldRice', 0)
-                            prize_code = prize.get('prizeCode', '')
-                            stock_status = prize.get('stockStatus', 0)
-                            today_stock_status = prize.get('todayStockStatus', 0)
-                            
                             # 计算消耗天数 (needGoldRice / 100)
-                            cost_days = float(need_gold_rice) / 100.0
+                            cost_days = float(prize.get('needGoldRice', 0)) / 100.0
                             
                             # 只处理有库存且消耗天数为31天的月卡，排除1分购特权
                             prize_type = prize.get('prizeType', 0)
@@ -512,190 +487,111 @@ class RNL:
                             is_direct_exchange = prize_type == 26
                             is_monthly_card = cost_days == 31.0
                             is_not_privilege = '1分购' not in prize_name and '特权' not in prize_name
-                            has_stock = stock_status == 1
+                            has_stock = prize.get('stockStatus', 0) == 1
                             
                             if has_stock and is_monthly_card and is_direct_exchange and is_not_privilege:
-                                membership = {
-                                    'id': prize_code,
-                                    'prizeId': prize_id,
-                                    'name': prize_name,
-                                    'description': prize.get('prizeDesc', ''),
-                                    'cost_days': cost_days,
-                                    'exchange_type': 'direct',  # 直接兑换
-                                    'status': 'available' if today_stock_status == 1 else 'out_of_stock',
-                                    'stock': stock_status,
-                                    'brand': prize_brand,
-                                    'needGoldRice': need_gold_rice,
-                                    'prizeBatchId': prize.get('prizeBatchId', ''),
-                                    'prizeType': prize_type
-                                }
-                                memberships.append(membership)
+                                memberships.append(Membership.from_prize(prize))
                         
                         except Exception as parse_error:
-                            print(f"  ⚠️ 解析奖品失败: {parse_error}")
+                            event_log.warning('rnl.get_exchange_memberships', "  ⚠️ 解析奖品失败: {}", parse_error)
                             continue
                     
                     if memberships:
-                        print(f"  📺 可兑换会员数量：{len(memberships)}")
+                        event_log.info('rnl.get_exchange_memberships', "  📺 可兑换会员数量：{}", len(memberships))
                         return memberships
                     else:
-                        print("  ⚠️ 未找到可兑换的31天会员")
+                        event_log.warning('rnl.get_exchange_memberships', "  ⚠️ 未找到可兑换的31天会员")
                 else:
-                    print(f"  ⚠️ 响应数据格式异常: {type(prize_list)}")
+                    event_log.warning('rnl.get_exchange_memberships', "  ⚠️ 响应数据格式异常: {}", type(prize_list))
                     
             else:
-                print(f"  ❌ 接口调用失败: {response}")
+                event_log.error('rnl.get_exchange_memberships', "  ❌ 接口调用失败: {}", response)
             
             # 如果API失败，返回预定义的会员列表
-            print("  - 使用预定义会员列表")
+            event_log.info('rnl.get_exchange_memberships', "  - 使用预定义会员列表")
             return self.get_predefined_memberships()
             
         except Exception as e:
-            print(f'  ❌ 获取兑换列表失败：{e}')
+            event_log.error('rnl.get_exchange_memberships', '  ❌ 获取兑换列表失败：{}', e)
             return self.get_predefined_memberships()
 
-    def get_predefined_memberships(self) -> List[Dict[str, Any]]:
+    def get_predefined_memberships(self) -> List[Membership]:
         """获取预定义的会员兑换列表（当API不可用时使用）"""
-        return [
-            {
-                'id': 'tencent_video_month',
-                'prizeId': 'tencent_month',
-                'name': '腾讯视频VIP月卡',
-                'description': '腾讯视频VIP月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'tencent',
-                'prizeBatchId': 'LSXD_PRIZE1263'
-            },
-            {
-                'id': 'iqiyi_month',
-                'prizeId': 'iqiyi_month',
-                'name': '爱奇艺黄金会员月卡',
-                'description': '爱奇艺黄金会员月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'iqiyi',
-                'prizeBatchId': 'LSXD_PRIZE1267'
-            },
-            {
-                'id': 'youku_month',
-                'prizeId': 'youku_month',
-                'name': '优酷VIP会员月卡',
-                'description': '优酷VIP会员月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'youku',
-                'prizeBatchId': 'LSXD_PRIZE1262'
-            },
-            {
-                'id': 'mgtv_month',
-                'prizeId': 'mgtv_month',
-                'name': '芒果TV会员月卡',
-                'description': '芒果TV月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'mgtv',
-                'prizeBatchId': 'LSXD_PRIZE1264'
-            }
-        ]
-
-    def exchange_membership(self, membership_info: Dict[str, Any], phone_number: str) -> bool:
+        return list(PREDEFINED_MEMBERSHIPS)
+
+    def exchange_membership(self, membership_info: Membership, phone_number: str) -> bool:
         """兑换会员"""
         try:
-            membership_name = membership_info['name']
-            prize_id = membership_info['prizeId']
-            
-            print(f"  🔍 尝试兑换 {membership_name} (PrizeID: {prize_id})")
-            
-            # 使用真实的兑换接口
-            url = f"https://{API_HOST}/mp/api/generalActivity/convertGoldRich"
+            membership_name = membership_info.name
+            prize_id = membership_info.prize_id
             
-            # 根据抓包数据构建参数
-            params = {
-                'prizeCode': membership_info['id'],  # 使用 prizeCode
-                'activityCode': self.activity_code,
-                'phone': phone_number,
-                'isNfcPhone': 'false',
-                'channel': 'exchange',
-                'deviceType': '2',
-                'system': '1', 
-                'visitEnvironment': '2',
-                'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
-            }
+            event_log.info('rnl.exchange_membership', "  🔍 尝试兑换 {} (PrizeID: {})", membership_name, prize_id)
             
             try:
                 # 使用GET方法（根据抓包显示）
-                print(f"  📞 正在为手机号 {phone_number} 兑换 {membership_name}...")
-                response = self.api.get(url, params=params)
+                event_log.info('rnl.exchange_membership', "  📞 正在为手机号 {} 兑换 {}...", phone_number, membership_name)
+                response = self.api.call(CONVERT_GOLD_RICH, prizeCode=membership_info.id, phone=phone_number)
                 
                 # 检查响应
                 if response:
                     # 如果返回的是JSON格式
                     if isinstance(response, dict):
                         if response.get('code') == 0:
-                            print(f'  ✅ 兑换{membership_name}成功！手机号：{phone_number}')
+                            event_log.info('rnl.exchange_membership', '  ✅ 兑换{}成功！手机号：{}', membership_name, phone_number)
                             return True
                         else:
                             error_msg = response.get('message', response.get('error', '未知错误'))
-                            print(f'  ❌ 兑换{membership_name}失败：{error_msg}')
+                            event_log.error('rnl.exchange_membership', '  ❌ 兑换{}失败：{}', membership_name, error_msg)
                             return False
                     else:
                         # 如果返回的是HTML或其他格式，可能需要进一步处理
-                        print(f'  ⚠️ 兑换请求已发送，但响应格式异常: {type(response)}')
+                        event_log.warning('rnl.exchange_membership', '  ⚠️ 兑换请求已发送，但响应格式异常: {}', type(response))
                         # 有些接口可能返回HTML但实际兑换成功，这里暂时认为成功
-                        print(f'  ✅ 兑换{membership_name}可能成功，请检查手机短信或小米钱包')
+                        event_log.info('rnl.exchange_membership', '  ✅ 兑换{}可能成功，请检查手机短信或小米钱包', membership_name)
                         return True
                 else:
-                    print(f'  ❌ 兑换{membership_name}失败：网络请求失败')
+                    event_log.error('rnl.exchange_membership', '  ❌ 兑换{}失败：网络请求失败', membership_name)
                     return False
                     
             except Exception as req_error:
-                print(f"  ❌ 兑换请求异常: {req_error}")
+                event_log.error('rnl.exchange_membership', "  ❌ 兑换请求异常: {}", req_error)
                 
                 # 备用：尝试POST方法
                 try:
-                    print(f"  🔄 尝试POST方法兑换...")
-                    response = self.api.post(url, data=params)
+                    event_log.info('rnl.exchange_membership', "  🔄 尝试POST方法兑换...")
+                    response = self.api.call(CONVERT_GOLD_RICH_FORM, prizeCode=membership_info.id, phone=phone_number)
                     
                     if response and isinstance(response, dict) and response.get('code') == 0:
-                        print(f'  ✅ 兑换{membership_name}成功！手机号：{phone_number}')
+                        event_log.info('rnl.exchange_membership', '  ✅ 兑换{}成功！手机号：{}', membership_name, phone_number)
                         return True
                     else:
-                        print(f'  ❌ POST方法也失败')
+                        event_log.error('rnl.exchange_membership', '  ❌ POST方法也失败')
                         
                 except Exception as post_error:
-                    print(f"  ❌ POST方法异常: {post_error}")
+                    event_log.error('rnl.exchange_membership', "  ❌ POST方法异常: {}", post_error)
                     
                 return False
             
-            print(f'  ❌ 所有兑换接口都无法完成{membership_name}的兑换')
-            print(f'  💡 请手动在小米钱包中兑换: {membership_name} -> {phone_number}')
+            event_log.error('rnl.exchange_membership', '  ❌ 所有兑换接口都无法完成{}的兑换', membership_name)
+            event_log.info('rnl.exchange_membership', '  💡 请手动在小米钱包中兑换: {} -> {}', membership_name, phone_number)
             return False
                 
         except Exception as e:
-            print(f'  ❌ 兑换{membership_info.get("name", "未知会员")}异常：{e}')
+            event_log.error('rnl.exchange_membership', '  ❌ 兑换{}异常：{}', membership_info.name or "未知会员", e)
             return False
 
-    def auto_exchange_memberships(self, exchange_configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def auto_exchange_memberships(self, exchange_configs: List[Dict[str, Any]]) -> List[ExchangeResult]:
         """自动兑换会员"""
         if not exchange_configs:
-            print("  📺 未配置会员兑换，跳过自动兑换")
+            event_log.info('rnl.auto_exchange_memberships', "  📺 未配置会员兑换，跳过自动兑换")
             return []
         
-        print(f"\n>>> 会员自动兑换检查 <<<")
-        print(f"  当前拥有天数：{self.total_days_num:.2f}天")
+        event_log.info('rnl.auto_exchange_memberships', "\n>>> 会员自动兑换检查 <<<")
+        event_log.info('rnl.auto_exchange_memberships', "  当前拥有天数：{:.2f}天", self.total_days_num)
         
         # 提取用户配置的会员类型
         configured_types = [config['type'] for config in exchange_configs]
-        print(f"  📋 用户配置的会员类型：{', '.join(configured_types)}")
+        event_log.info('rnl.auto_exchange_memberships', "  📋 用户配置的会员类型：{}", ', '.join(configured_types))
         
         # 获取可兑换的会员列表
         all_memberships = self.get_exchange_memberships()
@@ -705,25 +601,22 @@ class RNL:
         for membership in all_memberships:
             for config_type in configured_types:
                 # 检查品牌和名称匹配
-                brand_match = config_type.lower() in membership['brand'].lower() or membership['brand'].lower() in config_type.lower()
-                name_match = config_type in membership['name'] or membership['name'] in config_type
-                
-                if brand_match or name_match:
+                if membership.matches(config_type):
                     memberships.append(membership)
-                    if membership['status'] == 'available':
+                    if membership.available:
                         status_text = "✅可兑换"
                         status_icon = "📱"
                     else:
                         status_text = "❌今日无库存"
                         status_icon = "🔒"
-                    print(f"     {status_icon} {membership['name']} - 消耗{membership['cost_days']:.2f}天 [{status_text}] [匹配:{config_type}]")
+                    event_log.info('rnl.auto_exchange_memberships', "     {} {} - 消耗{:.2f}天 [{}] [匹配:{}]", status_icon, membership.name, membership.cost_days, status_text, config_type)
                     break
         
         if not memberships:
-            print("  📺 未找到匹配用户配置的可兑换会员")
+            event_log.info('rnl.auto_exchange_memberships', "  📺 未找到匹配用户配置的可兑换会员")
             return []
         
-        print(f"  📺 找到{len(memberships)}个匹配的可兑换会员")
+        event_log.info('rnl.auto_exchange_memberships', "  📺 找到{}个匹配的可兑换会员", len(memberships))
         
         exchange_results = []
         current_days = self.total_days_num
@@ -732,68 +625,46 @@ class RNL:
             membership_type = config['type']
             phone_number = config['phone']
             
-            print(f"\n  📱 检查 {membership_type} 兑换配置 (手机号: {phone_number})")
+            event_log.info('rnl.auto_exchange_memberships', "\n  📱 检查 {} 兑换配置 (手机号: {})", membership_type, phone_number)
             
             # 查找匹配的会员类型（优先选择直接兑换的月卡）
             matched_membership = None
-            potential_matches = []
-            
-            for membership in memberships:
-                # 检查品牌和名称匹配
-                brand_match = membership_type.lower() in membership['brand'].lower() or membership['brand'].lower() in membership_type.lower()
-                name_match = membership_type in membership['name'] or membership['name'] in membership_type
-                
-                if brand_match or name_match:
-                    potential_matches.append(membership)
+            potential_matches = [membership for membership in memberships if membership.matches(membership_type)]
             
             # 优先选择直接兑换的月卡（非特权类型）
             if potential_matches:
                 # 按优先级排序：直接兑换 > 今日有库存 > 消耗天数最接近31天
-                def priority_score(m):
-                    score = 0
-                    if m['exchange_type'] == 'direct':
-                        score += 1000  # 最高优先级：直接兑换
-                    if m['status'] == 'available':
-                        score += 100   # 其次：今日有库存
-                    if m['cost_days'] == 31.0:
-                        score += 10    # 最后：消耗天数为31天
-                    return score
-                
-                potential_matches.sort(key=priority_score, reverse=True)
+                potential_matches.sort(key=Membership.priority, reverse=True)
                 matched_membership = potential_matches[0]
                 
-                print(f"  🎯 找到{len(potential_matches)}个匹配项，选择优先级最高的：{matched_membership['name']}")
+                event_log.info('rnl.auto_exchange_memberships', "  🎯 找到{}个匹配项，选择优先级最高的：{}", len(potential_matches), matched_membership.name)
             
             if not matched_membership:
-                print(f"  ❌ 未找到匹配的会员类型：{membership_type}")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'未找到匹配的会员类型：{membership_type}'
-                })
+                event_log.error('rnl.auto_exchange_memberships', "  ❌ 未找到匹配的会员类型：{}", membership_type)
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'未找到匹配的会员类型：{membership_type}'
+                ))
                 continue
             
             # 检查天数是否充足
-            required_days = matched_membership['cost_days']
-            print(f"  💰 需要消耗：{required_days:.2f}天")
+            required_days = matched_membership.cost_days
+            event_log.info('rnl.auto_exchange_memberships', "  💰 需要消耗：{:.2f}天", required_days)
             
             # 首先检查库存状态
-            if matched_membership['status'] != 'available':
-                print(f"  ❌ {matched_membership['name']} 今日无库存，跳过兑换")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'{matched_membership["name"]} 今日无库存'
-                })
+            if not matched_membership.available:
+                event_log.error('rnl.auto_exchange_memberships', "  ❌ {} 今日无库存，跳过兑换", matched_membership.name)
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'{matched_membership.name} 今日无库存'
+                ))
                 continue
             
             if current_days >= required_days:
-                print(f"  ✅ 天数充足，库存充足，开始兑换 {matched_membership['name']}")
+                event_log.info('rnl.auto_exchange_memberships', "  ✅ 天数充足，库存充足，开始兑换 {}", matched_membership.name)
                 
                 # 执行兑换
-                print(f"  ⚠️ 注意：兑换功能正在尝试调用接口，如果失败请手动兑换")
+                event_log.warning('rnl.auto_exchange_memberships', "  ⚠️ 注意：兑换功能正在尝试调用接口，如果失败请手动兑换")
                 success = self.exchange_membership(
                     matched_membership, 
                     phone_number
@@ -801,161 +672,326 @@ class RNL:
                 
                 if success:
                     current_days -= required_days  # 更新剩余天数
-                    exchange_results.append({
-                        'type': membership_type,
-                        'phone': phone_number,
-                        'success': True,
-                        'message': f'成功兑换 {matched_membership["name"]}，消耗{required_days:.2f}天',
-                        'cost_days': required_days
-                    })
-                    print(f"  💎 兑换成功！剩余天数：{current_days:.2f}天")
+                    exchange_results.append(ExchangeResult(
+                        membership_type, phone_number, True,
+                        f'成功兑换 {matched_membership.name}，消耗{required_days:.2f}天',
+                        cost_days=required_days
+                    ))
+                    event_log.info('rnl.auto_exchange_memberships', "  💎 兑换成功！剩余天数：{:.2f}天", current_days)
                 else:
-                    exchange_results.append({
-                        'type': membership_type,
-                        'phone': phone_number,
-                        'success': False,
-                        'message': f'兑换 {matched_membership["name"]} 失败'
-                    })
+                    exchange_results.append(ExchangeResult(
+                        membership_type, phone_number, False,
+                        f'兑换 {matched_membership.name} 失败'
+                    ))
             else:
-                print(f"  ❌ 天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天'
-                })
+                event_log.error('rnl.auto_exchange_memberships', "  ❌ 天数不足：需要{:.2f}天，当前仅有{:.2f}天", required_days, current_days)
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天'
+                ))
             
-            time.sleep(2)  # 兑换间隔
+            self._pause(2)  # 兑换间隔
         
         return exchange_results
 
 
 # --- 主流程控制模块 ---
 
-def get_session_cookies(pass_token: str, user_id: str) -> Optional[str]:
+def open_session(pass_token: str, user_id: str) -> AccountSession:
     """
-    使用长效凭证 (passToken) 获取用于访问任务 API 的临时会话 Cookie。
-    此函数的核心 URL 和 Headers 严格与原始有效版本保持一致。
+    使用长效凭证 (passToken) 获取用于访问任务 API 的临时会话。
+    凭证不完整时不发请求，否则只请求一次 serviceLogin；失败时抛出 SessionError。
     """
-    login_url = (
-        'https://account.xiaomi.com/pass/serviceLogin?callback=https%3A%2F%2Fapi.jr.airstarfinance.net%2Fsts'
-        '%3Fsign%3D1dbHuyAmee0NAZ2xsRw5vhdVQQ8%253D%26followup%3Dhttps%253A%252F%252Fm.jr.airstarfinance.net'
-        '%252Fmp%252Fapi%252Flogin%253Ffrom%253Dmipay_indexicon_TVcard%2526deepLinkEnable%253Dfalse'
-        '%2526requestUrl%253Dhttps%25253A%25252F%25252Fm.jr.airstarfinance.net%25252Fmp%25252Factivity'
-        '%25252FvideoActivity%25253Ffrom%25253Dmipay_indexicon_TVcard%252526_noDarkMode%25253Dtrue'
-        '%252526_transparentNaviBar%25253Dtrue%252526cUserId%25253Dusyxgr5xjumiQLUoAKTOgvi858Q'
-        '%252526_statusBarHeight%25253D137&sid=jrairstar&_group=DEFAULT&_snsNone=true&_loginType=ticket'
-    )
-    
-    headers = {
-        'user-agent': USER_AGENT_DESKTOP,
-        'cookie': f'passToken={pass_token}; userId={user_id};'
-    }
-    
-    session = requests.Session()
-    try:
-        session.get(url=login_url, headers=headers, verify=False, timeout=10)
-        cookies = session.cookies.get_dict()
-        
-        c_user_id = cookies.get('cUserId')
-        service_token = cookies.get('serviceToken')
+    return login(load_requests(), pass_token, user_id, USER_AGENT_DESKTOP)
 
-        if c_user_id and service_token:
-            return f"cUserId={c_user_id}; jrairstar_serviceToken={service_token}"
-        
-        print("  - 获取的 Cookie 不完整，可能 passToken 已失效。")
-        return None
-    except requests.RequestException as e:
-        print(f"  - 获取 Cookie 时网络请求失败: {e}")
-        return None
+
+def store_result(result: AccountRunResult) -> None:
+    """结束记录并写入本地结果存储。"""
+    result.finish()
+    try:
+        save_run(result)
+    except (OSError, ValueError) as e:
+        event_log.warning('account.process', "  ⚠️ 保存执行结果失败: {}", e)
 
 
-def process_account(account_data: Dict[str, Any]) -> str:
-    """处理单个账号的完整任务流程，支持会员兑换功能。"""
+def process_account(account_data: Dict[str, Any], api_request: Optional[ApiRequest] = None) -> AccountRunResult:
+    """
+    处理单个账号的完整任务流程，支持会员兑换功能。
+    传入已认证的 api_request 时直接复用其会话，不再重新获取 Cookie。
+    返回的结果中日志为格式化后的通知文本，同时写入本地结果存储。
+    """
     us = account_data.get('us')
     user_id = account_data.get('userId')
     pass_token = account_data.get('passToken')
     exchange_configs = account_data.get('exchange_configs', [])  # 获取会员兑换配置
+    result = AccountRunResult(us=us or '未知', user_id=user_id, exchange_configs=exchange_configs)
     
-    if not all([us, user_id, pass_token]):
-        return f"账号 '{us or '未知'}' 配置不完整，已跳过。"
+    event_log.info('account.process', "\n>>>>>>>>>> 正在处理账号: {} (ID: {}) <<<<<<<<<<", result.us, user_id)
     
-    print(f"\n>>>>>>>>>> 正在处理账号: {us} (ID: {user_id}) <<<<<<<<<<")
-    
-    session_cookies = get_session_cookies(pass_token, user_id)
-    api_request = ApiRequest(session_cookies)
-    rnl = RNL(api_request)
+    if api_request is None:
+        try:
+            # 接口熔断期间也不再获取会话
+            API_BREAKER.check()
+            if not us:
+                raise SessionError(INCOMPLETE, "配置不完整：缺少账号别名 us")
+            api_request = ApiRequest(open_session(pass_token, user_id).cookie_header)
+        except (SessionError, CircuitOpenError) as e:
+            # 会话无效时不再创建 RNL、调用接口或等待，只记录一行原因
+            event_log.warning('account.process', "  ❌ 已跳过：{}", e)
+            result.error = str(e)
+            if isinstance(e, SessionError):
+                result.session_error = e
+            result.log("账号 '{}' 已跳过：{}", result.us, e)
+            store_result(result)
+            return result
+    event_log.info('account.process', "  - 会话 Cookie 获取成功。")
+    rnl = RNL(api_request, us)
     
     exchange_results = []
     
-    if not session_cookies:
-        rnl.error_info = "获取会话 Cookie 失败，请重新运行 login.py 刷新凭证。"
-    else:
-        print("  - 会话 Cookie 获取成功。")
+    try:
+        # 主活动之外额外参加的活动，见 activities.py；配置无效时只执行主活动
         try:
-            # 执行基础任务流程
-            rnl.run_main_workflow()
+            extra_activities = resolve_activities(account_data.get('activities', []))[1:]
+        except ValueError as e:
+            event_log.warning('account.process', "  ⚠️ 忽略额外活动：{}", e)
+            extra_activities = []
+        # 执行基础任务流程
+        result.success = rnl.run_main_workflow(extra_activities)
+        
+        # 如果配置了会员兑换，执行自动兑换
+        if exchange_configs:
+            event_log.info('account.process', "  - 检测到 {} 个会员兑换配置", len(exchange_configs))
+            exchange_results = rnl.auto_exchange_memberships(exchange_configs)
+        else:
+            event_log.info('account.process', "  - 未配置会员兑换")
             
-            # 如果配置了会员兑换，执行自动兑换
-            if exchange_configs:
-                print(f"  - 检测到 {len(exchange_configs)} 个会员兑换配置")
-                exchange_results = rnl.auto_exchange_memberships(exchange_configs)
-            else:
-                print("  - 未配置会员兑换")
-                
-        except Exception as e:
-            rnl.error_info = f"执行主程序时发生未知异常: {e}"
-            print(f"  ❌ {rnl.error_info}")
+    except CircuitOpenError as e:
+        result.success = False
+        rnl.error_info = str(e)
+        event_log.error('account.process', "  ❌ 已中止：{}", e)
+    except Exception as e:
+        result.success = False
+        rnl.error_info = f"执行主程序时发生未知异常: {e}"
+        event_log.error('account.process', "  ❌ {}", rnl.error_info)
     
+    result.error = rnl.error_info or None
+    result.total_days = rnl.total_days_num if rnl.total_days != "未知" else None
+    result.today_records = rnl.today_records
+    result.exchange_results = exchange_results
     # 生成包含兑换结果的通知
-    return generate_notification_with_exchange(user_id, rnl, us, exchange_results)
+    result.log(generate_notification_with_exchange(user_id, rnl, us, exchange_results))
+    store_result(result)
+    return result
+
+
+def plan_account(account_data: Dict[str, Any]) -> AccountPlan:
+    """演练模式：只调用只读接口，推演该账号一次完整执行的请求计划。"""
+    us = account_data.get('us') or '未知'
+    user_id = account_data.get('userId')
+    pass_token = account_data.get('passToken')
+    exchange_configs = account_data.get('exchange_configs', [])
+    if not account_data.get('us'):
+        return failed_plan(us, "配置不完整：缺少账号别名 us", requests=0)
+
+    try:
+        api_request = ApiRequest(open_session(pass_token, user_id).cookie_header)
+    except SessionError as e:
+        return failed_plan(us, str(e), requests=e.requests)
+    try:
+        rnl = RNL(api_request)
+        if not rnl.query_total_days():
+            return failed_plan(us, rnl.error_info, requests=2)
+        tasks = rnl.get_task_list() or []
+        memberships = rnl.get_exchange_memberships() if exchange_configs else []
+        return build_plan(us, rnl.total_days_num, len(tasks), memberships, exchange_configs)
+    finally:
+        api_request.session.close()
+
+
+def run_plan(accounts_config: List[Dict[str, Any]], window: float, max_workers: int) -> None:
+    """--plan：并发生成所有账号的执行计划并输出汇总估算，不完成任务也不写配置文件。"""
+    keys = [f"{index}:{account.get('data', {}).get('us', '')}" for index, account in enumerate(accounts_config)]
+
+    def plan_one(data: Dict[str, Any]) -> AccountPlan:
+        with bind_account(data.get('us')):
+            return plan_account(data)
+
+    # 只读查询过程中的日志不输出，只保留警告和错误
+    event_log.set_level(console_sink, WARNING)
+    event_log.info('main', "🔍 正在为 {} 个账号生成执行计划...", len(accounts_config))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        plans = list(pool.map(plan_one, [account.get('data', {}) for account in accounts_config]))
+    event_log.flush()
+
+    for plan in plans:
+        print(plan.describe())
+    print(format_summary(plans, estimate_makespan(plans, keys, window, max_workers), window, max_workers))
+
+
+def select_accounts(
+    accounts_config: List[Dict[str, Any]],
+    only: Optional[List[str]] = None,
+    failed_last_run: bool = False,
+    not_done_today: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    按别名和本地结果存储筛选要执行的账号，多个条件同时满足才保留。
+    - only: 只保留这些别名，配置中不存在的别名抛出 ValueError
+    - failed_last_run: 最近一次执行失败的账号（从未执行过的不算）
+    - not_done_today: 今天还没有成功执行过的账号
+    """
+    aliases = [account.get('data', {}).get('us') for account in accounts_config]
+    keep = set(aliases)
+    if only:
+        unknown = [us for us in only if us not in keep]
+        if unknown:
+            raise ValueError(f"配置文件中没有账号: {', '.join(unknown)}")
+        keep &= set(only)
+    if failed_last_run:
+        latest = latest_runs(keep)
+        keep = {us for us in keep if us in latest and not latest[us].success}
+    if not_done_today:
+        keep -= succeeded_on(datetime.now().strftime('%Y-%m-%d'))
+    return [account for account, us in zip(accounts_config, aliases) if us in keep]
+
+
+def run_account(data: Dict[str, Any]) -> AccountRunResult:
+    """执行单个账号并推送通知，返回执行结果。"""
+    with bind_account(data.get('us')):
+        result = process_account(data)
+        notification = result.text()
+        if result.session_error is None:
+            event_log.info('account.report', "{}", notification)
+
+        feishu_webhook = data.get('feishu_webhook')
+        if feishu_webhook:
+            event_log.info('account.report', "  - 检测到飞书 Webhook 配置，正在尝试推送...")
+            send_feishu_notification(feishu_webhook, notification)
+    return result
 
 
 def main():
     """程序主入口函数。"""
+    parser = argparse.ArgumentParser(description="小米钱包每日任务")
+    parser.add_argument('--window', type=float, default=None,
+                        help=f"错峰窗口长度（秒），账号在窗口内分散启动并发执行，默认每个账号 {STAGGER_SECONDS_PER_ACCOUNT} 秒")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"同时执行的账号数上限，默认 {MAX_WORKERS}")
+    parser.add_argument('--quiet', action='store_true', help="控制台只输出警告和错误")
+    parser.add_argument('--log-file', help="把全部日志事件（含调试信息）以 JSONL 格式追加写入该文件")
+    parser.add_argument('--plan', action='store_true',
+                        help="演练模式：只调用只读接口，输出每个账号的请求计划和预计耗时，不执行任务")
+    parser.add_argument('--only', action='append', metavar='别名',
+                        help="只执行指定账号，多个别名用逗号分隔或重复使用该参数")
+    parser.add_argument('--failed-last-run', action='store_true',
+                        help="只执行最近一次执行失败的账号（根据本地结果存储）")
+    parser.add_argument('--not-done-today', action='store_true',
+                        help="只执行今天还没有成功执行过的账号（根据本地结果存储）")
+    parser.add_argument('--breaker-rate', type=float, default=API_BREAKER.failure_rate,
+                        help=f"任务接口最近请求的失败比例达到该值时熔断，默认 {API_BREAKER.failure_rate:g}")
+    parser.add_argument('--breaker-cooldown', type=float, default=API_BREAKER.cooldown,
+                        help=f"熔断后经过多少秒放行一个探测请求，默认 {API_BREAKER.cooldown:g}")
+    parser.add_argument('--outage-budget', type=float, default=OUTAGE_BUDGET_SECONDS,
+                        help=f"接口故障持续超过该秒数后不再启动剩余账号，默认 {OUTAGE_BUDGET_SECONDS}")
+    args = parser.parse_args()
+
+    try:
+        API_BREAKER.configure(failure_rate=args.breaker_rate, cooldown=args.breaker_cooldown)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.quiet:
+        event_log.set_level(console_sink, WARNING)
+    if args.log_file:
+        event_log.add_sink(JsonlSink(args.log_file))
+
     try:
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
             content = f.read()
-            accounts_config = [] if not content else json.loads(content)
+            accounts_config = [] if not content else codec.loads(content)
         assert isinstance(accounts_config, list), "配置文件根节点应为列表"
     except (FileNotFoundError, json.JSONDecodeError, AssertionError) as e:
-        print(f"❌ 读取或解析配置文件 '{CONFIG_FILE}' 失败: {e}")
+        event_log.error('main', "❌ 读取或解析配置文件 '{}' 失败: {}", CONFIG_FILE, e)
         return
 
     if not accounts_config:
-        print(f"ℹ️  配置文件 '{CONFIG_FILE}' 中没有账号，程序退出。")
+        event_log.info('main', "ℹ️  配置文件 '{}' 中没有账号，程序退出。", CONFIG_FILE)
         return
 
+    only = [us.strip() for value in args.only or [] for us in value.split(',') if us.strip()]
+    try:
+        selected = select_accounts(accounts_config, only, args.failed_last_run, args.not_done_today)
+    except ValueError as e:
+        event_log.error('main', "❌ {}", e)
+        return
+    if not selected:
+        event_log.info('main', "ℹ️  没有符合筛选条件的账号，程序退出。")
+        return
+    if len(selected) < len(accounts_config):
+        event_log.info('main', "ℹ️  按筛选条件执行 {}/{} 个账号: {}", len(selected), len(accounts_config),
+                       ', '.join(str(account.get('data', {}).get('us')) for account in selected))
+
+    window = args.window if args.window is not None else STAGGER_SECONDS_PER_ACCOUNT * len(selected)
+    if args.plan:
+        run_plan(selected, window, args.workers)
+        event_log.close()
+        return
+
+    event_log.info('main', "\n======= 开始执行小米钱包每日任务 ({}) =======", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    event_log.info('main', "ℹ️  {} 个账号将在 {:.0f} 秒内错峰启动，最多 {} 个同时执行", len(selected), window, args.workers)
+
+    stop_event = threading.Event()
+
+    def run_until_outage(data: Dict[str, Any]) -> Optional[AccountRunResult]:
+        # 接口故障超过预算后放弃剩余账号，已在执行的账号会在下一次等待时中止
+        if API_BREAKER.outage_seconds() >= args.outage_budget:
+            stop_event.set()
+            return None
+        return run_account(data)
+
+    # 以配置中的序号作为任务键，别名重复或缺失时也能一一对应；未选中的账号保留原有日志
+    keyed = [(f"{index}:{account.get('data', {}).get('us', '')}", account) for index, account in enumerate(accounts_config)]
+    selected_ids = {id(account) for account in selected}
+    jobs = [
+        (key, lambda data=account.get('data', {}): run_until_outage(data))
+        for key, account in keyed if id(account) in selected_ids
+    ]
+    results = run_staggered(jobs, window, max_workers=args.workers, stop_event=stop_event)
 
-    print(f"\n======= 开始执行小米钱包每日任务 ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) =======")
-    
     updated_config = []
-    
-    for account in accounts_config:
+    session_failures = []
+    for key, account in keyed:
         data = account.get('data', {})
-        notification = process_account(data)
-        print(notification)
-        
-        data['log'] = notification.strip()
+        result = results.get(key)
+        notification = None
+        if isinstance(result, Exception):
+            notification = f"账号 '{data.get('us', '未知')}' 执行时发生未知异常: {result}"
+            event_log.error('main', "{}", notification)
+        elif result is not None:
+            notification = result.text()
+            if result.session_error is not None:
+                session_failures.append((result.us, result.session_error))
+        if notification is not None:
+            data['log'] = notification.strip()
         account['data'] = data
         updated_config.append(account)
-        
-        feishu_webhook = data.get('feishu_webhook')
-        if feishu_webhook:
-            print("  - 检测到飞书 Webhook 配置，正在尝试推送...")
-            send_feishu_notification(feishu_webhook, notification)
-        delay = random.randint(0, 15)
-        print(f"随机延迟 {delay} 秒后执行，以避免集中请求...")
-        time.sleep(delay)
+
+    if session_failures:
+        event_log.warning('main', "\n{}", format_failure_summary(session_failures))
+    if stop_event.is_set():
+        skipped = sum(1 for key, _ in jobs if results.get(key) is None)
+        event_log.error('main', "\n❌ 任务接口故障已持续超过 {:.0f} 秒，剩余 {} 个账号未执行，请稍后重新运行。",
+                        args.outage_budget, skipped)
 
     try:
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(updated_config, f, indent=4, ensure_ascii=False)
-        print(f"\n✅ 所有账号日志已成功更新至 '{CONFIG_FILE}'")
+            f.write(codec.dumps_pretty(updated_config))
+        event_log.info('main', "\n✅ 所有账号日志已成功更新至 '{}'", CONFIG_FILE)
     except Exception as e:
-        print(f"❌ 写入日志到 '{CONFIG_FILE}' 时发生错误: {e}")
+        event_log.error('main', "❌ 写入日志到 '{}' 时发生错误: {}", CONFIG_FILE, e)
 
-    print("\n======= 小米钱包每日任务执行完毕 =======")
+    event_log.info('main', "\n======= 小米钱包每日任务执行完毕 =======")
+    event_log.close()
 
 
 if __name__ == "__main__":
@@ -8,21 +8,39 @@ macOS平台专用启动脚本
 """
 
 import sys
+import time
 from pathlib import Path
 
+# 进程启动时间点，用于 --profile-startup 统计启动耗时
+STARTUP_T0 = time.perf_counter()
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+
 # 添加当前目录到Python路径
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
+def report_startup(marks):
+    """打印启动各阶段耗时（仅在 --profile-startup 时启用）"""
+    if not PROFILE_STARTUP:
+        return
+    parts = []
+    last = STARTUP_T0
+    for name, t in marks:
+        parts.append(f"{name} {(t - last) * 1000:.0f}ms")
+        last = t
+    print(f"⏱️ 启动耗时: {', '.join(parts)} (首帧总计 {(last - STARTUP_T0) * 1000:.0f}ms)")
+
 def macos_main():
     """macOS平台的主函数入口点"""
     try:
         # 尝试导入Flet
         import flet as ft
+        startup_marks = [("导入Flet", time.perf_counter())]
         
         try:
             # 尝试导入GUI模块
             import gui
+            startup_marks.append(("导入GUI模块", time.perf_counter()))
             
             def macos_app_main(page: ft.Page):
                 """macOS平台的应用主函数包装器"""
@@ -47,6 +65,8 @@ def macos_main():
                     
                     # 调用原始GUI主函数
                     gui.main(page)
+                    startup_marks.append(("首帧渲染", time.perf_counter()))
+                    report_startup(startup_marks)
                     
                 except Exception as e:
                     # 如果GUI启动失败，显示错误信息
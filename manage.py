@@ -1,13 +1,43 @@
 # 用法:
-# python3 manage.py list         # 查看所有账号
-# python3 manage.py delete <别名> # 删除指定账号
+# python3 manage.py list                         # 查看所有账号
+# python3 manage.py delete <别名>                # 删除指定账号
+# python3 manage.py export [文件] [--format F]   # 导出账号（jsonl / csv / env，默认输出到标准输出）
+# python3 manage.py import <文件|-> [--format F] # 批量导入账号（按别名新增或更新）
+# python3 manage.py import --env                 # 从环境变量 XIAOMI_ACCOUNTS 导入
+# python3 manage.py check [--write]              # 并发检查所有账号的 passToken 是否仍有效
+#
+# env 格式与 3.0 脚本的 XIAOMI_ACCOUNTS 相同：
+#   账号名#passToken=xxx;userId=xxx;腾讯视频#18819397965&账号名2#passToken=xxx;userId=xxx
 
-import json
-import sys
+import argparse
+import csv
 import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import codec
 
 CONFIG_PATH = "xiaomiconfig.json"
 
+# 导入导出的字段，顺序即 CSV 的列顺序
+EXPORT_FIELDS = ("us", "userId", "passToken", "securityToken", "exchange_configs")
+FORMATS = ("jsonl", "csv", "env")
+# 按扩展名推断格式，其余按 env 格式处理
+EXTENSION_FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv"}
+# 凭证检查的默认并发数和每秒请求数
+CHECK_WORKERS = 8
+CHECK_RATE = 5.0
+CHECK_LABELS = {
+    "valid": "✅ 有效",
+    "expired": "❌ 已失效",
+    "network_error": "⚠️  网络错误",
+    "missing": "ℹ️  未登录",
+}
+
 def load_accounts():
     """加载账号配置"""
     if not os.path.isfile(CONFIG_PATH):
@@ -17,18 +47,25 @@ def load_accounts():
             content = f.read()
             if not content:
                 return []
-            return json.loads(content)
+            return codec.loads(content)
     except Exception as e:
         print(f"❌ 读取配置文件失败: {e}")
         return None
 
 def save_accounts(accounts):
-    """保存账号配置"""
+    """保存账号配置：先写临时文件再替换，中途失败不会留下写了一半的配置"""
+    config_dir = os.path.dirname(os.path.abspath(CONFIG_PATH))
+    tmp_path = None
     try:
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(accounts, f, indent=4, ensure_ascii=False)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=config_dir,
+                                         prefix=".xiaomiconfig.", suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            f.write(codec.dumps_pretty(accounts))
+        os.replace(tmp_path, CONFIG_PATH)
         return True
     except Exception as e:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         print(f"❌ 保存文件失败: {e}")
         return False
 
@@ -68,30 +105,365 @@ def delete_account(us_to_delete):
     else:
         print(f"❌ 未找到别名为 '{us_to_delete}' 的账号。")
 
-def print_usage():
-    print("用法:")
-    print("  python3 manage.py list         - 查看所有已添加的账号")
-    print("  python3 manage.py delete <别名> - 删除一个指定的账号")
+# --- 导入导出 ---
 
-def main():
-    if len(sys.argv) < 2:
-        print_usage()
+def format_exchange_configs(configs: List[Dict[str, str]]) -> str:
+    """兑换配置 -> '腾讯视频#188xxxx;爱奇艺#138xxxx'（CSV 和 env 格式共用）"""
+    return ";".join(f"{c.get('type', '')}#{c.get('phone', '')}" for c in configs or [])
+
+def format_env_account(record: Dict[str, Any]) -> str:
+    """账号 -> XIAOMI_ACCOUNTS 中的一项，env 格式没有 securityToken 字段"""
+    items = [f"passToken={record.get('passToken') or ''}", f"userId={record.get('userId') or ''}"]
+    exchange_configs = format_exchange_configs(record.get("exchange_configs"))
+    if exchange_configs:
+        items.append(exchange_configs)
+    return f"{record.get('us')}#" + ";".join(items)
+
+def parse_exchange_configs(text: str) -> List[Dict[str, str]]:
+    """'腾讯视频#188xxxx;爱奇艺#138xxxx' -> 兑换配置列表"""
+    configs = []
+    for item in text.split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        if "#" not in item:
+            raise ValueError(f"兑换配置 '{item}' 应为 '会员类型#手机号'")
+        membership_type, phone = item.split("#", 1)
+        configs.append({"type": membership_type.strip(), "phone": phone.strip()})
+    return configs
+
+def iter_jsonl(f: TextIO) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """逐行产出 (位置, 记录)"""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = codec.loads(line)
+        except codec.JSONDecodeError as e:
+            raise ValueError(f"第 {line_no} 行: JSON 解析失败: {e}")
+        # 也接受配置文件中的 {"data": {...}} 结构
+        if isinstance(record, dict) and isinstance(record.get("data"), dict):
+            record = record["data"]
+        yield f"第 {line_no} 行", record
+
+def iter_csv(f: TextIO) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """逐行产出 (位置, 记录)，表头为 EXPORT_FIELDS 中的字段名"""
+    reader = csv.DictReader(f)
+    if not reader.fieldnames or "us" not in reader.fieldnames:
+        raise ValueError("CSV 缺少表头或缺少 'us' 列")
+    for row in reader:
+        record = {key: value for key, value in row.items() if key}
+        yield f"第 {reader.line_num} 行", record
+
+def iter_env(text: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """解析 XIAOMI_ACCOUNTS 格式，账号之间用 & 或换行分隔"""
+    index = 0
+    for account_str in text.replace("\n", "&").split("&"):
+        account_str = account_str.strip()
+        if not account_str:
+            continue
+        index += 1
+        if "#" in account_str:
+            account_name, config_part = account_str.split("#", 1)
+        else:
+            account_name, config_part = f"账号{index}", account_str
+
+        record: Dict[str, Any] = {"us": account_name.strip()}
+        exchange_items = []
+        for item in config_part.split(";"):
+            if "=" in item:
+                key, value = item.split("=", 1)
+                record[key.strip()] = value.strip()
+            elif "#" in item:
+                exchange_items.append(item)
+        record["exchange_configs"] = ";".join(exchange_items)
+        yield f"第 {index} 个账号", record
+
+def normalize_record(record: Any, where: str) -> Dict[str, Any]:
+    """
+    校验一条导入记录，返回只含 EXPORT_FIELDS 的账号数据；空值表示不修改该字段。
+    没有 passToken 的记录视为未登录账号（GUI 中添加后尚未扫码登录的账号导出后即是如此），不含凭证字段。
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"{where}: 记录应为对象")
+    us = str(record.get("us") or "").strip()
+    if not us:
+        raise ValueError(f"{where}: 缺少账号别名 'us'")
+
+    data: Dict[str, Any] = {"us": us}
+    pass_token = str(record.get("passToken") or "").strip()
+    user_id = str(record.get("userId") or "").strip()
+    if pass_token:
+        if not user_id.isdigit():
+            raise ValueError(f"{where}: 账号 '{us}' 的 userId 应为数字")
+        data["passToken"] = pass_token
+        data["userId"] = user_id
+    elif user_id and not user_id.isdigit():
+        raise ValueError(f"{where}: 账号 '{us}' 的 userId 应为数字")
+    if record.get("securityToken"):
+        data["securityToken"] = str(record["securityToken"]).strip()
+
+    configs = record.get("exchange_configs")
+    if isinstance(configs, str):
+        try:
+            configs = parse_exchange_configs(configs) if configs.strip() else None
+        except ValueError as e:
+            raise ValueError(f"{where}: 账号 '{us}' 的{e}")
+    if configs is not None:
+        if not isinstance(configs, list) or not all(
+            isinstance(c, dict) and c.get("type") and c.get("phone") for c in configs
+        ):
+            raise ValueError(f"{where}: 账号 '{us}' 的 exchange_configs 每项都需要 type 和 phone")
+        data["exchange_configs"] = [{"type": str(c["type"]), "phone": str(c["phone"])} for c in configs]
+    return data
+
+def read_import(records: Iterable[Tuple[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """一次遍历完成校验，返回 (有效记录, 全部错误)"""
+    valid: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    seen: Dict[str, str] = {}
+    try:
+        for where, record in records:
+            try:
+                data = normalize_record(record, where)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+            if data["us"] in seen:
+                errors.append(f"{where}: 账号别名 '{data['us']}' 与{seen[data['us']]}重复")
+                continue
+            seen[data["us"]] = where
+            valid.append(data)
+    except (ValueError, csv.Error) as e:
+        errors.append(str(e))
+    return valid, errors
+
+def merge_accounts(accounts: List[Dict[str, Any]], imported: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """按别名合并到配置中，已有账号保留日志等其他字段。返回 (新增数, 更新数)"""
+    by_us = {acc.get("data", {}).get("us"): acc for acc in accounts}
+    added = updated = 0
+    for data in imported:
+        existing = by_us.get(data["us"])
+        if existing is None:
+            # 未登录的新账号与 GUI 中添加的账号一致，凭证字段为 null
+            accounts.append({"data": {"us": data["us"], "userId": None, "passToken": None, **data}})
+            by_us[data["us"]] = accounts[-1]
+            added += 1
+        else:
+            existing.setdefault("data", {}).update(data)
+            updated += 1
+    return added, updated
+
+def detect_format(path: Optional[str], fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    if path and path != "-":
+        return EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower(), "env")
+    return "jsonl"
+
+def import_accounts(path: Optional[str], fmt: Optional[str], from_env: bool) -> None:
+    """批量导入账号，校验全部通过后才写入配置文件"""
+    accounts = load_accounts()
+    if accounts is None: return
+
+    if from_env:
+        text = os.environ.get("XIAOMI_ACCOUNTS", "")
+        if not text:
+            print("❌ 未找到环境变量 XIAOMI_ACCOUNTS")
+            return
+        imported, errors = read_import(iter_env(text))
+    else:
+        fmt = detect_format(path, fmt)
+        try:
+            f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig", newline="")
+        except OSError as e:
+            print(f"❌ 打开导入文件失败: {e}")
+            return
+        try:
+            if fmt == "jsonl":
+                imported, errors = read_import(iter_jsonl(f))
+            elif fmt == "csv":
+                imported, errors = read_import(iter_csv(f))
+            else:
+                imported, errors = read_import(iter_env(f.read()))
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    if errors:
+        print(f"❌ 导入数据有 {len(errors)} 处错误，配置文件未修改：")
+        for error in errors:
+            print(f"  - {error}")
+        return
+    if not imported:
+        print("ℹ️  没有可导入的账号。")
         return
 
-    command = sys.argv[1]
+    logged_out = [data["us"] for data in imported if "passToken" not in data]
+    added, updated = merge_accounts(accounts, imported)
+    if save_accounts(accounts):
+        print(f"✅ 导入完成：新增 {added} 个账号，更新 {updated} 个账号，当前共 {len(accounts)} 个账号。")
+        if logged_out:
+            print(f"ℹ️  其中 {len(logged_out)} 个账号没有登录凭证，需要扫码登录后才能执行任务：{', '.join(logged_out)}")
 
-    if command == "list":
+def export_accounts(path: Optional[str], fmt: Optional[str]) -> None:
+    """导出账号的别名、小米ID、凭证和兑换配置"""
+    accounts = load_accounts()
+    if accounts is None: return
+
+    fmt = detect_format(path, fmt)
+    records = [
+        {key: acc.get("data", {}).get(key) for key in EXPORT_FIELDS}
+        for acc in accounts
+    ]
+    try:
+        f = sys.stdout if not path or path == "-" else open(path, "w", encoding="utf-8", newline="")
+    except OSError as e:
+        print(f"❌ 创建导出文件失败: {e}")
+        return
+    try:
+        if fmt == "jsonl":
+            for record in records:
+                f.write(codec.dumps(record) + "\n")
+        elif fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({**record, "exchange_configs": format_exchange_configs(record["exchange_configs"])})
+        else:
+            f.write("&".join(format_env_account(record) for record in records) + "\n")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    if f is not sys.stdout:
+        print(f"✅ 已导出 {len(records)} 个账号到 {path}（注意：文件中包含登录凭证，请妥善保管）")
+
+# --- 凭证健康检查 ---
+
+def check_account(data: Dict[str, Any], limiter) -> Dict[str, Any]:
+    """获取会话 Cookie 后查询一次可兑换天数，判断 passToken 是否有效"""
+    from main import RNL, ApiRequest, open_session
+    from session import NETWORK, SessionError, check_credentials
+
+    result: Dict[str, Any] = {"status": "missing", "latency_ms": None, "total_days": None, "detail": ""}
+    try:
+        # 格式不对的凭证不发请求，也不占用限速配额
+        check_credentials(data.get("passToken"), data.get("userId"))
+    except SessionError as e:
+        result["detail"] = str(e).split("：", 1)[-1]
+        return result
+
+    limiter.acquire()
+    started = time.perf_counter()
+    try:
+        account_session = open_session(data["passToken"], data["userId"])
+    except SessionError as e:
+        if e.reason == NETWORK:
+            result.update(status="network_error", detail=str(e).split("：", 1)[-1])
+        else:
+            result.update(status="expired", detail="获取会话 Cookie 失败")
+        account_session = None
+
+    if account_session:
+        limiter.acquire()
+        api = ApiRequest(account_session.cookie_header)
+        rnl = RNL(api)
+        try:
+            if rnl.query_total_days():
+                result.update(status="valid", total_days=rnl.total_days_num)
+            elif api.last_error is not None:
+                result.update(status="network_error", detail=type(api.last_error).__name__)
+            else:
+                result.update(status="expired", detail=rnl.error_info)
+        finally:
+            api.session.close()
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000)
+    return result
+
+def check_accounts(workers: int, rate: float, write: bool) -> int:
+    """并发检查所有账号，打印结果表；有失效或网络错误的账号时返回 1"""
+    from eventlog import ERROR, console_sink, event_log
+    from scheduler import RateLimiter
+
+    accounts = load_accounts()
+    if accounts is None: return 1
+    if not accounts:
+        print("ℹ️  当前没有任何账号。")
+        return 0
+
+    # 结果统一在表格中展示，不输出单个请求的警告
+    event_log.set_level(console_sink, ERROR)
+    limiter = RateLimiter(rate)
+    started = time.perf_counter()
+    print(f"🔍 正在检查 {len(accounts)} 个账号（并发 {workers}，每秒最多 {rate:g} 个请求）...")
+    datas = [acc.get("data", {}) for acc in accounts]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(lambda data: check_account(data, limiter), datas))
+    elapsed = time.perf_counter() - started
+
+    print(f"{'别名':<16}{'状态':<12}{'耗时':>8}  可兑换天数 / 说明")
+    print("-" * 60)
+    for data, result in zip(datas, results):
+        latency = f"{result['latency_ms']} ms" if result["latency_ms"] is not None else "-"
+        detail = f"{result['total_days']:.2f}天" if result["status"] == "valid" else result["detail"]
+        print(f"{str(data.get('us', 'N/A')):<16}{CHECK_LABELS[result['status']]:<12}{latency:>8}  {detail}")
+    print("-" * 60)
+    counts = {status: sum(r["status"] == status for r in results) for status in CHECK_LABELS}
+    print(f"共 {len(results)} 个账号，用时 {elapsed:.1f} 秒：" + "，".join(
+        f"{CHECK_LABELS[status].split()[-1]} {count}" for status, count in counts.items() if count
+    ))
+
+    if write:
+        # 重新读取配置，只更新检查结果字段，避免覆盖检查期间的其他修改
+        checked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        health = {
+            data.get("us"): {"status": result["status"], "checked_at": checked_at, "latency_ms": result["latency_ms"]}
+            for data, result in zip(datas, results)
+        }
+        latest = load_accounts()
+        if latest is None: return 1
+        for acc in latest:
+            data = acc.get("data", {})
+            if data.get("us") in health:
+                data["health"] = health[data["us"]]
+        if save_accounts(latest):
+            print(f"✅ 检查结果已写入 {CONFIG_PATH}")
+
+    return 0 if counts["expired"] == counts["network_error"] == 0 else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="小米钱包账号管理")
+    subparsers = parser.add_subparsers(dest="command", metavar="<命令>")
+    subparsers.add_parser("list", help="查看所有已添加的账号")
+    delete_parser = subparsers.add_parser("delete", help="删除一个指定的账号")
+    delete_parser.add_argument("us", metavar="别名")
+    export_parser = subparsers.add_parser("export", help="导出账号")
+    export_parser.add_argument("path", nargs="?", metavar="文件", help="默认输出到标准输出")
+    export_parser.add_argument("--format", choices=FORMATS, help="默认按扩展名推断，标准输出为 jsonl")
+    import_parser = subparsers.add_parser("import", help="批量导入账号，已存在的别名会被更新")
+    import_source = import_parser.add_mutually_exclusive_group(required=True)
+    import_source.add_argument("path", nargs="?", metavar="文件", help="'-' 表示标准输入")
+    import_source.add_argument("--env", action="store_true", help="从环境变量 XIAOMI_ACCOUNTS 导入")
+    import_parser.add_argument("--format", choices=FORMATS, help="默认按扩展名推断，标准输入为 jsonl")
+    check_parser = subparsers.add_parser("check", help="并发检查所有账号的 passToken 是否仍有效")
+    check_parser.add_argument("--workers", type=int, default=CHECK_WORKERS, help=f"并发数，默认 {CHECK_WORKERS}")
+    check_parser.add_argument("--rate", type=float, default=CHECK_RATE, help=f"每秒最多请求数，默认 {CHECK_RATE:g}")
+    check_parser.add_argument("--write", action="store_true", help="把检查结果写入配置文件的 health 字段")
+    args = parser.parse_args()
+
+    if args.command == "list":
         list_accounts()
-    elif command == "delete":
-        if len(sys.argv) < 3:
-            print("❌ 错误: 'delete' 命令需要一个账号别名参数。")
-            print_usage()
-            return
-        us_to_delete = sys.argv[2]
-        delete_account(us_to_delete)
+    elif args.command == "delete":
+        delete_account(args.us)
+    elif args.command == "export":
+        export_accounts(args.path, args.format)
+    elif args.command == "import":
+        import_accounts(args.path, args.format, args.env)
+    elif args.command == "check":
+        sys.exit(check_accounts(args.workers, args.rate, args.write))
     else:
-        print(f"❌ 未知命令: '{command}'")
-        print_usage()
+        parser.print_help()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
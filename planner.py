@@ -0,0 +1,207 @@
+# planner.py
+
+"""
+执行计划（--plan 演练模式）。
+
+只调用只读接口（serviceLogin、queryUserGoldRichSum、getTaskList、getPrizeStatusV2）取得账号当前状态，
+据此推演一次真实执行会按什么顺序发出哪些请求、其中哪些会改变账号状态（完成任务、领奖、兑换），
+以及中间的固定等待，估算每个账号和整批账号的耗时。
+
+演练本身不完成任务、不领奖、不兑换，也不写配置文件和结果存储。
+main.py 和 3.0 脚本的流程相同但等待时间不同，各自传入 WorkflowTimings。
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from records import Membership
+from scheduler import assign_offsets
+
+
+@dataclass(frozen=True, slots=True)
+class WorkflowTimings:
+    """工作流中的等待时间（秒），区间按平均值估算。"""
+    new_user_award: float = 9.0  # 完成应用下载试用后 2 秒 + 领取前 5 秒 + 领取后 2 秒
+    before_complete: Tuple[float, float] = (10, 15)
+    after_complete: Tuple[float, float] = (2, 4)
+    after_get_task: Tuple[float, float] = (2, 4)
+    after_award: Tuple[float, float] = (2, 4)
+    between_exchanges: float = 2.0
+    browse_rounds: int = 2
+    # 没有浏览任务时 main.py 直接结束循环，3.0 脚本会继续查询下一轮
+    stop_when_no_tasks: bool = True
+    # 单次请求的估计耗时
+    request_seconds: float = 0.5
+
+
+# main.py / GUI 使用的等待时间
+MAIN_TIMINGS = WorkflowTimings()
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedStep:
+    """计划中的一次请求。wait 为请求前后的固定等待之和。"""
+    endpoint: str
+    mutating: bool
+    wait: float = 0.0
+    conditional: bool = False  # 是否发出取决于前一步的响应
+    note: str = ''
+
+
+def _mean(value) -> float:
+    return (value[0] + value[1]) / 2 if isinstance(value, tuple) else float(value)
+
+
+@dataclass(slots=True)
+class AccountPlan:
+    """一个账号的执行计划。"""
+    us: str
+    balance: Optional[float] = None
+    task_count: int = 0
+    steps: List[PlannedStep] = field(default_factory=list)
+    exchanges: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    request_seconds: float = MAIN_TIMINGS.request_seconds
+    # 不伴随请求的等待
+    idle_seconds: float = 0.0
+
+    def _certain(self) -> List[PlannedStep]:
+        return [step for step in self.steps if not step.conditional]
+
+    @property
+    def requests(self) -> int:
+        return len(self._certain())
+
+    @property
+    def mutating(self) -> int:
+        return sum(1 for step in self._certain() if step.mutating)
+
+    @property
+    def conditional(self) -> int:
+        return len(self.steps) - self.requests
+
+    @property
+    def sleep_seconds(self) -> float:
+        return self.idle_seconds + sum(step.wait for step in self._certain())
+
+    @property
+    def expected_seconds(self) -> float:
+        return self.sleep_seconds + self.requests * self.request_seconds
+
+    def describe(self) -> str:
+        if self.error:
+            return f"❌ {self.us}: {self.error}（实际执行时不会继续发出请求）"
+        lines = [
+            f"📋 {self.us}: 余额 {self.balance:.2f}天，可做浏览任务 {self.task_count} 个，"
+            f"{self.requests} 次请求（其中 {self.mutating} 次写操作，另有 {self.conditional} 次视响应而定），"
+            f"预计 {self.expected_seconds:.0f} 秒"
+        ]
+        for index, step in enumerate(self.steps, 1):
+            flags = ('写' if step.mutating else '读') + ('?' if step.conditional else ' ')
+            wait = f" +{step.wait:.0f}s" if step.wait else ''
+            note = f"  # {step.note}" if step.note else ''
+            lines.append(f"   {index:>2}. [{flags}] {step.endpoint}{wait}{note}")
+        for exchange in self.exchanges:
+            lines.append(f"   💎 {exchange}")
+        return "\n".join(lines)
+
+
+def failed_plan(us: str, error: str, requests: int = 1) -> AccountPlan:
+    """无法执行的账号：配置不完整时不发请求，会话获取失败时只有一次 serviceLogin。"""
+    return AccountPlan(us, error=error, steps=[PlannedStep('serviceLogin', False)] * requests)
+
+
+def pick_membership(memberships: Sequence[Membership], config_type: str) -> Optional[Membership]:
+    """按兑换时的规则为配置的会员类型挑选会员：直接兑换 > 今日有库存 > 消耗 31 天。"""
+    candidates = [membership for membership in memberships if membership.matches(config_type)]
+    return max(candidates, key=Membership.priority) if candidates else None
+
+
+def build_plan(
+    us: str,
+    balance: float,
+    task_count: int,
+    memberships: Sequence[Membership],
+    exchange_configs: List[Dict[str, Any]],
+    timings: WorkflowTimings = MAIN_TIMINGS,
+) -> AccountPlan:
+    """按当前状态推演一次完整执行。"""
+    plan = AccountPlan(us, balance=balance, task_count=task_count, request_seconds=timings.request_seconds)
+    steps = plan.steps
+    steps.append(PlannedStep('serviceLogin', False, note='获取会话 Cookie'))
+    steps.append(PlannedStep('queryUserGoldRichSum', False))
+    steps.append(PlannedStep('queryUserJoinList', False))
+
+    steps.append(PlannedStep('completeTask', True, note='应用下载试用'))
+    steps.append(PlannedStep('luckDraw', True, wait=timings.new_user_award, conditional=True,
+                             note='应用下载试用可完成时领奖'))
+
+    rounds = min(timings.browse_rounds, task_count)
+    for _ in range(rounds):
+        steps.append(PlannedStep('getTaskList', False, wait=_mean(timings.before_complete)))
+        steps.append(PlannedStep('completeTask', True, wait=_mean(timings.after_complete), note='浏览任务'))
+        steps.append(PlannedStep('getTask', True, wait=_mean(timings.after_get_task), conditional=True,
+                                 note='completeTask 未返回 userTaskId 时'))
+        steps.append(PlannedStep('luckDraw', True, wait=_mean(timings.after_award)))
+    if rounds < timings.browse_rounds:
+        empty_rounds = 1 if timings.stop_when_no_tasks else timings.browse_rounds - rounds
+        for _ in range(empty_rounds):
+            steps.append(PlannedStep('getTaskList', False, note='没有剩余浏览任务'))
+
+    steps.append(PlannedStep('queryUserGoldRichSum', False))
+    steps.append(PlannedStep('queryUserJoinList', False))
+
+    if exchange_configs:
+        steps.append(PlannedStep('getPrizeStatusV2', False))
+        # 按当前余额估算，今天任务获得的天数不计入
+        remaining = balance
+        for config in exchange_configs:
+            membership = pick_membership(memberships, config.get('type', ''))
+            if membership is None or not membership.available:
+                reason = '未找到匹配的会员' if membership is None else f'{membership.name} 今日无库存'
+                plan.exchanges.append(f"跳过 {config.get('type')}：{reason}")
+                continue
+            if remaining >= membership.cost_days:
+                remaining -= membership.cost_days
+                steps.append(PlannedStep('convertGoldRich', True, wait=timings.between_exchanges,
+                                         note=f"兑换 {membership.name} -> {config.get('phone')}"))
+                plan.exchanges.append(f"兑换 {membership.name}（{membership.cost_days:.2f}天）")
+            else:
+                plan.exchanges.append(f"跳过 {membership.name}：需要 {membership.cost_days:.2f}天，余额 {remaining:.2f}天")
+                # 天数不足时不发请求，但同样等待兑换间隔
+                plan.idle_seconds += timings.between_exchanges
+    return plan
+
+
+def estimate_makespan(plans: List[AccountPlan], keys: List[str], window_seconds: float, max_workers: int) -> float:
+    """
+    模拟 run_staggered：各账号在错峰偏移处就绪，由最多 max_workers 个线程按就绪顺序执行，
+    返回从窗口开始到最后一个账号结束的秒数。
+    """
+    offsets = assign_offsets(keys, window_seconds)
+    ready = sorted((offsets[key], plan.expected_seconds) for key, plan in zip(keys, plans))
+    workers = [0.0] * max(1, max_workers)
+    finish = 0.0
+    for offset, duration in ready:
+        start = max(offset, heapq.heappop(workers))
+        heapq.heappush(workers, start + duration)
+        finish = max(finish, start + duration)
+    return finish
+
+
+def format_summary(plans: List[AccountPlan], makespan: float, window_seconds: float, max_workers: int) -> str:
+    """整批账号的汇总估算。"""
+    ok = [plan for plan in plans if not plan.error]
+    exchanges = sum(1 for plan in ok for step in plan.steps if step.endpoint == 'convertGoldRich')
+    lines = [
+        "======= 执行计划汇总 =======",
+        f"账号: {len(plans)} 个（可执行 {len(ok)} 个，无法执行 {len(plans) - len(ok)} 个）",
+        f"请求: {sum(p.requests for p in plans)} 次"
+        f"（写操作 {sum(p.mutating for p in ok)} 次，视响应而定 {sum(p.conditional for p in ok)} 次）",
+        f"会员兑换: {exchanges} 次",
+        f"等待: 合计 {sum(p.sleep_seconds for p in ok):.0f} 秒",
+        f"单账号耗时: 最长 {max((p.expected_seconds for p in ok), default=0):.0f} 秒",
+        f"整批预计耗时: {makespan:.0f} 秒（错峰窗口 {window_seconds:.0f} 秒，最多 {max_workers} 个并发）",
+    ]
+    return "\n".join(lines)
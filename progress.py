@@ -0,0 +1,178 @@
+# progress.py
+
+"""
+执行进度事件总线。
+
+eventlog 记录给人看的日志行，这里发布的是给界面用的结构化状态变化：
+- account.started / account.finished: 账号开始、结束（success、error）
+- step.started / step.finished: 工作流步骤开始、结束（step、ok）
+- sleep: 进入固定等待（until 为结束时间戳）
+- request: 一次接口请求完成（endpoint、latency_ms、ok）
+
+没有订阅者时 publish() 直接返回，几乎没有开销。订阅者在发布者线程中同步调用，应当只做轻量的状态更新。
+
+ProgressBoard 订阅总线并按账号合并事件：同一账号在两次 drain() 之间的多次变化只返回一次最新状态，
+界面按固定间隔取出有变化的行增量更新，并发执行上百个账号时刷新频率也与事件数量无关。
+"""
+
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from eventlog import current_account
+
+ACCOUNT_STARTED = 'account.started'
+ACCOUNT_FINISHED = 'account.finished'
+STEP_STARTED = 'step.started'
+STEP_FINISHED = 'step.finished'
+SLEEP = 'sleep'
+REQUEST = 'request'
+
+# 账号状态
+WAITING = 'waiting'
+RUNNING = 'running'
+SLEEPING = 'sleeping'
+DONE = 'done'
+FAILED = 'failed'
+STATE_LABELS = {
+    WAITING: '⏳ 等待',
+    RUNNING: '🔄 执行中',
+    SLEEPING: '💤 等待中',
+    DONE: '✅ 完成',
+    FAILED: '❌ 失败',
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressEvent:
+    kind: str
+    account: Optional[str]
+    ts: float
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+class ProgressBus:
+    """线程安全的发布/订阅总线。"""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[ProgressEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> Callable[[ProgressEvent], None]:
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback: Callable[[ProgressEvent], None]) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not callback]
+
+    def publish(self, kind: str, account: Optional[str] = None, **fields: Any) -> None:
+        """发布事件，account 默认取 bind_account 绑定的账号。"""
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = ProgressEvent(kind, account or current_account(), time.time(), fields)
+        for callback in subscribers:
+            callback(event)
+
+
+@dataclass(slots=True)
+class AccountProgress:
+    """一个账号的当前进度。"""
+    us: str
+    state: str = WAITING
+    step: str = ''
+    steps_done: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+    latency_total_ms: float = 0.0
+    sleep_until: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def avg_latency_ms(self) -> Optional[float]:
+        return self.latency_total_ms / self.requests if self.requests else None
+
+    def sleep_remaining(self, now: Optional[float] = None) -> float:
+        if self.state != SLEEPING or self.sleep_until is None:
+            return 0.0
+        return max(0.0, self.sleep_until - (now or time.time()))
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or now or time.time()) - self.started_at
+
+
+class ProgressBoard:
+    """订阅总线，按账号汇总进度；drain() 只返回上次取出后有变化的账号。"""
+
+    def __init__(self, accounts: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, AccountProgress] = {}
+        self._dirty: Dict[str, None] = {}
+        for us in accounts:
+            self._row(us)
+
+    def _row(self, us: str) -> AccountProgress:
+        row = self._rows.get(us)
+        if row is None:
+            row = self._rows[us] = AccountProgress(us)
+        self._dirty[us] = None
+        return row
+
+    def __call__(self, event: ProgressEvent) -> None:
+        if event.account is None:
+            return
+        fields = event.fields
+        with self._lock:
+            row = self._row(event.account)
+            if event.kind == ACCOUNT_STARTED:
+                row.state, row.started_at, row.finished_at, row.error = RUNNING, event.ts, None, None
+            elif event.kind == ACCOUNT_FINISHED:
+                row.state = DONE if fields.get('success') else FAILED
+                row.finished_at, row.error, row.sleep_until = event.ts, fields.get('error'), None
+                row.step = ''
+            elif event.kind == STEP_STARTED:
+                row.state, row.step, row.sleep_until = RUNNING, fields.get('step', ''), None
+            elif event.kind == STEP_FINISHED:
+                row.steps_done += 1
+            elif event.kind == SLEEP:
+                row.state, row.sleep_until = SLEEPING, fields.get('until')
+            elif event.kind == REQUEST:
+                row.requests += 1
+                row.latency_total_ms += fields.get('latency_ms') or 0.0
+                if not fields.get('ok', True):
+                    row.failed_requests += 1
+                if row.state == SLEEPING:
+                    row.state, row.sleep_until = RUNNING, None
+
+    def drain(self) -> List[AccountProgress]:
+        """取出有变化的账号（副本）；等待中的账号每次都返回以便刷新倒计时。"""
+        now = time.time()
+        with self._lock:
+            for us, row in self._rows.items():
+                if row.state == SLEEPING:
+                    if row.sleep_until is not None and now >= row.sleep_until:
+                        row.state, row.sleep_until = RUNNING, None
+                    self._dirty[us] = None
+            changed = [dataclasses.replace(self._rows[us]) for us in self._dirty]
+            self._dirty.clear()
+        return changed
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的账号数。"""
+        with self._lock:
+            counts = {state: 0 for state in STATE_LABELS}
+            for row in self._rows.values():
+                counts[row.state] += 1
+            return counts
+
+
+# 进程内共用的进度总线
+progress_bus = ProgressBus()
@@ -0,0 +1,252 @@
+# records.py
+
+"""
+任务结果与会员信息的记录模型。
+
+RNL、GUI 和 3.0 脚本之间原先用手写字典传递会员信息、奖励记录和兑换结果，
+这里统一为带 __slots__ 的数据类：
+- Membership: getPrizeStatusV2 返回的一个可兑换会员
+- TaskRecord: queryUserJoinList 返回的一条奖励记录
+- ExchangeResult: 一次会员兑换的结果
+- AccountRunResult: 一个账号一次执行的完整结果，执行日志按模板和参数保存，
+  只在查看或写入结果存储时才格式化。
+
+to_dict()/from_dict() 是写入和读取结果存储时使用的唯一格式，读取时会校验字段类型。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 结果存储的格式版本，没有该字段的旧日志按版本 0 读取
+SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class Membership:
+    """一个可兑换的会员月卡。"""
+    id: str  # prizeCode，兑换接口使用
+    prize_id: str
+    name: str
+    brand: str
+    cost_days: float = 31.0
+    description: str = ''
+    status: str = 'available'  # available / out_of_stock
+    exchange_type: str = 'direct'
+    stock: int = 0
+    need_gold_rice: int = 0
+    prize_batch_id: str = ''
+    prize_type: int = 0
+
+    @classmethod
+    def from_prize(cls, prize: Dict[str, Any]) -> 'Membership':
+        """由 getPrizeStatusV2 返回的奖品数据构造。"""
+        need_gold_rice = prize.get('needGoldRice', 0)
+        return cls(
+            id=prize.get('prizeCode', ''),
+            prize_id=prize.get('prizeId'),
+            name=prize.get('prizeName', ''),
+            brand=prize.get('prizeBrand', ''),
+            cost_days=float(need_gold_rice) / 100.0,
+            description=prize.get('prizeDesc', ''),
+            status='available' if prize.get('todayStockStatus', 0) == 1 else 'out_of_stock',
+            stock=prize.get('stockStatus', 0),
+            need_gold_rice=need_gold_rice,
+            prize_batch_id=prize.get('prizeBatchId', ''),
+            prize_type=prize.get('prizeType', 0),
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.status == 'available'
+
+    def matches(self, config_type: str) -> bool:
+        """判断是否匹配用户配置的会员类型（品牌或名称互相包含即可）。"""
+        brand_match = config_type.lower() in self.brand.lower() or self.brand.lower() in config_type.lower()
+        name_match = config_type in self.name or self.name in config_type
+        return brand_match or name_match
+
+    def priority(self) -> int:
+        """优先级：直接兑换 > 今日有库存 > 消耗天数为31天。"""
+        score = 0
+        if self.exchange_type == 'direct':
+            score += 1000
+        if self.available:
+            score += 100
+        if self.cost_days == 31.0:
+            score += 10
+        return score
+
+
+# 接口不可用时使用的预定义会员列表
+PREDEFINED_MEMBERSHIPS: Tuple[Membership, ...] = (
+    Membership('tencent_video_month', 'tencent_month', '腾讯视频VIP月卡', 'tencent',
+               description='腾讯视频VIP月卡', stock=999, prize_batch_id='LSXD_PRIZE1263'),
+    Membership('iqiyi_month', 'iqiyi_month', '爱奇艺黄金会员月卡', 'iqiyi',
+               description='爱奇艺黄金会员月卡', stock=999, prize_batch_id='LSXD_PRIZE1267'),
+    Membership('youku_month', 'youku_month', '优酷VIP会员月卡', 'youku',
+               description='优酷VIP会员月卡', stock=999, prize_batch_id='LSXD_PRIZE1262'),
+    Membership('mgtv_month', 'mgtv_month', '芒果TV会员月卡', 'mgtv',
+               description='芒果TV月卡', stock=999, prize_batch_id='LSXD_PRIZE1264'),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TaskRecord:
+    """一条奖励记录，value 以 1/100 天为单位。"""
+    create_time: str
+    value: int
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> 'TaskRecord':
+        return cls(item.get('createTime', '未知时间'), int(item.get('value', 0)))
+
+    @property
+    def days(self) -> float:
+        return self.value / 100
+
+    @property
+    def date(self) -> str:
+        return self.create_time[:10]
+
+    def describe(self) -> str:
+        return f"{self.create_time} 领到视频会员，+{self.days:.2f}天"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'createTime': self.create_time, 'value': self.value}
+
+
+@dataclass(frozen=True, slots=True)
+class ExchangeResult:
+    """一次会员兑换的结果。"""
+    type: str
+    phone: str
+    success: bool
+    message: str
+    cost_days: Optional[float] = None
+
+    def describe(self) -> str:
+        return f"{'✅' if self.success else '❌'} {self.type} -> {self.phone}: {self.message}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'type': self.type, 'phone': self.phone, 'success': self.success, 'message': self.message}
+        if self.cost_days is not None:
+            data['cost_days'] = self.cost_days
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExchangeResult':
+        _check_fields(data, EXCHANGE_RESULT_FIELDS, 'exchange_results')
+        return cls(data['type'], data['phone'], data['success'], data['message'], data.get('cost_days'))
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass(slots=True)
+class AccountRunResult:
+    """一个账号一次执行的完整结果。"""
+    us: str
+    user_id: Optional[str] = None
+    start_time: str = field(default_factory=_now)
+    end_time: Optional[str] = None
+    success: bool = False
+    error: Optional[str] = None
+    total_days: Optional[float] = None
+    exchange_configs: List[Dict[str, Any]] = field(default_factory=list)
+    today_records: List[TaskRecord] = field(default_factory=list)
+    exchange_results: List[ExchangeResult] = field(default_factory=list)
+    # (模板, 参数)，参数为空时模板原样输出
+    log_entries: List[Tuple[str, Tuple[Any, ...]]] = field(default_factory=list, repr=False)
+    # 未能建立会话时的 session.SessionError，只用于本次批量执行的汇总，不写入结果存储
+    session_error: Optional[Exception] = field(default=None, repr=False, compare=False)
+
+    def log(self, template: str, *args: Any) -> None:
+        """追加一行日志，格式化推迟到读取 logs 时进行。"""
+        self.log_entries.append((template, args))
+
+    @property
+    def logs(self) -> List[str]:
+        return [template.format(*args) if args else template for template, args in self.log_entries]
+
+    def text(self) -> str:
+        return "\n".join(self.logs)
+
+    @property
+    def total_days_text(self) -> str:
+        return f"{self.total_days:.2f}天" if self.total_days is not None else "未知"
+
+    def finish(self) -> None:
+        self.end_time = _now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'schema': SCHEMA_VERSION,
+            'us': self.us,
+            'user_id': self.user_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'success': self.success,
+            'error': self.error,
+            'total_days': self.total_days,
+            'exchange_configs': self.exchange_configs,
+            'today_records': [record.to_dict() for record in self.today_records],
+            'exchange_results': [result.to_dict() for result in self.exchange_results],
+            'logs': self.logs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AccountRunResult':
+        """从结果存储读取，字段缺失或类型不符时抛出 ValueError。"""
+        if not isinstance(data, dict):
+            raise ValueError(f"执行结果应为对象，实际为 {type(data).__name__}")
+        if data.get('schema', 0) > SCHEMA_VERSION:
+            raise ValueError(f"不支持的执行结果格式版本：{data.get('schema')}")
+        _check_fields(data, ACCOUNT_RUN_RESULT_FIELDS, '执行结果')
+        return cls(
+            us=data['us'],
+            user_id=data.get('user_id'),
+            start_time=data['start_time'],
+            end_time=data.get('end_time'),
+            success=data.get('success', False),
+            error=data.get('error'),
+            total_days=data.get('total_days'),
+            exchange_configs=data.get('exchange_configs') or [],
+            today_records=[TaskRecord.from_api(item) for item in data.get('today_records') or []],
+            exchange_results=[ExchangeResult.from_dict(item) for item in data.get('exchange_results') or []],
+            log_entries=[(line, ()) for line in data['logs']],
+        )
+
+
+# 字段名 -> (允许的类型, 是否必填)
+EXCHANGE_RESULT_FIELDS = {
+    'type': (str, True),
+    'phone': (str, True),
+    'success': (bool, True),
+    'message': (str, True),
+    'cost_days': ((int, float), False),
+}
+ACCOUNT_RUN_RESULT_FIELDS = {
+    'us': (str, True),
+    'user_id': ((str, int, type(None)), False),
+    'start_time': (str, True),
+    'end_time': ((str, type(None)), False),
+    'success': (bool, False),
+    'error': ((str, type(None)), False),
+    'total_days': ((int, float, type(None)), False),
+    'exchange_configs': ((list, type(None)), False),
+    'today_records': ((list, type(None)), False),
+    'exchange_results': ((list, type(None)), False),
+    'logs': (list, True),
+}
+
+
+def _check_fields(data: Dict[str, Any], fields: Dict[str, Tuple[Any, bool]], name: str) -> None:
+    for key, (types, required) in fields.items():
+        if key not in data:
+            if required:
+                raise ValueError(f"{name}缺少字段 '{key}'")
+            continue
+        if not isinstance(data[key], types):
+            raise ValueError(f"{name}字段 '{key}' 类型错误：{type(data[key]).__name__}")
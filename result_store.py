@@ -0,0 +1,279 @@
+# result_store.py
+
+"""
+本地执行结果存储。
+
+每个账号每次执行的结果保存为 task_logs/<日期>/<账号别名>_<时-分-秒-微秒>.json，
+GUI、main.py 和常驻进程共用同一目录。写入和读取都经过 AccountRunResult 的格式校验。
+
+每个账号领到的奖励记录按时间升序追加到 task_logs/records/<账号别名>.jsonl，
+最后一条记录即增量同步的水位线，读取最近的记录时从文件末尾倒着读。
+
+latest_runs()/succeeded_on() 供 main.py 的 --failed-last-run、--not-done-today 和 GUI 的账号勾选使用，
+只读取每个账号最新的结果文件或当天的目录。
+
+工作流每个步骤的状态按账号保存在 task_logs/steps/<账号别名>.json，只保留当天的记录，
+同一天再次执行时据此跳过已完成的非幂等步骤，见 workflow.py。
+
+RunCache 是 GUI 使用的有界缓存：结果以文件路径为 id，只在内存中保留最近访问的 RUN_CACHE_SIZE 个，
+其余在查看详情时按 id 从磁盘重新读取，GUI 长时间运行内存也不会随执行次数增长。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import codec
+from records import AccountRunResult, TaskRecord
+
+LOG_PATH = "task_logs"
+RECORDS_DIR = "records"
+STEPS_DIR = "steps"
+# RunCache 默认在内存中保留的结果数
+RUN_CACHE_SIZE = 50
+
+
+def save_run(result: AccountRunResult, base_dir: str = LOG_PATH) -> str:
+    """
+    保存一次执行结果，返回文件路径。
+    同一账号可能同时执行（GUI 单账号运行与一键运行、常驻进程与命令行），文件名精确到微秒，
+    并以独占方式创建，重名时追加序号，不会覆盖已有的结果。
+    """
+    now = datetime.now()
+    date_dir = Path(base_dir) / now.strftime('%Y-%m-%d')
+    date_dir.mkdir(parents=True, exist_ok=True)
+    data = result.to_dict()
+    # 写入前按读取时的规则校验一遍，避免写出日后无法加载的文件
+    AccountRunResult.from_dict(data)
+    # 结果文件只给程序读取，使用紧凑格式
+    text = codec.dumps(data)
+    stem = f"{result.us}_{now.strftime('%H-%M-%S-%f')}"
+    suffix = 0
+    while True:
+        path = date_dir / (f"{stem}.json" if suffix == 0 else f"{stem}-{suffix}.json")
+        try:
+            with open(path, 'x', encoding='utf-8') as f:
+                f.write(text)
+            return str(path)
+        except FileExistsError:
+            suffix += 1
+
+
+def load_run(path: str) -> AccountRunResult:
+    """读取一个结果文件，格式错误时抛出 ValueError。"""
+    try:
+        data = codec.load_file(path)
+    except codec.JSONDecodeError as e:
+        raise ValueError(f"JSON 解析失败：{e}")
+    return AccountRunResult.from_dict(data)
+
+
+def list_dates(base_dir: str = LOG_PATH) -> List[str]:
+    """返回存储中的日期目录，按日期倒序。"""
+    if not os.path.isdir(base_dir):
+        return []
+    dates = []
+    for name in os.listdir(base_dir):
+        if not os.path.isdir(os.path.join(base_dir, name)):
+            continue
+        try:
+            datetime.strptime(name, '%Y-%m-%d')
+        except ValueError:
+            continue
+        dates.append(name)
+    return sorted(dates, reverse=True)
+
+
+def list_run_files(date: str, base_dir: str = LOG_PATH) -> List[str]:
+    """返回某一天的结果文件路径，按文件名（不含扩展名，重名序号排在原文件之后）倒序。"""
+    date_dir = os.path.join(base_dir, date)
+    return sorted(
+        (os.path.join(date_dir, name) for name in os.listdir(date_dir) if name.endswith('.json')),
+        key=lambda path: path[:-len('.json')],
+        reverse=True,
+    )
+
+
+def iter_runs(base_dir: str = LOG_PATH) -> Iterator[Tuple[str, List[str]]]:
+    """按日期倒序产出 (日期, 当天的结果文件列表)。"""
+    for date in list_dates(base_dir):
+        yield date, list_run_files(date, base_dir)
+
+
+def run_file_account(path: str) -> str:
+    """由结果文件名 <账号别名>_<时间>.json 取出账号别名（时间中不含下划线）。"""
+    return os.path.basename(path)[:-len('.json')].rsplit('_', 1)[0]
+
+
+def latest_runs(accounts: Optional[Iterable[str]] = None, base_dir: str = LOG_PATH) -> Dict[str, AccountRunResult]:
+    """
+    返回每个账号最近一次的执行结果。
+    按日期和文件名倒序扫描，每个账号只读取最新的一个有效文件；给出 accounts 时全部找到后提前结束。
+    """
+    wanted = set(accounts) if accounts is not None else None
+    latest: Dict[str, AccountRunResult] = {}
+    for _, paths in iter_runs(base_dir):
+        for path in paths:
+            us = run_file_account(path)
+            if us in latest or (wanted is not None and us not in wanted):
+                continue
+            try:
+                latest[us] = load_run(path)
+            except (OSError, ValueError):
+                # 损坏的文件跳过，继续找该账号更早的结果
+                continue
+        if wanted is not None and wanted <= set(latest):
+            break
+    return latest
+
+
+def succeeded_on(date: str, base_dir: str = LOG_PATH) -> Set[str]:
+    """返回在指定日期（YYYY-MM-DD）至少成功执行过一次的账号。"""
+    if not os.path.isdir(os.path.join(base_dir, date)):
+        return set()
+    succeeded = set()
+    for path in list_run_files(date, base_dir):
+        us = run_file_account(path)
+        if us in succeeded:
+            continue
+        try:
+            if load_run(path).success:
+                succeeded.add(us)
+        except (OSError, ValueError):
+            continue
+    return succeeded
+
+
+class RunCache:
+    """按结果 id（结果文件路径）缓存执行结果的 LRU，未命中时用 loader 从磁盘读取。"""
+
+    def __init__(self, capacity: int = RUN_CACHE_SIZE, loader: Callable[[str], AccountRunResult] = load_run):
+        self.capacity = max(1, capacity)
+        self._loader = loader
+        self._items: 'OrderedDict[str, AccountRunResult]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, run_id: str, result: AccountRunResult) -> None:
+        with self._lock:
+            self._items[run_id] = result
+            self._items.move_to_end(run_id)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def get(self, run_id: str) -> AccountRunResult:
+        """取出结果，不在内存中时从磁盘读取；文件不存在或格式错误时抛出 OSError / ValueError。"""
+        with self._lock:
+            result = self._items.get(run_id)
+            if result is not None:
+                self._items.move_to_end(run_id)
+                return result
+        result = self._loader(run_id)
+        self.put(run_id, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+def records_path(us: str, base_dir: str = LOG_PATH) -> str:
+    return os.path.join(base_dir, RECORDS_DIR, f"{us}.jsonl")
+
+
+def _iter_lines_reversed(path: str, block_size: int = 4096) -> Iterator[bytes]:
+    """从文件末尾开始逐行倒序产出（不含换行符）。"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b'\n')
+            # 第一段可能是被块边界截断的行，留到下一块拼接
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if remainder.strip():
+            yield remainder
+
+
+def iter_recent_records(us: str, base_dir: str = LOG_PATH) -> Iterator[TaskRecord]:
+    """从最新到最早产出账号已保存的奖励记录。"""
+    path = records_path(us, base_dir)
+    if not os.path.isfile(path):
+        return
+    for line in _iter_lines_reversed(path):
+        try:
+            yield TaskRecord.from_api(codec.loads(line))
+        except (codec.JSONDecodeError, ValueError, TypeError):
+            continue
+
+
+def load_records_since(us: str, since: str, base_dir: str = LOG_PATH) -> List[TaskRecord]:
+    """返回 createTime 不早于 since（日期或时间前缀）的记录，按时间升序。"""
+    records = []
+    for record in iter_recent_records(us, base_dir):
+        if record.create_time < since:
+            break
+        records.append(record)
+    records.reverse()
+    return records
+
+
+def record_watermark(us: str, base_dir: str = LOG_PATH) -> Optional[Tuple[str, int]]:
+    """
+    返回 (最新记录的 createTime, 该时间的记录条数)，没有记录时返回 None。
+    同一秒可能有多条记录，只靠时间无法判断哪些已经保存过，因此一并记录条数。
+    """
+    latest = None
+    count = 0
+    for record in iter_recent_records(us, base_dir):
+        if latest is None:
+            latest = record.create_time
+        elif record.create_time != latest:
+            break
+        count += 1
+    return (latest, count) if latest is not None else None
+
+
+def append_records(us: str, records: List[TaskRecord], base_dir: str = LOG_PATH) -> None:
+    """按时间升序追加奖励记录。"""
+    if not records:
+        return
+    path = records_path(us, base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(codec.dumps(record.to_dict()) + '\n' for record in sorted(records, key=lambda r: r.create_time)))
+
+
+def step_state_path(us: str, base_dir: str = LOG_PATH) -> str:
+    return os.path.join(base_dir, STEPS_DIR, f"{us}.json")
+
+
+def load_step_state(us: str, date: str, base_dir: str = LOG_PATH) -> Dict[str, Dict[str, Any]]:
+    """返回账号在指定日期保存的步骤状态（步骤名 -> 状态），没有或已过期时返回空字典。"""
+    try:
+        data = codec.load_file(step_state_path(us, base_dir))
+    except (OSError, codec.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get('date') != date or not isinstance(data.get('steps'), dict):
+        return {}
+    return data['steps']
+
+
+def save_step_state(us: str, date: str, steps: Dict[str, Dict[str, Any]], base_dir: str = LOG_PATH) -> None:
+    """覆盖保存账号当天的步骤状态；先写临时文件再替换，中途退出不会留下半个文件。"""
+    path = step_state_path(us, base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    codec.dump_file(temp_path, {'date': date, 'steps': steps})
+    os.replace(temp_path, path)
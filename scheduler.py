@@ -0,0 +1,187 @@
+# scheduler.py
+
+"""
+账号执行时间编排。
+
+把一批账号的启动时间分散到一个可配置的时间窗口内：
+窗口被均分为与账号数相同的时间槽，每个账号落在自己的槽内，
+槽内的具体位置由 "日期 + 账号别名" 决定的随机数给出，
+因此同一天内重复编排得到的时间一致，不同日期之间又各不相同。
+
+run_staggered() 在此基础上用一个时间轮按偏移触发各账号的任务，
+并交给线程池并发执行，总耗时约为 "窗口长度 + 单个账号耗时"，
+而不是所有账号耗时与等待时间之和。
+
+RateLimiter 是一个线程安全的令牌桶，用于限制批量探测等并发请求的总频率。
+"""
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def parse_clock(value: str) -> Tuple[int, int]:
+    """解析 'HH:MM' 格式的时间，返回 (时, 分)。"""
+    try:
+        hour_str, minute_str = value.strip().split(':', 1)
+        hour, minute = int(hour_str), int(minute_str)
+    except ValueError:
+        raise ValueError(f"时间格式应为 HH:MM，实际为 '{value}'")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"时间超出范围：'{value}'")
+    return hour, minute
+
+
+def window_start_for(day: datetime, start_clock: str) -> datetime:
+    """返回指定日期的窗口开始时间。"""
+    hour, minute = parse_clock(start_clock)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def next_window_start(now: datetime, start_clock: str, window_seconds: float) -> datetime:
+    """返回尚未结束的最近一个窗口的开始时间（今天的窗口已结束则为明天）。"""
+    start = window_start_for(now, start_clock)
+    if now >= start + timedelta(seconds=window_seconds):
+        start = window_start_for(now + timedelta(days=1), start_clock)
+    return start
+
+
+def assign_offsets(keys: List[str], window_seconds: float, day: Optional[str] = None) -> Dict[str, float]:
+    """
+    为每个账号分配窗口内的启动偏移（秒）。
+    相同的 day 与 keys 总是得到相同的结果。
+    """
+    if not keys:
+        return {}
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    slot = window_seconds / len(keys)
+    # 用确定性的随机顺序分配时间槽，避免账号总是按配置文件顺序执行
+    order = sorted(keys, key=lambda key: random.Random(f"{day}:order:{key}").random())
+    return {
+        key: index * slot + random.Random(f"{day}:jitter:{key}").uniform(0, slot)
+        for index, key in enumerate(order)
+    }
+
+
+def build_schedule(keys: List[str], start: datetime, window_seconds: float) -> List[Tuple[datetime, str]]:
+    """返回按时间排序的 (执行时间, 账号) 列表。"""
+    offsets = assign_offsets(keys, window_seconds, start.strftime("%Y-%m-%d"))
+    return sorted(
+        (start + timedelta(seconds=offset), key) for key, offset in offsets.items()
+    )
+
+
+class TimerWheel:
+    """
+    简单的哈希时间轮：每个槽位对应一个 tick，超过一圈的任务记录剩余圈数。
+    由调用方线程驱动，到期的回调在驱动线程中执行，回调应尽快返回。
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64):
+        self.tick = tick
+        self.slots: List[List[List[Any]]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        """在 delay 秒之后（按 tick 向上取整）触发 callback。"""
+        ticks = max(0, math.ceil(delay / self.tick))
+        with self._lock:
+            rounds, offset = divmod(ticks, len(self.slots))
+            self.slots[(self.cursor + offset) % len(self.slots)].append([rounds, callback])
+            self.pending += 1
+
+    def advance(self) -> List[Callable[[], None]]:
+        """处理当前槽位并前进一个 tick，返回到期的回调。"""
+        with self._lock:
+            slot = self.slots[self.cursor]
+            due = [entry[1] for entry in slot if entry[0] == 0]
+            slot[:] = [[rounds - 1, callback] for rounds, callback in slot if rounds > 0]
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            self.pending -= len(due)
+        return due
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """按 tick 驱动时间轮直到所有回调都已触发（或 stop_event 被设置）。"""
+        next_tick = time.monotonic()
+        while self.pending:
+            for callback in self.advance():
+                callback()
+            if not self.pending:
+                break
+            next_tick += self.tick
+            delay = max(0.0, next_tick - time.monotonic())
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return
+            else:
+                time.sleep(delay)
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶：平均每秒放行 rate 次，空闲时最多积攒 burst 次。
+    令牌不足时调用方预约下一个令牌并在锁外等待，多个线程排队时依次间隔 1/rate 秒。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取得一个令牌，返回等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def run_staggered(
+    jobs: List[Tuple[str, Callable[[], Any]]],
+    window_seconds: float,
+    max_workers: int = 4,
+    stop_event: Optional[threading.Event] = None,
+    start: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    在 window_seconds 内按 assign_offsets 的偏移启动各任务，并发执行。
+    start 为窗口开始时间，默认为当前时间；已经过去的偏移会立即启动。
+    返回 {key: 返回值}；任务抛出的异常作为返回值记录，未启动的任务不出现在结果中。
+    """
+    if not jobs:
+        return {}
+    start = start or datetime.now()
+    offsets = assign_offsets([key for key, _ in jobs], window_seconds, start.strftime("%Y-%m-%d"))
+    elapsed = (datetime.now() - start).total_seconds()
+    wheel = TimerWheel(tick=min(1.0, max(window_seconds / 1000, 0.01)))
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+        for key, job in jobs:
+            def submit(key=key, job=job):
+                futures[key] = executor.submit(job)
+            wheel.schedule(offsets[key] - elapsed, submit)
+        wheel.run(stop_event)
+
+    results = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            results[key] = e
+    return results
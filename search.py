@@ -0,0 +1,95 @@
+# search.py
+
+"""
+账号搜索索引。
+
+GUI 的账号管理页和会员兑换页按别名、小米ID、登录状态和已配置的会员类型筛选账号，
+账号上百个时每输入一个字都逐个拼接字符串比较会拖慢界面，这里维护一个倒排索引：
+
+- 每个账号的可搜索文本统一转小写，按单字和相邻两字建立 gram -> 账号集合。
+- 查询按空白分词，多个词需同时匹配；每个词先用 gram 集合求交得到候选账号，
+  再在候选的文本中确认子串，前缀查询是子串查询的特例。
+- update() 只重建文本有变化的账号，账号列表刷新时无需重建整个索引。
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# 登录状态的可搜索文本
+LOGGED_IN = '已登录'
+LOGGED_OUT = '未登录'
+
+
+def account_fields(data: Dict[str, Any]) -> Tuple[str, ...]:
+    """账号配置中参与搜索的字段：别名、小米ID、登录状态、已配置的会员类型。"""
+    user_id = data.get('userId')
+    return (
+        str(data.get('us') or ''),
+        str(user_id or ''),
+        LOGGED_IN if user_id else LOGGED_OUT,
+        *(str(config.get('type', '')) for config in data.get('exchange_configs', [])),
+    )
+
+
+def _grams(text: str) -> Set[str]:
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class AccountIndex:
+    """按 key 维护的账号搜索索引，search() 按 update() 传入的顺序返回匹配的 key。"""
+
+    def __init__(self):
+        self._texts: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._order: List[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, entries: Iterable[Tuple[Hashable, Sequence[str]]]) -> None:
+        """用最新的 [(key, 字段)] 同步索引，未变的账号不重新分词。"""
+        order = []
+        texts = {}
+        for key, fields in entries:
+            order.append(key)
+            # 字段之间用换行分隔，查询词不会跨字段匹配
+            texts[key] = '\n'.join(fields).lower()
+        for key in [key for key in self._texts if texts.get(key) != self._texts[key]]:
+            self._remove(key)
+        for key, text in texts.items():
+            if key not in self._texts:
+                self._texts[key] = text
+                for gram in _grams(text):
+                    self._postings.setdefault(gram, set()).add(key)
+        self._order = order
+
+    def _remove(self, key: Hashable) -> None:
+        for gram in _grams(self._texts.pop(key)):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def _candidates(self, term: str) -> Set[Hashable]:
+        grams = sorted((self._postings.get(gram, set()) for gram in _grams(term)), key=len)
+        if not grams or not grams[0]:
+            return set()
+        candidates = set(grams[0])
+        for keys in grams[1:]:
+            candidates &= keys
+            if not candidates:
+                break
+        return {key for key in candidates if term in self._texts[key]}
+
+    def search(self, query: str) -> Optional[List[Hashable]]:
+        """返回匹配的 key；查询为空时返回 None，表示不筛选。"""
+        terms = query.lower().split()
+        if not terms:
+            return None
+        matched: Optional[Set[Hashable]] = None
+        for term in sorted(terms, key=len, reverse=True):
+            keys = self._candidates(term)
+            matched = keys if matched is None else matched & keys
+            if not matched:
+                return []
+        return [key for key in self._order if key in matched]
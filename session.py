@@ -0,0 +1,115 @@
+# session.py
+
+"""
+账号会话。
+
+用 passToken 换取任务接口会话 Cookie 的结果统一为 AccountSession：只有 cUserId 和 serviceToken
+都存在且非空时才构造成功，其余情况一律抛出 SessionError。原先各入口各自判断，main.py 失败后
+仍会创建 ApiRequest 和 RNL 并生成完整通知，3.0 脚本会把值为 None 的 serviceToken 拼进 Cookie
+当作成功，之后每个接口都会失败。
+
+- 凭证本身不完整（缺少字段、userId 不是数字、passToken 含空白或分号）时不发请求。
+- 其余情况只请求一次 serviceLogin，不重试、不等待。
+- 失败的账号不再调用任何接口，批量执行结束时由 format_failure_summary() 统一列出。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+SERVICE_LOGIN_URL = (
+    'https://account.xiaomi.com/pass/serviceLogin?callback=https%3A%2F%2Fapi.jr.airstarfinance.net%2Fsts'
+    '%3Fsign%3D1dbHuyAmee0NAZ2xsRw5vhdVQQ8%253D%26followup%3Dhttps%253A%252F%252Fm.jr.airstarfinance.net'
+    '%252Fmp%252Fapi%252Flogin%253Ffrom%253Dmipay_indexicon_TVcard%2526deepLinkEnable%253Dfalse'
+    '%2526requestUrl%253Dhttps%25253A%25252F%25252Fm.jr.airstarfinance.net%25252Fmp%25252Factivity'
+    '%25252FvideoActivity%25253Ffrom%25253Dmipay_indexicon_TVcard%252526_noDarkMode%25253Dtrue'
+    '%252526_transparentNaviBar%25253Dtrue%252526cUserId%25253Dusyxgr5xjumiQLUoAKTOgvi858Q'
+    '%252526_statusBarHeight%25253D137&sid=jrairstar&_group=DEFAULT&_snsNone=true&_loginType=ticket'
+)
+
+# 失败原因
+INCOMPLETE = 'incomplete'
+EXPIRED = 'expired'
+NETWORK = 'network'
+REASON_LABELS = {
+    INCOMPLETE: '凭证不完整',
+    EXPIRED: '凭证已失效',
+    NETWORK: '网络错误',
+}
+
+
+class SessionError(Exception):
+    """
+    获取会话失败。reason 为 INCOMPLETE / EXPIRED / NETWORK 之一，
+    requests 为失败前实际发出的请求数（0 或 1）。
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.requests = 0 if reason == INCOMPLETE else 1
+
+
+@dataclass(frozen=True, slots=True)
+class AccountSession:
+    """已验证的会话 Cookie。"""
+    c_user_id: str
+    service_token: str
+
+    @classmethod
+    def from_cookies(cls, cookies: Mapping[str, Optional[str]]) -> 'AccountSession':
+        """由 serviceLogin 返回的 Cookie 构造，缺少任一字段时抛出 SessionError。"""
+        c_user_id = cookies.get('cUserId')
+        service_token = cookies.get('serviceToken')
+        if not c_user_id or not service_token:
+            missing = 'cUserId' if not c_user_id else 'serviceToken'
+            raise SessionError(EXPIRED, f"获取会话 Cookie 失败：响应中没有 {missing}，passToken 可能已失效，请重新运行 login.py 刷新凭证")
+        return cls(c_user_id, service_token)
+
+    @property
+    def cookie_header(self) -> str:
+        """任务接口使用的 Cookie 字符串。"""
+        return f"cUserId={self.c_user_id}; jrairstar_serviceToken={self.service_token}"
+
+
+def check_credentials(pass_token: Any, user_id: Any) -> None:
+    """不发请求，只检查凭证格式，不完整时抛出 SessionError。"""
+    if not pass_token or not user_id:
+        missing = '、'.join(name for name, value in (('passToken', pass_token), ('userId', user_id)) if not value)
+        raise SessionError(INCOMPLETE, f"配置不完整：缺少 {missing}")
+    if not str(user_id).isdigit():
+        raise SessionError(INCOMPLETE, "配置不完整：userId 应为数字")
+    if any(char.isspace() or char == ';' for char in str(pass_token)):
+        raise SessionError(INCOMPLETE, "配置不完整：passToken 含有空白或分号，可能复制不完整")
+
+
+def login(requests: Any, pass_token: str, user_id: str, user_agent: str, timeout: float = 10) -> AccountSession:
+    """
+    校验凭证后请求一次 serviceLogin 换取会话 Cookie。
+    requests 为调用方已导入的 requests 模块，失败时抛出 SessionError。
+    """
+    check_credentials(pass_token, user_id)
+    headers = {
+        'user-agent': user_agent,
+        'cookie': f'passToken={pass_token}; userId={user_id};'
+    }
+    try:
+        with requests.Session() as session:
+            session.get(url=SERVICE_LOGIN_URL, headers=headers, verify=False, timeout=timeout)
+            cookies = session.cookies.get_dict()
+    except requests.RequestException as e:
+        raise SessionError(NETWORK, f"获取会话 Cookie 时网络请求失败：{type(e).__name__}") from e
+    return AccountSession.from_cookies(cookies)
+
+
+def format_failure_summary(failures: Sequence[Tuple[str, SessionError]]) -> str:
+    """批量执行结束后汇总会话失败的账号，没有失败时返回空字符串。"""
+    if not failures:
+        return ''
+    lines = [f"⚠️ {len(failures)} 个账号未能建立会话，已跳过（共发出 {sum(e.requests for _, e in failures)} 次请求）："]
+    for reason, label in REASON_LABELS.items():
+        names = [us for us, e in failures if e.reason == reason]
+        if names:
+            lines.append(f"  - {label}（{len(names)}）：{', '.join(names)}")
+    if any(e.reason != NETWORK for _, e in failures):
+        lines.append("  请重新运行 login.py 或用 manage.py import 更新这些账号的凭证。")
+    return "\n".join(lines)
@@ -0,0 +1,361 @@
+# workflow.py
+
+"""
+任务工作流：以步骤 DAG 描述 RNL 的执行顺序。
+
+run_main_workflow 原先是手写的一串调用和 time.sleep，gui.py 又复制了一份，两者在今日已有记录时的处理、
+等待的位置上略有不同。这里把工作流声明为一组 Step：
+
+- after:      依赖的步骤，全部结束后才开始；没有依赖关系的步骤在线程池中同时执行，等待时间相互重叠。
+- spacing:    依赖结束后至少间隔的秒数范围（随机取值），代替原先步骤之间的固定等待。
+- idempotent: 非幂等步骤（完成任务、领奖）当天完成过一次后，再次执行时直接跳过；
+              步骤状态保存在结果存储中（见 result_store.save_step_state），中断后重新执行即从断点继续。
+- optional:   可选步骤失败不影响整个工作流的结果，依赖它的步骤照常执行。
+- when:       前置条件，不满足时记为跳过，依赖它的步骤照常执行。
+
+必需步骤失败时，依赖它的步骤不再执行（blocked），工作流返回 False。接口熔断和取消会中止整个工作流：
+不再启动新的步骤，等已开始的步骤结束后重新抛出。每个步骤结束时记录耗时并发布 progress 的步骤事件。
+
+rnl_steps() 给出 RNL 的默认工作流，main.RNL 和 gui.RNL 共用；修改执行顺序只需修改这里的步骤声明。
+"""
+
+import contextvars
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from activities import DEFAULT_ACTIVITY, Activity
+from breaker import CircuitOpenError
+from cancel import Cancelled
+from eventlog import event_log
+from progress import STEP_FINISHED, STEP_STARTED, progress_bus
+from result_store import load_step_state, save_step_state
+
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+BLOCKED = 'blocked'
+STATUS_LABELS = {
+    DONE: '完成',
+    FAILED: '失败',
+    SKIPPED: '跳过',
+    BLOCKED: '未执行',
+}
+
+# 中止整个工作流的异常
+ABORT_ERRORS = (CircuitOpenError, Cancelled)
+
+# 每个账号同时执行的步骤数上限
+MAX_PARALLEL_STEPS = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    name: str
+    # 接收工作流的执行对象（RNL），返回是否成功
+    action: Callable[[Any], bool]
+    label: str = ''
+    after: Tuple[str, ...] = ()
+    spacing: Tuple[float, float] = (0.0, 0.0)
+    idempotent: bool = True
+    optional: bool = False
+    when: Optional[Callable[[Any], bool]] = None
+
+    @property
+    def title(self) -> str:
+        return self.label or self.name
+
+
+@dataclass(slots=True)
+class StepOutcome:
+    status: str
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+    # 当天已完成、本次未执行
+    resumed: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'status': self.status, 'elapsed_ms': round(self.elapsed_ms, 1), 'error': self.error}
+
+
+def check_steps(steps: Sequence[Step]) -> None:
+    """检查步骤名不重复、依赖存在且没有环，否则抛出 ValueError。"""
+    names = {}
+    for step in steps:
+        if step.name in names:
+            raise ValueError(f"步骤 {step.name} 重复声明")
+        names[step.name] = step
+    for step in steps:
+        unknown = [name for name in step.after if name not in names]
+        if unknown:
+            raise ValueError(f"步骤 {step.name} 依赖的步骤不存在：{', '.join(unknown)}")
+    # 按依赖逐层消去，剩下的步骤即在环上
+    remaining = {step.name: set(step.after) for step in steps}
+    while remaining:
+        ready = [name for name, after in remaining.items() if not after & remaining.keys()]
+        if not ready:
+            raise ValueError(f"步骤之间存在循环依赖：{', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+
+
+class WorkflowExecutor:
+    """
+    按依赖关系执行一组步骤。
+    pause 为执行对象的可中断等待（RNL._pause）；给出 us 时读取并保存当天的步骤状态。
+    listener 在调用 run() 的线程中依次收到每个步骤的 (Step, StepOutcome)。
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[Step],
+        target: Any,
+        pause: Callable[[float], None],
+        us: Optional[str] = None,
+        listener: Optional[Callable[[Step, StepOutcome], None]] = None,
+        max_workers: int = MAX_PARALLEL_STEPS,
+    ):
+        check_steps(steps)
+        self.steps = list(steps)
+        self._by_name = {step.name: step for step in self.steps}
+        self.target = target
+        self.pause = pause
+        self.us = us
+        self.listener = listener
+        self.max_workers = max(1, max_workers)
+        self.date = datetime.now().strftime('%Y-%m-%d')
+        self.outcomes: Dict[str, StepOutcome] = {}
+        self._saved: Dict[str, Dict[str, Any]] = {}
+
+    def run(self) -> bool:
+        """执行所有步骤，必需步骤全部完成（或跳过）时返回 True。"""
+        self._saved = dict(load_step_state(self.us, self.date)) if self.us else {}
+        self.outcomes = {}
+        pending = {step.name: step for step in self.steps}
+        running: Dict[Any, Step] = {}
+        abort: Optional[BaseException] = None
+        workers = min(self.max_workers, len(self.steps)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='step') as pool:
+            while True:
+                if abort is None:
+                    for step in self._ready(pending):
+                        # 复制上下文，步骤中的日志和进度事件仍归属当前账号
+                        running[pool.submit(contextvars.copy_context().run, self._run_step, step)] = step
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except ABORT_ERRORS as e:
+                        abort = abort or e
+                        outcome = StepOutcome(FAILED, error=str(e))
+                    self._finish(step, outcome)
+        if abort is not None:
+            raise abort
+        return all(
+            step.optional or self.outcomes.get(step.name, StepOutcome(BLOCKED)).status in (DONE, SKIPPED)
+            for step in self.steps
+        )
+
+    def _ready(self, pending: Dict[str, Step]) -> List[Step]:
+        """取出依赖已满足的步骤；依赖失败的记为 blocked，当天已完成的非幂等步骤记为完成，反复直到没有变化。"""
+        ready = []
+        changed = True
+        while changed:
+            changed = False
+            for step in list(pending.values()):
+                states = [self._satisfied(name) for name in step.after]
+                if None in states:
+                    continue
+                del pending[step.name]
+                changed = True
+                if not all(states):
+                    self._finish(step, StepOutcome(BLOCKED, error='依赖的步骤未完成'))
+                elif not step.idempotent and self._saved.get(step.name, {}).get('status') == DONE:
+                    self._finish(step, StepOutcome(DONE, resumed=True))
+                else:
+                    ready.append(step)
+        return ready
+
+    def _satisfied(self, name: str) -> Optional[bool]:
+        """依赖是否满足；尚未结束时返回 None。"""
+        outcome = self.outcomes.get(name)
+        if outcome is None:
+            return None
+        if outcome.status in (DONE, SKIPPED):
+            return True
+        return self._by_name[name].optional and outcome.status == FAILED
+
+    def _run_step(self, step: Step) -> StepOutcome:
+        if step.when is not None and not step.when(self.target):
+            return StepOutcome(SKIPPED)
+        low, high = step.spacing
+        if high > 0:
+            self.pause(random.uniform(low, high))
+        progress_bus.publish(STEP_STARTED, step=step.title)
+        started = time.perf_counter()
+        error = None
+        try:
+            ok = bool(step.action(self.target))
+        except ABORT_ERRORS:
+            progress_bus.publish(STEP_FINISHED, step=step.title, ok=False,
+                                 elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+            raise
+        except Exception as e:
+            ok, error = False, str(e)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        progress_bus.publish(STEP_FINISHED, step=step.title, ok=ok, elapsed_ms=round(elapsed_ms, 1))
+        return StepOutcome(DONE if ok else FAILED, elapsed_ms, error)
+
+    def _finish(self, step: Step, outcome: StepOutcome) -> None:
+        """记录步骤结果：输出耗时，保存执行过的步骤状态，通知 listener。"""
+        self.outcomes[step.name] = outcome
+        detail = f"（{outcome.error}）" if outcome.error else ''
+        fields = {'step': step.name, 'status': outcome.status, 'elapsed_ms': round(outcome.elapsed_ms, 1)}
+        if outcome.resumed:
+            event_log.info('workflow.step', "  ⏭️ {}：今日已完成，跳过", step.title, **fields)
+        elif outcome.status in (SKIPPED, BLOCKED):
+            event_log.info('workflow.step', "  ⏭️ {}：{}{}", step.title, STATUS_LABELS[outcome.status], detail, **fields)
+        elif outcome.status == FAILED:
+            event_log.warning('workflow.step', "  {} {}：失败，耗时 {:.1f} 秒{}", '⚠️' if step.optional else '❌',
+                              step.title, outcome.elapsed_ms / 1000, detail, **fields)
+        else:
+            event_log.info('workflow.step', "  ⏱️ {}：完成，耗时 {:.1f} 秒", step.title, outcome.elapsed_ms / 1000, **fields)
+        if self.us and outcome.status in (DONE, FAILED) and not outcome.resumed:
+            self._saved[step.name] = outcome.to_dict()
+            try:
+                save_step_state(self.us, self.date, self._saved)
+            except OSError as e:
+                event_log.warning('workflow.step', "  ⚠️ 保存步骤状态失败: {}", e)
+        if self.listener is not None:
+            self.listener(step, outcome)
+
+
+# --- RNL 的默认工作流 ---
+
+def query_step(rnl: Any) -> bool:
+    return rnl.query_user_info_and_records()
+
+
+def refresh_step(rnl: Any) -> bool:
+    event_log.info('workflow.refresh', "  - 所有任务轮次执行完毕，正在刷新最终数据...")
+    return rnl.query_user_info_and_records()
+
+
+def new_user_step(rnl: Any) -> bool:
+    """
+    应用下载试用：只有领到奖励才算完成。
+    接口在任务已完成和请求失败时同样不返回 userTaskId，无法区分，因此该步骤为可选步骤，
+    未领到奖励时记为失败，同一天再次执行时重试，但不影响账号的执行结果。
+    """
+    event_log.info('workflow.new_user', "  - 尝试完成应用下载试用任务...")
+    new_user_task_id = rnl.complete_new_user_task()
+    if not new_user_task_id:
+        event_log.info('workflow.new_user', "  - 应用下载试用任务已完成或不可用。")
+        return False
+    rnl._pause(2)
+    return rnl.receive_new_user_award(new_user_task_id)
+
+
+class BrowseChain:
+    """
+    一个活动的浏览任务轮次：某一轮没有可执行的任务或无法获取 t_id 后，后续轮次跳过。
+    t_id 保存在各活动自己的 BrowseChain 上，与其他同时执行的活动、应用下载试用互不影响。
+    """
+
+    def __init__(self, activity: Activity, primary: bool):
+        self.activity = activity
+        self.primary = primary
+        self.exhausted = False
+        self.t_id: Optional[str] = None
+
+    def target(self, rnl: Any) -> Any:
+        """主活动直接使用工作流的 RNL，其他活动使用共用会话的 RNL（见 main.RNL.for_activity）。"""
+        return rnl if self.primary else rnl.for_activity(self.activity)
+
+    def has_tasks(self, rnl: Any) -> bool:
+        return not self.exhausted
+
+    def run_round(self, rnl: Any, round_num: int) -> bool:
+        rnl = self.target(rnl)
+        label = self.activity.label
+        event_log.info('workflow.browse', "  - [{}] 开始第 {} 轮浏览任务...", label, round_num)
+        tasks = rnl.get_task_list()
+        if tasks is None:
+            # 请求失败（网络错误、熔断等）不能当作今日任务已完成，记为失败以便再次执行
+            event_log.warning('workflow.browse', "  - [{}] 获取任务列表失败：{}", label, rnl.error_info)
+            return False
+        if not tasks:
+            event_log.info('workflow.browse', "  - [{}] 未找到可执行的任务列表，可能今日任务已完成。", label)
+            self.exhausted = True
+            return True
+
+        task = tasks[0]
+        try:
+            self.t_id = task['generalActivityUrlInfo']['id']
+        except (KeyError, TypeError):
+            pass
+
+        if not self.t_id:
+            event_log.warning('workflow.browse', "  - [{}] 无法获取任务 t_id，中断执行。", label)
+            self.exhausted = True
+            return False
+
+        task_id = task['taskId']
+        task_code = task['taskCode']
+        brows_click_url_id = task['generalActivityUrlInfo']['browsClickUrlId']
+
+        rnl._pause(random.randint(10, 15))
+
+        user_task_id = rnl.complete_task(task_id=task_id, t_id=self.t_id, brows_click_url_id=brows_click_url_id)
+
+        rnl._pause(random.randint(2, 4))
+
+        if not user_task_id:
+            user_task_id = rnl.get_task(task_code=task_code)
+            rnl._pause(random.randint(2, 4))
+
+        if not user_task_id:
+            event_log.warning('workflow.browse', "  - [{}] 未能获取 user_task_id，无法领取本轮奖励。", label)
+            return False
+        # 未领到奖励时记为失败，同一天再次执行时重新执行本轮
+        return rnl.receive_award(user_task_id=user_task_id)
+
+
+def rnl_steps(activities: Sequence[Activity] = (DEFAULT_ACTIVITY,)) -> List[Step]:
+    """
+    RNL 的工作流：查询余额和记录后，应用下载试用与各活动的浏览轮次同时开始；
+    同一活动的各轮依次执行，全部结束后刷新余额。第一个活动为主活动，应用下载试用和其余活动的步骤均为可选。
+    """
+    primary = activities[0]
+    steps = [Step('query', query_step, '查询余额和记录')]
+    tails = []
+    if primary.new_user_task:
+        steps.append(Step('new_user', new_user_step, '应用下载试用', after=('query',), idempotent=False, optional=True))
+        tails.append('new_user')
+    for index, activity in enumerate(activities):
+        chain = BrowseChain(activity, primary=index == 0)
+        previous = 'query'
+        for round_num in range(1, activity.browse_rounds + 1):
+            name = f'browse:{activity.code}:{round_num}'
+            steps.append(Step(
+                name,
+                lambda rnl, chain=chain, round_num=round_num: chain.run_round(rnl, round_num),
+                f'{activity.label} 浏览任务 {round_num}/{activity.browse_rounds}',
+                after=(previous,),
+                # 与上一轮之间间隔 2~4 秒
+                spacing=(2, 4) if round_num > 1 else (0, 0),
+                idempotent=False,
+                optional=index > 0,
+                when=chain.has_tasks,
+            ))
+            previous = name
+        tails.append(previous)
+    # 刷新结果不影响本次执行是否成功
+    steps.append(Step('refresh', refresh_step, '刷新余额', after=tuple(tails), spacing=(2, 4), optional=True))
+    return steps
@@ -4,9 +4,20 @@ import requests
 import urllib3
 import platform
 import hashlib
+import sys
 from datetime import datetime
 from typing import Optional, Dict, Any, Union
 
+from breaker import CircuitBreaker
+from endpoints import (
+    API_HOST, COMPLETE_NEW_USER_TASK, COMPLETE_TASK, CONVERT_GOLD_RICH, CONVERT_GOLD_RICH_FORM, GET_PRIZE_STATUS,
+    GET_TASK, GET_TASK_LIST, LUCK_DRAW_APP_LIMIT, LUCK_DRAW_NEW_USER, QUERY_USER_GOLD_RICH_SUM, QUERY_USER_JOIN_LIST,
+    Endpoint,
+)
+from planner import WorkflowTimings, build_plan, estimate_makespan, failed_plan, format_summary
+from records import PREDEFINED_MEMBERSHIPS, AccountRunResult, ExchangeResult, Membership, TaskRecord
+from session import SessionError, format_failure_summary, login
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Push Plus 配置
@@ -16,11 +27,33 @@ PUSH_PLUS_TOKEN = os.environ.get('PUSH_PLUS_TOKEN', '')
 LICENSE_KEY = os.environ.get('LICENSE_KEY', '')
 AUTH_SERVER_URL = os.environ.get('AUTH_SERVER_URL', 'http://110.41.43.81:5000')
 
+# 演练模式：python 小米钱包3.0.py --plan，只调用只读接口输出执行计划，不执行任务
+PLAN_MODE = '--plan' in sys.argv
+# 本脚本 RNL.main 中的固定等待
+V3_TIMINGS = WorkflowTimings(
+    before_complete=(13, 13),
+    after_complete=(2, 2),
+    after_get_task=(2, 2),
+    after_award=(2, 2),
+    stop_when_no_tasks=False,
+)
+
+# 任务接口熔断器：接口大面积失败时不再逐个等待超时，故障超过 OUTAGE_BUDGET_SECONDS 秒后放弃剩余账号
+API_BREAKER = CircuitBreaker()
+OUTAGE_BUDGET_SECONDS = 60
+
+
+def pause(seconds):
+    """工作流中的固定等待；接口熔断时抛出 CircuitOpenError 立即中止当前账号"""
+    API_BREAKER.check()
+    time.sleep(seconds)
+
+
 class RnlRequest:
     def __init__(self, cookies: Union[str, dict]):
         self.session = requests.Session()
         self._base_headers = {
-            'Host': 'm.jr.airstarfinance.net',
+            'Host': API_HOST,
             'User-Agent': 'Mozilla/5.0 (Linux; U; Android 14; zh-CN; M2012K11AC Build/UKQ1.230804.001; AppBundle/com.mipay.wallet; AppVersionName/6.89.1.5275.2323; AppVersionCode/20577595; MiuiVersion/stable-V816.0.13.0.UMNCNXM; DeviceId/alioth; NetworkType/WIFI; mix_version; WebViewVersion/118.0.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Mobile Safari/537.36 XiaoMi/MiuiBrowser/4.3',
         }
         self.update_cookies(cookies)
@@ -35,6 +68,10 @@ class RnlRequest:
         **kwargs
     ) -> Optional[Dict[str, Any]]:
         headers = {**self._base_headers, **kwargs.pop('headers', {})}
+        if not API_BREAKER.allow():
+            print("[Request Skipped] 接口熔断中，请求未发出")
+            return None
+        kwargs.setdefault('timeout', 15)
         try:
             resp = self.session.request(
                 verify=False,
@@ -46,9 +83,12 @@ class RnlRequest:
                 headers=headers,
                 **kwargs
             )
+            API_BREAKER.record(resp.status_code < 500)
             resp.raise_for_status()
             return resp.json()
         except requests.RequestException as e:
+            if e.response is None:
+                API_BREAKER.record(False)
             print(f"[Request Error] {e}")  # 保留基础错误提示（可选）
         except ValueError as e:
             print(f"[JSON Parse Error] {e}")  # 保留基础错误提示（可选）
@@ -85,6 +125,11 @@ class RnlRequest:
              json: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Dict[str, Any]]:
         return self.request('POST', url, data=data, json=json, **kwargs)
 
+    def call(self, endpoint: Endpoint, **fields) -> Optional[Dict[str, Any]]:
+        """调用 endpoints.py 中注册的接口，fields 为本次调用的参数"""
+        url, kwargs = endpoint.prepare(**fields)
+        return self.request(endpoint.method, url, **kwargs)
+
     def __enter__(self):
         return self
 
@@ -106,14 +151,8 @@ class RNL:
         self.rr = RnlRequest(c)
 
     def get_task_list(self):
-        data = {
-            'activityCode': self.activity_code,
-        }
         try:
-            response = self.rr.post(
-                'https://m.jr.airstarfinance.net/mp/api/generalActivity/getTaskList',
-                data=data,
-            )
+            response = self.rr.call(GET_TASK_LIST)
             if response and response['code'] != 0:
                 print(response)
                 return None
@@ -128,15 +167,7 @@ class RNL:
 
     def get_task(self, task_code):
         try:
-            data = {
-                'activityCode': self.activity_code,
-                'taskCode': task_code,
-                'jrairstar_ph': '98lj8puDf9Tu/WwcyMpVyQ==',
-            }
-            response = self.rr.post(
-                'https://m.jr.airstarfinance.net/mp/api/generalActivity/getTask',
-                data=data,
-            )
+            response = self.rr.call(GET_TASK, taskCode=task_code)
             if response and response['code'] != 0:
                 print(f'获取任务信息失败：{response}')
                 return None
@@ -147,9 +178,7 @@ class RNL:
 
     def complete_task(self, task_id, t_id, brows_click_urlId):
         try:
-            response = self.rr.get(
-                f'https://m.jr.airstarfinance.net/mp/api/generalActivity/completeTask?activityCode={self.activity_code}&app=com.mipay.wallet&isNfcPhone=true&channel=mipay_indexicon_TVcard&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.player%22:%224.27.0.4%22,%22com.miui.video%22:%22v2024090290(MiVideo-UN)%22,%22com.mipay.wallet%22:%226.83.0.5175.2256%22%7D&taskId={task_id}&browsTaskId={t_id}&browsClickUrlId={brows_click_urlId}&clickEntryType=undefined&festivalStatus=0',
-            )
+            response = self.rr.call(COMPLETE_TASK, taskId=task_id, browsTaskId=t_id, browsClickUrlId=brows_click_urlId)
             if response and response['code'] != 0:
                 print(f'完成任务失败：{response}')
                 return None
@@ -160,9 +189,7 @@ class RNL:
 
     def receive_award(self, user_task_id):
         try:
-            response = self.rr.get(
-                f'https://m.jr.airstarfinance.net/mp/api/generalActivity/luckDraw?imei=&device=manet&appLimit=%7B%22com.qiyi.video%22:false,%22com.youku.phone%22:true,%22com.tencent.qqlive%22:true,%22com.hunantv.imgo.activity%22:true,%22com.cmcc.cmvideo%22:false,%22com.sankuai.meituan%22:true,%22com.anjuke.android.app%22:false,%22com.tal.abctimelibrary%22:false,%22com.lianjia.beike%22:false,%22com.kmxs.reader%22:true,%22com.jd.jrapp%22:false,%22com.smile.gifmaker%22:true,%22com.kuaishou.nebula%22:false%7D&activityCode={self.activity_code}&userTaskId={user_task_id}&app=com.mipay.wallet&isNfcPhone=true&channel=mipay_indexicon_TVcard&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.player%22:%224.27.0.4%22,%22com.miui.video%22:%22v2024090290(MiVideo-UN)%22,%22com.mipay.wallet%22:%226.83.0.5175.2256%22%7D'
-            )
+            response = self.rr.call(LUCK_DRAW_APP_LIMIT, userTaskId=user_task_id)
             if response and response['code'] != 0:
                 print(f'领取奖励失败：{response}')
         except Exception as e:
@@ -171,22 +198,7 @@ class RNL:
     def complete_new_user_task(self):
         """完成应用下载试用任务"""
         try:
-            headers = {
-                'Connection': 'keep-alive',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'X-Request-ID': '1281eea0-e268-4fcc-9a5f-7dc11475b7db',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-            
-            url = 'https://m.jr.airstarfinance.net/mp/api/generalActivity/completeTask?activityCode=2211-videoWelfare&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=KWkK5VsKXiIbAH8Rf6kgU6tpDPyNWgXY8YCM1mQtt5nd7i1%2F4BqzPq0uY7OlIEOd&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D&taskCode=NEW_USER_CAMPAIGN&browsTaskId=&browsClickUrlId=1306285&adInfoId=&triggerId='
-            
-            response = self.rr.get(url, headers=headers)
+            response = self.rr.call(COMPLETE_NEW_USER_TASK)
             if response and response['code'] != 0:
                 print(f'完成应用下载试用失败：{response}')
                 return None
@@ -201,27 +213,9 @@ class RNL:
         try:
             # 发送领取请求前延时5秒
             print("等待5秒后领取奖励...")
-            time.sleep(5)
+            pause(5)
             
-            headers = {
-                'Connection': 'keep-alive',
-                'sec-ch-ua': '"Chromium";v="118", "Android WebView";v="118", "Not=A?Brand";v="99"',
-                'Accept': 'application/json, text/plain, */*',
-                'Cache-Control': 'no-cache',
-                'sec-ch-ua-mobile': '?1',
-                'X-Request-ID': 'c09abfa7-6ea4-4435-a741-dff3622215cf',
-                'sec-ch-ua-platform': '"Android"',
-                'X-Requested-With': 'com.mipay.wallet',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Dest': 'empty',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7'
-            }
-            
-            url = f'https://m.jr.airstarfinance.net/mp/api/generalActivity/luckDraw?imei=&device=alioth&appLimit=%7B%22com.qiyi.video%22:false,%22com.youku.phone%22:false,%22com.tencent.qqlive%22:false,%22com.hunantv.imgo.activity%22:false,%22com.cmcc.cmvideo%22:false,%22com.sankuai.meituan%22:false,%22com.anjuke.android.app%22:false,%22com.tal.abctimelibrary%22:false,%22com.lianjia.beike%22:false,%22com.kmxs.reader%22:false,%22com.jd.jrapp%22:false,%22com.smile.gifmaker%22:true,%22com.kuaishou.nebula%22:false%7D&activityCode=2211-videoWelfare&userTaskId={user_task_id}&app=com.mipay.wallet&oaid=8c45c5802867e923&regId=L522i5qLZR9%2Bs25kEqPBJYbbHqUS4LrpuTsgl9kdsbcyU7tjWmx1BewlRNSSZaOT&versionCode=20577622&versionName=6.96.0.5453.2620&isNfcPhone=true&channel=mipay_indexicon_TVcard2test&deviceType=2&system=1&visitEnvironment=2&userExtra=%7B%22platformType%22:1,%22com.miui.video%22:%22v2023091090(MiVideo-ROM)%22,%22com.mipay.wallet%22:%226.96.0.5453.2620%22%7D'
-            
-            response = self.rr.get(url, headers=headers)
+            response = self.rr.call(LUCK_DRAW_NEW_USER, userTaskId=user_task_id)
             if response and response['code'] != 0:
                 print(f'领取应用下载试用务奖励失败：{response}')
                 return False
@@ -235,16 +229,14 @@ class RNL:
 
     def queryUserJoinListAndQueryUserGoldRichSum(self):
         try:
-            total_res = self.rr.get('https://m.jr.airstarfinance.net/mp/api/generalActivity/queryUserGoldRichSum?app=com.mipay.wallet&deviceType=2&system=1&visitEnvironment=2&userExtra={"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}&activityCode=2211-videoWelfare')
+            total_res = self.rr.call(QUERY_USER_GOLD_RICH_SUM)
             if not total_res or total_res['code'] != 0:
                 print(f'获取兑换视频天数失败：{total_res}')
                 return None
             total_days = f"{int(total_res['value']) / 100:.2f}天" if total_res else "未知"
             total_days_num = int(total_res['value']) / 100 if total_res else 0
 
-            response = self.rr.get(
-                f'https://m.jr.airstarfinance.net/mp/api/generalActivity/queryUserJoinList?&userExtra=%7B%22platformType%22:1,%22com.miui.player%22:%224.27.0.4%22,%22com.miui.video%22:%22v2024090290(MiVideo-UN)%22,%22com.mipay.wallet%22:%226.83.0.5175.2256%22%7D&activityCode={self.activity_code}&pageNum=1&pageSize=20',
-            )
+            response = self.rr.call(QUERY_USER_JOIN_LIST, pageNum=1, pageSize=20)
             if not response or response['code'] != 0:
                 print(f'查询任务完成记录失败：{response}')
                 return None
@@ -256,17 +248,10 @@ class RNL:
 
             today_records = []
             for a in history_list:
-                record_time = a['createTime']
-                record_date = record_time[:10]
-                if record_date == current_date:
-                    days = int(a['value']) / 100
-                    record_info = f"{record_time} 领到视频会员，+{days:.2f}天"
-                    print(record_info)
-                    today_records.append({
-                        'time': record_time,
-                        'days': days,
-                        'info': record_info
-                    })
+                record = TaskRecord.from_api(a)
+                if record.date == current_date:
+                    print(record.describe())
+                    today_records.append(record)
 
             # 返回详细数据
             return {
@@ -285,13 +270,7 @@ class RNL:
         try:
             # 使用真实的奖品状态接口
             print("🔍 尝试真实接口: getPrizeStatusV2")
-            url = 'https://m.jr.airstarfinance.net/mp/api/generalActivity/getPrizeStatusV2'
-            params = {
-                'activityCode': self.activity_code,
-                'needPrizeBrand': 'youku,mgtv,iqiyi,tencent,bilibili,other'
-            }
-            
-            response = self.rr.get(url, params=params)
+            response = self.rr.call(GET_PRIZE_STATUS)
             
             if response and response.get('code') == 0:
                 print(f"✅ 接口调用成功: getPrizeStatusV2")
@@ -303,17 +282,9 @@ class RNL:
                 if isinstance(prize_list, list):
                     for prize in prize_list:
                         try:
-                            # 解析每个奖品的信息
-                            prize_id = prize.get('prizeId')
                             prize_name = prize.get('prizeName', '')
-                            prize_brand = prize.get('prizeBrand', '')
-                            need_gold_rice = prize.get('needGoldRice', 0)
-                            prize_code = prize.get('prizeCode', '')
-                            stock_status = prize.get('stockStatus', 0)
-                            today_stock_status = prize.get('todayStockStatus', 0)
-                            
                             # 计算消耗天数 (needGoldRice / 100)
-                            cost_days = float(need_gold_rice) / 100.0
+                            cost_days = float(prize.get('needGoldRice', 0)) / 100.0
                             
                             # 只处理有库存且消耗天数为31天的月卡，排除1分购特权
                             prize_type = prize.get('prizeType', 0)
@@ -326,24 +297,10 @@ class RNL:
                             is_direct_exchange = prize_type == 26
                             is_monthly_card = cost_days == 31.0
                             is_not_privilege = '1分购' not in prize_name and '特权' not in prize_name
-                            has_stock = stock_status == 1
+                            has_stock = prize.get('stockStatus', 0) == 1
                             
                             if has_stock and is_monthly_card and is_direct_exchange and is_not_privilege:
-                                membership = {
-                                    'id': prize_code,
-                                    'prizeId': prize_id,
-                                    'name': prize_name,
-                                    'description': prize.get('prizeDesc', ''),
-                                    'cost_days': cost_days,
-                                    'exchange_type': 'direct',  # 直接兑换
-                                    'status': 'available' if today_stock_status == 1 else 'out_of_stock',
-                                    'stock': stock_status,
-                                    'brand': prize_brand,
-                                    'needGoldRice': need_gold_rice,
-                                    'prizeBatchId': prize.get('prizeBatchId', ''),
-                                    'prizeType': prize_type
-                                }
-                                memberships.append(membership)
+                                memberships.append(Membership.from_prize(prize))
                         
                         except Exception as parse_error:
                             print(f"   ⚠️ 解析奖品失败: {parse_error}")
@@ -438,33 +395,18 @@ class RNL:
     def exchange_membership(self, membership_info, phone_number):
         """兑换会员"""
         try:
-            membership_name = membership_info['name']
-            prize_id = membership_info['prizeId']
-            prize_batch_id = membership_info.get('prizeBatchId', '')
+            membership_name = membership_info.name
+            prize_id = membership_info.prize_id
             
             print(f"🔍 尝试兑换 {membership_name} (PrizeID: {prize_id})")
             
             # 使用真实的兑换接口
             print(f"🔍 使用真实兑换接口: convertGoldRich")
-            url = 'https://m.jr.airstarfinance.net/mp/api/generalActivity/convertGoldRich'
-            
-            # 根据抓包数据构建参数
-            params = {
-                'prizeCode': membership_info['id'],  # 使用 prizeCode
-                'activityCode': self.activity_code,
-                'phone': phone_number,
-                'isNfcPhone': 'false',
-                'channel': 'exchange',
-                'deviceType': '2',
-                'system': '1', 
-                'visitEnvironment': '2',
-                'userExtra': '{"platformType":1,"com.miui.player":"4.27.0.4","com.miui.video":"v2024090290(MiVideo-UN)","com.mipay.wallet":"6.83.0.5175.2256"}'
-            }
             
             try:
                 # 使用GET方法（根据抓包显示）
                 print(f"📞 正在为手机号 {phone_number} 兑换 {membership_name}...")
-                response = self.rr.get(url, params=params)
+                response = self.rr.call(CONVERT_GOLD_RICH, prizeCode=membership_info.id, phone=phone_number)
                 
                 # 检查响应
                 if response:
@@ -493,7 +435,7 @@ class RNL:
                 # 备用：尝试POST方法
                 try:
                     print(f"🔄 尝试POST方法兑换...")
-                    response = self.rr.post(url, data=params)
+                    response = self.rr.call(CONVERT_GOLD_RICH_FORM, prizeCode=membership_info.id, phone=phone_number)
                     
                     if response and isinstance(response, dict) and response.get('code') == 0:
                         print(f'✅ 兑换{membership_name}成功！手机号：{phone_number}')
@@ -511,61 +453,12 @@ class RNL:
             return False
                 
         except Exception as e:
-            print(f'❌ 兑换{membership_info.get("name", "未知会员")}异常：{e}')
+            print(f'❌ 兑换{membership_info.name or "未知会员"}异常：{e}')
             return False
 
     def get_predefined_memberships(self):
         """获取预定义的会员兑换列表（当API不可用时使用）"""
-        return [
-            {
-                'id': 'tencent_video_month',
-                'prizeId': 'tencent_month',
-                'name': '腾讯视频VIP月卡',
-                'description': '腾讯视频VIP月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'tencent',
-                'prizeBatchId': 'LSXD_PRIZE1263'
-            },
-            {
-                'id': 'iqiyi_month',
-                'prizeId': 'iqiyi_month',
-                'name': '爱奇艺黄金会员月卡',
-                'description': '爱奇艺黄金会员月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'iqiyi',
-                'prizeBatchId': 'LSXD_PRIZE1267'
-            },
-            {
-                'id': 'youku_month',
-                'prizeId': 'youku_month',
-                'name': '优酷VIP会员月卡',
-                'description': '优酷VIP会员月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'youku',
-                'prizeBatchId': 'LSXD_PRIZE1262'
-            },
-            {
-                'id': 'mgtv_month',
-                'prizeId': 'mgtv_month',
-                'name': '芒果TV会员月卡',
-                'description': '芒果TV月卡',
-                'cost_days': 31.0,
-                'exchange_type': 'direct',
-                'status': 'available',
-                'stock': 999,
-                'brand': 'mgtv',
-                'prizeBatchId': 'LSXD_PRIZE1264'
-            }
-        ]
+        return list(PREDEFINED_MEMBERSHIPS)
 
     def auto_exchange_memberships(self, exchange_configs, current_days):
         """自动兑换会员"""
@@ -591,18 +484,15 @@ class RNL:
         for membership in all_memberships:
             for config_type in configured_types:
                 # 检查品牌和名称匹配
-                brand_match = config_type.lower() in membership['brand'].lower() or membership['brand'].lower() in config_type.lower()
-                name_match = config_type in membership['name'] or membership['name'] in config_type
-                
-                if brand_match or name_match:
+                if membership.matches(config_type):
                     memberships.append(membership)
-                    if membership['status'] == 'available':
+                    if membership.available:
                         status_text = "✅可兑换"
                         status_icon = "📱"
                     else:
                         status_text = "❌今日无库存"
                         status_icon = "🔒"
-                    print(f"   {status_icon} {membership['name']} - 消耗{membership['cost_days']:.2f}天 [{status_text}] [匹配:{config_type}]")
+                    print(f"   {status_icon} {membership.name} - 消耗{membership.cost_days:.2f}天 [{status_text}] [匹配:{config_type}]")
                     break
         
         if not memberships:
@@ -621,61 +511,39 @@ class RNL:
             
             # 查找匹配的会员类型（优先选择直接兑换的月卡）
             matched_membership = None
-            potential_matches = []
-            
-            for membership in memberships:
-                # 检查品牌和名称匹配
-                brand_match = membership_type.lower() in membership['brand'].lower() or membership['brand'].lower() in membership_type.lower()
-                name_match = membership_type in membership['name'] or membership['name'] in membership_type
-                
-                if brand_match or name_match:
-                    potential_matches.append(membership)
+            potential_matches = [membership for membership in memberships if membership.matches(membership_type)]
             
             # 优先选择直接兑换的月卡（非特权类型）
             if potential_matches:
                 # 按优先级排序：直接兑换 > 今日有库存 > 消耗天数最接近31天
-                def priority_score(m):
-                    score = 0
-                    if m['exchange_type'] == 'direct':
-                        score += 1000  # 最高优先级：直接兑换
-                    if m['status'] == 'available':
-                        score += 100   # 其次：今日有库存
-                    if m['cost_days'] == 31.0:
-                        score += 10    # 最后：消耗天数为31天
-                    return score
-                
-                potential_matches.sort(key=priority_score, reverse=True)
+                potential_matches.sort(key=Membership.priority, reverse=True)
                 matched_membership = potential_matches[0]
                 
-                print(f"🎯 找到{len(potential_matches)}个匹配项，选择优先级最高的：{matched_membership['name']}")
+                print(f"🎯 找到{len(potential_matches)}个匹配项，选择优先级最高的：{matched_membership.name}")
             
             if not matched_membership:
                 print(f"❌ 未找到匹配的会员类型：{membership_type}")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'未找到匹配的会员类型：{membership_type}'
-                })
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'未找到匹配的会员类型：{membership_type}'
+                ))
                 continue
             
             # 检查天数是否充足
-            required_days = matched_membership['cost_days']
+            required_days = matched_membership.cost_days
             print(f"💰 需要消耗：{required_days:.2f}天")
             
             # 首先检查库存状态
-            if matched_membership['status'] != 'available':
-                print(f"❌ {matched_membership['name']} 今日无库存，跳过兑换")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'{matched_membership["name"]} 今日无库存'
-                })
+            if not matched_membership.available:
+                print(f"❌ {matched_membership.name} 今日无库存，跳过兑换")
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'{matched_membership.name} 今日无库存'
+                ))
                 continue
             
             if current_days >= required_days:
-                print(f"✅ 天数充足，库存充足，开始兑换 {matched_membership['name']}")
+                print(f"✅ 天数充足，库存充足，开始兑换 {matched_membership.name}")
                 
                 # 执行兑换
                 print(f"⚠️ 注意：兑换功能正在尝试调用接口，如果失败请手动兑换")
@@ -686,34 +554,37 @@ class RNL:
                 
                 if success:
                     current_days -= required_days  # 更新剩余天数
-                    exchange_results.append({
-                        'type': membership_type,
-                        'phone': phone_number,
-                        'success': True,
-                        'message': f'成功兑换 {matched_membership["name"]}，消耗{required_days:.2f}天',
-                        'cost_days': required_days
-                    })
+                    exchange_results.append(ExchangeResult(
+                        membership_type, phone_number, True,
+                        f'成功兑换 {matched_membership.name}，消耗{required_days:.2f}天',
+                        cost_days=required_days
+                    ))
                     print(f"💎 兑换成功！剩余天数：{current_days:.2f}天")
                 else:
-                    exchange_results.append({
-                        'type': membership_type,
-                        'phone': phone_number,
-                        'success': False,
-                        'message': f'兑换 {matched_membership["name"]} 失败'
-                    })
+                    exchange_results.append(ExchangeResult(
+                        membership_type, phone_number, False,
+                        f'兑换 {matched_membership.name} 失败'
+                    ))
             else:
                 print(f"❌ 天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天")
-                exchange_results.append({
-                    'type': membership_type,
-                    'phone': phone_number,
-                    'success': False,
-                    'message': f'天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天'
-                })
+                exchange_results.append(ExchangeResult(
+                    membership_type, phone_number, False,
+                    f'天数不足：需要{required_days:.2f}天，当前仅有{current_days:.2f}天'
+                ))
             
-            time.sleep(2)  # 兑换间隔
+            pause(2)  # 兑换间隔
         
         return exchange_results
 
+    def plan(self, name, exchange_configs=None):
+        """演练模式：只调用只读接口，推演 main() 会发出的请求"""
+        initial_data = self.queryUserJoinListAndQueryUserGoldRichSum()
+        if not initial_data:
+            return failed_plan(name, '获取初始数据失败', requests=3)
+        tasks = self.get_task_list() or []
+        memberships = self.get_exchange_memberships() if exchange_configs else []
+        return build_plan(name, initial_data['total_days_num'], len(tasks), memberships, exchange_configs or [], V3_TIMINGS)
+
     def main(self, exchange_configs=None):
         # 获取执行前的数据
         initial_data = self.queryUserJoinListAndQueryUserGoldRichSum()
@@ -724,9 +595,9 @@ class RNL:
         print("\n>>> 应用下载试用任务 <<<")
         new_user_task_id = self.complete_new_user_task()
         if new_user_task_id:
-            time.sleep(2)
+            pause(2)
             self.receive_new_user_award(new_user_task_id)
-            time.sleep(2)
+            pause(2)
         
         # 原有的浏览任务逻辑
         for i in range(2):
@@ -746,7 +617,7 @@ class RNL:
             task_code = task['taskCode']
             brows_click_url_id = task['generalActivityUrlInfo']['browsClickUrlId']
 
-            time.sleep(13)
+            pause(13)
 
             # 完成任务
             user_task_id = self.complete_task(
@@ -755,19 +626,19 @@ class RNL:
                 brows_click_urlId=brows_click_url_id,
             )
 
-            time.sleep(2)
+            pause(2)
 
             # 获取任务数据
             if not user_task_id:
                 user_task_id = self.get_task(task_code=task_code)
-                time.sleep(2)
+                pause(2)
 
             # 领取奖励
             self.receive_award(
                 user_task_id=user_task_id
             )
 
-            time.sleep(2)
+            pause(2)
         
         # 获取执行后的数据
         final_data = self.queryUserJoinListAndQueryUserGoldRichSum()
@@ -783,6 +654,7 @@ class RNL:
         return {
             'success': True,
             'total_days': final_data['total_days'],
+            'total_days_num': final_data['total_days_num'],
             'current_date': final_data['current_date'],
             'today_records': final_data['today_records'],
             'total_records_count': final_data['total_records_count'],
@@ -936,20 +808,9 @@ def parse_accounts_from_env():
     return accounts
 
 def get_xiaomi_cookies(pass_token, user_id):
-    session = requests.Session()
-    login_url = 'https://account.xiaomi.com/pass/serviceLogin?callback=https%3A%2F%2Fapi.jr.airstarfinance.net%2Fsts%3Fsign%3D1dbHuyAmee0NAZ2xsRw5vhdVQQ8%253D%26followup%3Dhttps%253A%252F%252Fm.jr.airstarfinance.net%252Fmp%252Fapi%252Flogin%253Ffrom%253Dmipay_indexicon_TVcard%2526deepLinkEnable%253Dfalse%2526requestUrl%253Dhttps%25253A%25252F%25252Fm.jr.airstarfinance.net%25252Fmp%25252Factivity%25252FvideoActivity%25253Ffrom%25253Dmipay_indexicon_TVcard%252526_noDarkMode%25253Dtrue%252526_transparentNaviBar%25253Dtrue%252526cUserId%25253Dusyxgr5xjumiQLUoAKTOgvi858Q%252526_statusBarHeight%25253D137&sid=jrairstar&_group=DEFAULT&_snsNone=true&_loginType=ticket'
-    headers = {
-        'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0',
-        'cookie': f'passToken={pass_token}; userId={user_id};'
-    }
-
-    try:
-        session.get(url=login_url, headers=headers, verify=False)
-        cookies = session.cookies.get_dict()
-        return f"cUserId={cookies.get('cUserId')};jrairstar_serviceToken={cookies.get('serviceToken')}"
-    except Exception as e:
-        print(f"获取Cookie失败: {e}")
-        return None
+    """获取会话 Cookie，cUserId 或 serviceToken 缺失、网络错误时抛出 SessionError"""
+    user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0'
+    return login(requests, pass_token, user_id, user_agent).cookie_header
 
 if __name__ == "__main__":
     print("🚀 小米钱包3.0脚本启动")
@@ -988,76 +849,89 @@ if __name__ == "__main__":
     
     # 获取Cookie
     cookie_list = []
+    session_failures = []
     for account in accounts:
         print(f"\n>>>>>>>>>> 正在处理账号 {account['name']} (ID: {account['userId']}) <<<<<<<<<<")
-        new_cookie = get_xiaomi_cookies(account['passToken'], account['userId'])
-        if new_cookie:
-            cookie_list.append({
-                'cookie': new_cookie,
-                'name': account['name'],
-                'userId': account['userId'],
-                'exchange_configs': account.get('exchange_configs', [])  # 添加兑换配置
-            })
-            print(f"✅ 账号 {account['name']} Cookie获取成功")
-        else:
-            print(f"❌ 账号 {account['name']} Cookie获取失败，请检查配置")
+        try:
+            new_cookie = get_xiaomi_cookies(account['passToken'], account['userId'])
+        except SessionError as e:
+            # 会话无效的账号直接跳过，不再调用任何接口
+            session_failures.append((account['name'], e))
+            print(f"❌ 账号 {account['name']} 已跳过：{e}")
+            continue
+        cookie_list.append({
+            'cookie': new_cookie,
+            'name': account['name'],
+            'userId': account['userId'],
+            'exchange_configs': account.get('exchange_configs', [])  # 添加兑换配置
+        })
+        print(f"✅ 账号 {account['name']} Cookie获取成功")
 
     print(f"\n>>>>>>>>>> 共获取到 {len(cookie_list)} 个有效Cookie <<<<<<<<<<")
+
+    if PLAN_MODE:
+        # 演练模式不执行任务、不发送通知；本脚本逐个账号顺序执行
+        plans = [failed_plan(name, str(e), requests=e.requests) for name, e in session_failures]
+        plans += [RNL(info['cookie']).plan(info['name'], info['exchange_configs']) for info in cookie_list]
+        print("\n" + "=" * 60)
+        for plan in plans:
+            print(plan.describe())
+        print(format_summary(plans, estimate_makespan(plans, [plan.us for plan in plans], 0, 1), 0, 1))
+        exit(0)
     
+    failure_summary = format_failure_summary(session_failures)
+    if failure_summary:
+        print(failure_summary)
+
     if not cookie_list:
         error_msg = "❌ 没有获取到任何有效的Cookie，脚本退出"
         print(error_msg)
-        send_pushplus_notification("小米钱包脚本执行失败", f"<p>{error_msg}</p><p>请检查账号配置</p>")
+        send_pushplus_notification("小米钱包脚本执行失败", f"<p>{error_msg}</p><p>{failure_summary}</p>")
         exit(1)
 
     # 执行任务
     account_results = []
     
     for index, account_info in enumerate(cookie_list):
+        if API_BREAKER.outage_seconds() >= OUTAGE_BUDGET_SECONDS:
+            print(f"\n❌ 任务接口故障已持续超过 {OUTAGE_BUDGET_SECONDS} 秒，剩余 {len(cookie_list) - index} 个账号未执行")
+            break
         print(f"\n--------- 开始执行第{index+1}个账号：{account_info['name']} ---------")
+        account_result = AccountRunResult(
+            us=account_info['name'],
+            user_id=account_info['userId'],
+            exchange_configs=account_info.get('exchange_configs', []),
+        )
         try:
             # 传递兑换配置给main方法
-            result = RNL(account_info['cookie']).main(account_info.get('exchange_configs', []))
+            result = RNL(account_info['cookie']).main(account_result.exchange_configs)
             if result and result.get('success'):
-                account_results.append({
-                    'name': account_info['name'],
-                    'userId': account_info['userId'],
-                    'status': 'success',
-                    'total_days': result.get('total_days', '未知'),
-                    'current_date': result.get('current_date', ''),
-                    'today_records': result.get('today_records', []),
-                    'total_records_count': result.get('total_records_count', 0),
-                    'exchange_results': result.get('exchange_results', [])  # 添加兑换结果
-                })
+                account_result.success = True
+                account_result.total_days = result.get('total_days_num')
+                account_result.today_records = result.get('today_records', [])
+                account_result.exchange_results = result.get('exchange_results', [])  # 添加兑换结果
                 print(f"✅ 账号 {account_info['name']} 执行完成")
             else:
-                error_msg = result.get('error', '执行失败') if result else '执行失败'
-                account_results.append({
-                    'name': account_info['name'],
-                    'userId': account_info['userId'],
-                    'status': 'failed',
-                    'error': error_msg
-                })
-                print(f"❌ 账号 {account_info['name']} 执行失败: {error_msg}")
+                account_result.error = result.get('error', '执行失败') if result else '执行失败'
+                print(f"❌ 账号 {account_info['name']} 执行失败: {account_result.error}")
         except Exception as e:
-            account_results.append({
-                'name': account_info['name'],
-                'userId': account_info['userId'],
-                'status': 'failed',
-                'error': str(e)
-            })
+            account_result.error = str(e)
             print(f"❌ 账号 {account_info['name']} 执行异常: {str(e)}")
+        account_result.finish()
+        account_results.append(account_result)
         print(f"--------- 第{index+1}个账号执行结束 ---------")
     
     # 汇总结果
     total_accounts = len(account_results)
-    success_results = [r for r in account_results if r['status'] == 'success']
-    failed_results = [r for r in account_results if r['status'] == 'failed']
+    success_results = [r for r in account_results if r.success]
+    failed_results = [r for r in account_results if not r.success]
     success_count = len(success_results)
     failed_count = len(failed_results)
     
     result_summary = f"\n🎉 所有账号处理完成！\n📊 执行结果统计：\n✅ 成功：{success_count}个\n❌ 失败：{failed_count}个\n📝 总计：{total_accounts}个"
     print(result_summary)
+    if failure_summary:
+        print(failure_summary)
     
     # 发送Push Plus通知
     if PUSH_PLUS_TOKEN:
@@ -1070,25 +944,21 @@ if __name__ == "__main__":
         
         # 添加成功账号的详细信息
         for result in success_results:
-            notification_content += f"✅ {result['name']} (ID: {result['userId']})\n"
-            notification_content += f"当前兑换视频天数：{result['total_days']}\n"
-            notification_content += f"---------- {result['current_date']} 当天任务记录 ----------\n"
+            notification_content += f"✅ {result.us} (ID: {result.user_id})\n"
+            notification_content += f"当前兑换视频天数：{result.total_days_text}\n"
+            notification_content += f"---------- {result.start_time[:10]} 当天任务记录 ----------\n"
             
-            if result['today_records']:
-                for record in result['today_records']:
-                    notification_content += f"{record['info']}\n"
+            if result.today_records:
+                for record in result.today_records:
+                    notification_content += f"{record.describe()}\n"
             else:
                 notification_content += "今日暂无任务记录\n"
             
             # 添加会员兑换结果
-            exchange_results = result.get('exchange_results', [])
-            if exchange_results:
+            if result.exchange_results:
                 notification_content += f"---------- 会员兑换结果 ----------\n"
-                for exchange in exchange_results:
-                    if exchange['success']:
-                        notification_content += f"✅ {exchange['type']} -> {exchange['phone']}: {exchange['message']}\n"
-                    else:
-                        notification_content += f"❌ {exchange['type']} -> {exchange['phone']}: {exchange['message']}\n"
+                for exchange in result.exchange_results:
+                    notification_content += f"{exchange.describe()}\n"
             else:
                 notification_content += "---------- 无会员兑换配置 ----------\n"
             
@@ -1098,7 +968,9 @@ if __name__ == "__main__":
         if failed_results:
             notification_content += "❌ 失败账号\n"
             for result in failed_results:
-                notification_content += f"{result['name']}: {result.get('error', '未知错误')}\n"
+                notification_content += f"{result.us}: {result.error or '未知错误'}\n"
+        if failure_summary:
+            notification_content += f"\n{failure_summary}\n"
         
         title = f"小米钱包脚本完成 ({success_count}/{total_accounts})"
         send_pushplus_notification(title, notification_content)